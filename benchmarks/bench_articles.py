@@ -0,0 +1,157 @@
+"""
+Memory and inter-process cost of carrying scraped articles as per-row dicts versus
+`ArticleBatch` columns.
+
+Articles are rebuilt with freshly allocated strings, the way a parser produces
+them, before being collected, so string sharing between rows only happens where
+the real sources share it (the ticker passed to every row of a fetch). Memory is
+traced allocation per 100k articles while the container is alive; IPC is the mean
+pickled size of one ticker's articles, which is what a worker process sends back
+to its parent.
+
+```
+uv run benchmarks/bench_articles.py
+uv run benchmarks/bench_articles.py --articles 200000 --update-baseline
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import pickle  # nosec B403
+import statistics
+import sys
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import pandas as pd
+from harness import BenchResult, add_common_args, finish, time_call
+from synthetic import make_articles, make_tickers
+
+from articles import ARTICLE_COLUMNS, ArticleBatch
+
+SUITE = 'articles'
+PER_ARTICLES = 100_000
+
+
+def fresh(value: str) -> str:
+    """An equal string in a new object, as a parser would return it."""
+    return value.encode().decode()
+
+
+def collect_dicts(rows: list[tuple[str, ...]]) -> list[dict[str, str]]:
+    return [
+        {
+            'ticker': ticker,
+            'headline': fresh(headline),
+            'date_posted': fresh(date_posted),
+            'article_link': fresh(article_link),
+            'source': fresh(source),
+        }
+        for ticker, headline, date_posted, article_link, source in rows
+    ]
+
+
+def collect_batch(rows: list[tuple[str, ...]]) -> ArticleBatch:
+    batch = ArticleBatch()
+    for ticker, headline, date_posted, article_link, source in rows:
+        batch.append(
+            ticker,
+            fresh(headline),
+            fresh(date_posted),
+            fresh(article_link),
+            fresh(source),
+        )
+    return batch
+
+
+def traced_bytes(build: Callable[[], Any]) -> int:
+    """Bytes still allocated by `build()` while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--articles', type=int, default=PER_ARTICLES)
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    add_common_args(parser)
+    args = parser.parse_args(argv)
+
+    params = {'articles': args.articles, 'tickers': args.tickers, 'seed': args.seed}
+    tickers = make_tickers(args.tickers, seed=args.seed)['ticker'].tolist()
+    articles_df = make_articles(
+        tickers, days=1, articles_per_day=args.articles, seed=args.seed
+    )
+    rows: list[tuple[str, ...]] = list(
+        articles_df[list(ARTICLE_COLUMNS)].itertuples(index=False, name=None)
+    )
+    scale = PER_ARTICLES / len(rows)
+    print(f'Generated {len(rows)} articles for {args.tickers} tickers')
+
+    results: list[BenchResult] = []
+    for name, build in (
+        ('memory_per_100k[dicts]', lambda: collect_dicts(rows)),
+        ('memory_per_100k[batch]', lambda: collect_batch(rows)),
+        ('memory_per_100k[dataframe]', lambda: collect_batch(rows).to_dataframe()),
+    ):
+        runs = [traced_bytes(build) * scale for _ in range(args.repeat)]
+        results.append(
+            BenchResult(name, statistics.median(runs), unit='bytes', runs=runs)
+        )
+
+    by_ticker: dict[str, list[tuple[str, ...]]] = {}
+    for row in rows:
+        by_ticker.setdefault(row[0], []).append(row)
+    dict_payloads = [
+        pickle.dumps(collect_dicts(r), pickle.HIGHEST_PROTOCOL)
+        for r in by_ticker.values()
+    ]
+    batch_payloads = [
+        pickle.dumps(collect_batch(r), pickle.HIGHEST_PROTOCOL)
+        for r in by_ticker.values()
+    ]
+    for name, payloads in (
+        ('ipc_bytes_per_ticker[dicts]', dict_payloads),
+        ('ipc_bytes_per_ticker[batch]', batch_payloads),
+    ):
+        sizes = [float(len(p)) for p in payloads]
+        results.append(
+            BenchResult(name, statistics.mean(sizes), unit='bytes', runs=[sum(sizes)])
+        )
+
+    # What the parent pays to receive every ticker and build the insert DataFrame
+    results.extend(
+        [
+            time_call(
+                'receive_to_dataframe[dicts]',
+                lambda _: pd.DataFrame(
+                    [a for p in dict_payloads for a in pickle.loads(p)]  # nosec B301
+                ),
+                repeat=args.repeat,
+            ),
+            time_call(
+                'receive_to_dataframe[batch]',
+                lambda _: ArticleBatch.concat(
+                    pickle.loads(p)  # nosec B301
+                    for p in batch_payloads
+                ).to_dataframe(),
+                repeat=args.repeat,
+            ),
+        ]
+    )
+
+    return finish(SUITE, params, results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Scoring cold start: time from a fresh interpreter to its first scored headline,
+loading finBERT the old way (`SentimentScorer.from_pretrained`) against the
+memory-mapped model bundle (`model_bundle.load_scorer`).
+
+Each run is a new process that imports the scorer, loads the model and scores one
+headline. The time covers those steps and excludes interpreter start-up. The
+process's anonymous (heap) and file-backed resident memory are recorded after the
+first prediction. Pages of a mapped bundle are file-backed, so they are shared by
+every scoring process; a heap copy is not.
+
+By default the model is a randomly initialized network with finBERT's dimensions
+and vocabulary size, saved locally, so the benchmark runs offline. Pass `--model`
+to use a real hub model instead (hub resolution then counts against `from_pretrained`).
+
+```
+uv run benchmarks/bench_cold_start.py
+uv run benchmarks/bench_cold_start.py --model yiyanghkust/finbert-tone
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess  # nosec B404
+import sys
+import tempfile
+
+from harness import SRC_PATH, BenchResult, add_common_args, finish
+from loguru import logger
+
+from model_bundle import build_bundle
+
+SUITE = 'cold_start'
+# finBERT's vocabulary size
+VOCAB_SIZE = 30873
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.append({src!r})
+if {bundle!r}:
+    from model_bundle import load_scorer
+    scorer = load_scorer({path!r})
+else:
+    from sentiment import SentimentScorer
+    scorer = SentimentScorer.from_pretrained({path!r})
+scorer.predict_logits(['Company shares rise 5% after strong Q3 results'])
+elapsed = time.perf_counter() - start
+memory = dict(
+    line.split(':') for line in open('/proc/self/status') if line.startswith('Rss')
+)
+print(json.dumps({{
+    'seconds': elapsed,
+    'anon_mb': int(memory.get('RssAnon', '0 kB').split()[0]) / 1024,
+    'file_mb': int(memory.get('RssFile', '0 kB').split()[0]) / 1024,
+}}))
+"""
+
+
+def make_model(path: str) -> str:
+    """A random finBERT-sized model and tokenizer saved to `path`, like a hub cache."""
+    from transformers.models.bert import (
+        BertConfig,
+        BertForSequenceClassification,
+        BertTokenizerFast,
+    )
+
+    os.makedirs(path, exist_ok=True)
+    special = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]']
+    words = [f'word{i}' for i in range(VOCAB_SIZE - len(special))]
+    vocab = os.path.join(path, 'vocab.txt')
+    with open(vocab, 'w') as f:
+        f.write('\n'.join(special + words))
+    BertTokenizerFast(vocab).save_pretrained(path)
+    labels = {0: 'Neutral', 1: 'Positive', 2: 'Negative'}
+    config = BertConfig(
+        vocab_size=VOCAB_SIZE,
+        id2label=labels,
+        label2id={v: k for k, v in labels.items()},
+    )
+    BertForSequenceClassification(config).save_pretrained(path)
+    return path
+
+
+def cold_start(path: str, bundle: bool) -> dict[str, float]:
+    code = CHILD.format(src=SRC_PATH, path=path, bundle=bundle)
+    output = subprocess.run(  # nosec B603
+        [sys.executable, '-c', code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--model', help='hub id or directory (default: synthetic)')
+    add_common_args(parser)
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    params = {'model': args.model or 'synthetic'}
+    tmp_dir = tempfile.mkdtemp()
+    model = args.model or make_model(os.path.join(tmp_dir, 'model'))
+    bundle = os.path.join(tmp_dir, 'bundle')
+    build_bundle(model, bundle)
+
+    results: list[BenchResult] = []
+    for name, path, is_bundle in (('hub', model, False), ('bundle', bundle, True)):
+        runs = [cold_start(path, is_bundle) for _ in range(args.repeat)]
+        seconds = [run['seconds'] for run in runs]
+        results.append(
+            BenchResult(
+                f'cold_start[{name}]',
+                statistics.median(seconds),
+                runs=seconds,
+                extra={
+                    'rss_anon_mb': round(statistics.median(r['anon_mb'] for r in runs)),
+                    'rss_file_mb': round(statistics.median(r['file_mb'] for r in runs)),
+                },
+            )
+        )
+    return finish(SUITE, params, results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Market-cap weighted sentiment of many custom indices: `score_indices` over a
+membership bitmap against the per-index DataFrame merge and groupby that
+`dashboard-generation.py` does for the one Nifty 500 treemap.
+
+Each of `--indices` random indices holds 10 to 100 tickers of a synthetic universe.
+Both sides start from the same per-ticker aggregates (what `SentimentPrefix`
+returns for a date range) and produce the weighted index and per-sector scores.
+`bitmap` times building the membership bitmap from the ticker lists.
+
+```
+uv run benchmarks/bench_custom_index.py
+uv run benchmarks/bench_custom_index.py --indices 5000 --update-baseline
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+from harness import BenchResult, add_common_args, finish, time_call
+from synthetic import make_tickers
+
+from custom_index import TickerUniverse, score_indices
+
+SUITE = 'custom_index'
+
+
+def dataframe_scores(
+    meta: pd.DataFrame, aggregates: pd.DataFrame, indices: list[list[str]]
+) -> list[tuple[float, pd.Series]]:
+    scores = []
+    for tickers in indices:
+        df = pd.merge(meta[meta['ticker'].isin(tickers)], aggregates, on='ticker')
+        df['weighted'] = df['mCap'] * df['compound']
+        sectors = df.groupby('sector')[['weighted', 'mCap']].sum()
+        scores.append(
+            (
+                df['weighted'].sum() / df['mCap'].sum(),
+                sectors['weighted'] / sectors['mCap'],
+            )
+        )
+    return scores
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--indices', type=int, default=1000)
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    add_common_args(parser)
+    args = parser.parse_args(argv)
+
+    params = {'indices': args.indices, 'tickers': args.tickers, 'seed': args.seed}
+    rng = np.random.default_rng(args.seed)
+    meta = make_tickers(args.tickers, seed=args.seed)
+    # Most tickers have articles in a typical range, a few do not
+    covered = meta['ticker'][rng.random(len(meta)) < 0.9]
+    aggregates = pd.DataFrame(
+        {
+            'ticker': covered,
+            'articles': rng.integers(1, 50, len(covered)),
+            'compound': rng.uniform(-1, 1, len(covered)),
+        }
+    )
+    indices = [
+        rng.choice(meta['ticker'], size=rng.integers(10, 101), replace=False).tolist()
+        for _ in range(args.indices)
+    ]
+
+    universe = TickerUniverse(meta)
+    members = universe.bitmap(indices)
+    results: list[BenchResult] = [
+        time_call('bitmap', lambda _: universe.bitmap(indices), repeat=args.repeat),
+        time_call(
+            'score[dataframe]',
+            lambda _: dataframe_scores(meta, aggregates, indices),
+            repeat=args.repeat,
+        ),
+        time_call(
+            'score[vectorized]',
+            lambda _: score_indices(universe, members, aggregates),
+            repeat=args.repeat,
+        ),
+    ]
+    return finish(SUITE, params, results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Page weight of the single-file treemap dashboard against the `--split` output on
+a synthetic universe.
+
+The single file embeds every ticker's treemap tile and hover data in one page, so
+all of it is downloaded and parsed before anything is drawn. The split output
+draws a sector overview first and fetches one sector's compressed figure when
+its tile is clicked. `*_gzip` sizes are what a server compressing HTML and JSON
+sends. `first_render` counts the bytes the browser needs before it can draw: the
+whole single page, or the overview page and its manifest. Its
+`est_transfer_ms` is that payload at `--link-mbps`. Both pages load the same
+plotly.js from the CDN, which is not counted.
+
+```
+uv run benchmarks/bench_dashboard.py
+uv run benchmarks/bench_dashboard.py --tickers 500 --update-baseline
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import importlib.util
+import os
+import sys
+import tempfile
+from typing import Any
+
+import numpy as np
+from harness import SRC_PATH, BenchResult, add_common_args, finish, time_call
+from synthetic import make_tickers
+
+SUITE = 'dashboard'
+
+
+def load_dashboard_module() -> Any:
+    # The dashboard script has a hyphen in its name, so it can't be imported normally
+    spec = importlib.util.spec_from_file_location(
+        'dashboard_generation', os.path.join(SRC_PATH, 'dashboard-generation.py')
+    )
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def gzip_size(path: str) -> int:
+    with open(path, 'rb') as f:
+        return len(gzip.compress(f.read()))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--link-mbps', type=float, default=1.6)
+    parser.add_argument('--seed', type=int, default=0)
+    add_common_args(parser)
+    args = parser.parse_args(argv)
+
+    params = {'tickers': args.tickers, 'link_mbps': args.link_mbps, 'seed': args.seed}
+    dashboard = load_dashboard_module()
+    rng = np.random.default_rng(args.seed)
+    tickers = make_tickers(args.tickers, seed=args.seed)
+    negative, neutral, positive = rng.dirichlet([1, 1, 1], len(tickers)).T
+    final_df = tickers.assign(
+        companyName=tickers['ticker'] + ' Limited',
+        Negative=negative,
+        Neutral=neutral,
+        Positive=positive,
+    ).rename(columns={'mCap': 'Market Cap (Billion Rs)'})
+    final_df['Sentiment Score'] = final_df['Positive'] - final_df['Negative']
+
+    def transfer_ms(size: int) -> float:
+        return size * 8 / (args.link_mbps * 1e6) * 1000
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        single_path = os.path.join(tempdir, 'single.html')
+        split_dir = os.path.join(tempdir, 'split')
+        results: list[BenchResult] = [
+            time_call(
+                'generate[single]',
+                lambda _: dashboard.write_dashboard(
+                    dashboard.build_treemap(final_df), single_path
+                ),
+                repeat=args.repeat,
+            ),
+            time_call(
+                'generate[split]',
+                lambda _: dashboard.write_split_dashboard(final_df, split_dir),
+                repeat=args.repeat,
+            ),
+        ]
+
+        manifest = dashboard.write_split_dashboard(final_df, split_dir)
+        overview_path = os.path.join(split_dir, 'index.html')
+        manifest_path = os.path.join(split_dir, 'manifest.json')
+        single = gzip_size(single_path)
+        first_render = gzip_size(overview_path) + gzip_size(manifest_path)
+        sector_sizes = [entry['bytes'] for entry in manifest['sectors'].values()]
+        sizes = {
+            'single[html]': os.path.getsize(single_path),
+            'single[html_gzip]': single,
+            'split[overview_html]': os.path.getsize(overview_path),
+            'split[overview_html_gzip]': gzip_size(overview_path),
+            'split[manifest_gzip]': gzip_size(manifest_path),
+            'split[largest_sector_gzip]': max(sector_sizes),
+            'split[all_sectors_gzip]': sum(sector_sizes),
+        }
+    results += [BenchResult(name, size, unit='bytes') for name, size in sizes.items()]
+    results += [
+        BenchResult(
+            'first_render[single]',
+            single,
+            unit='bytes',
+            extra={'est_transfer_ms': transfer_ms(single)},
+        ),
+        BenchResult(
+            'first_render[split]',
+            first_render,
+            unit='bytes',
+            extra={'est_transfer_ms': transfer_ms(first_render)},
+        ),
+    ]
+    return finish(SUITE, params, results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Import-time (cold start) budget for the CLI and the modules its commands load.
+
+Each target is imported in a fresh interpreter with `-X importtime` and the
+cumulative time of its top-level entry is recorded; the median over `--repeat`
+runs is compared with `baselines/import.json` like any other benchmark, so a new
+eager import of a heavy dependency fails the run.
+
+```
+uv run benchmarks/bench_import.py
+uv run benchmarks/bench_import.py --update-baseline
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess  # nosec B404
+import sys
+
+from harness import SRC_PATH, BenchResult, add_common_args, finish
+
+SUITE = 'import'
+# `cli` is what every command pays; the rest are what individual commands add
+TARGETS = ['cli', 'metrics', 'utils', 'database', 'main', 'news_fetcher']
+
+
+def import_seconds(module: str) -> float:
+    """Cumulative import time of `module` in a fresh interpreter, in seconds."""
+    completed = subprocess.run(  # nosec B603
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC_PATH,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        _self_us, cumulative_us, name = line[len('import time:') :].split('|')
+        # nested imports are indented; only the top-level entry is the target
+        if name.rstrip() == f' {module}':
+            return int(cumulative_us) / 1e6
+    raise RuntimeError(f'No importtime entry for {module}:\n{completed.stderr}')
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    add_common_args(parser)
+    parser.set_defaults(repeat=7)
+    args = parser.parse_args(argv)
+
+    results: list[BenchResult] = []
+    for module in TARGETS:
+        # The first import also writes bytecode caches, which is not cold start
+        import_seconds(module)
+        runs = [import_seconds(module) for _ in range(args.repeat)]
+        results.append(
+            BenchResult(
+                name=f'import[{module}]', value=statistics.median(runs), runs=runs
+            )
+        )
+
+    return finish(SUITE, {'targets': TARGETS}, results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
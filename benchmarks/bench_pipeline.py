@@ -0,0 +1,231 @@
+"""
+End-to-end benchmark of the database, scoring, dedup and dashboard paths on a
+synthetic universe.
+
+```
+uv run benchmarks/bench_pipeline.py                     # compare with baseline
+uv run benchmarks/bench_pipeline.py --update-baseline   # record a new baseline
+uv run benchmarks/bench_pipeline.py --tickers 50 --days 7 --threshold 2
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any
+
+import pandas as pd
+from harness import SRC_PATH, BenchResult, add_common_args, finish, time_call
+from loguru import logger
+from synthetic import StubSentimentPipeline, make_articles, make_tickers, stub_scores
+
+import utils
+from config import DB_UTILS, DEDUP_WATERMARK_KEY
+from database import DatabaseManager
+
+SUITE = 'pipeline'
+
+
+def load_dashboard_module() -> Any:
+    # The dashboard script has a hyphen in its name, so it can't be imported normally
+    spec = importlib.util.spec_from_file_location(
+        'dashboard_generation', os.path.join(SRC_PATH, 'dashboard-generation.py')
+    )
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--articles-per-day', type=int, default=1000)
+    parser.add_argument('--limit', type=int, default=1000, help='n for get_articles')
+    parser.add_argument(
+        '--score-n', type=int, default=200, help='articles per scoring run'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    add_common_args(parser)
+    args = parser.parse_args(argv)
+
+    # Per-call logging would dominate the timings
+    logger.remove()
+
+    params = {
+        'tickers': args.tickers,
+        'days': args.days,
+        'articles_per_day': args.articles_per_day,
+        'limit': args.limit,
+        'score_n': args.score_n,
+        'seed': args.seed,
+    }
+    tickers_df = make_tickers(args.tickers, seed=args.seed)
+    articles_df = make_articles(
+        tickers_df['ticker'].tolist(),
+        days=args.days,
+        articles_per_day=args.articles_per_day,
+        seed=args.seed,
+    )
+    print(f'Generated {articles_df.shape[0]} articles for {args.tickers} tickers')
+
+    tempdir_path = tempfile.mkdtemp()
+    db_counter = itertools.count()
+
+    def fresh_db() -> DatabaseManager:
+        # Snapshot publishing is timed on its own below, not inside every write
+        return DatabaseManager(
+            f'{tempdir_path}/bench_{next(db_counter)}.db', publish_snapshots=False
+        )
+
+    results: list[BenchResult] = []
+    try:
+        results.append(
+            time_call(
+                'insert_articles',
+                lambda dbm: dbm.insert_articles(articles_df, has_sentiment=False),
+                setup=fresh_db,
+                repeat=args.repeat,
+            )
+        )
+
+        # A populated database where the oldest 80% of articles are already scored
+        dbm = fresh_db()
+        dbm.insert_ticker_metadata(tickers_df.values.tolist())
+        by_date = articles_df.sort_values('date_posted').reset_index(drop=True)
+        n_scored = int(by_date.shape[0] * 0.8)
+        scored_df = pd.concat(
+            [by_date.iloc[:n_scored], stub_scores(n_scored, seed=args.seed)], axis=1
+        )
+        dbm.insert_articles(scored_df, has_sentiment=True)
+        dbm.insert_articles(by_date.iloc[n_scored:], has_sentiment=False)
+        cutoff = by_date['date_posted'].iloc[int(by_date.shape[0] * 0.9)][:10]
+
+        for has_sentiment, after_date, latest in itertools.product(
+            (True, False), (None, cutoff), (True, False)
+        ):
+            name = (
+                f'get_articles[sentiment={has_sentiment},'
+                f'after_date={"set" if after_date else "none"},latest={latest}]'
+            )
+            results.append(
+                time_call(
+                    name,
+                    lambda _, h=has_sentiment, a=after_date, latest=latest: (
+                        dbm.get_articles(
+                            n=args.limit, latest=latest, has_sentiment=h, after_date=a
+                        )
+                    ),
+                    repeat=args.repeat,
+                )
+            )
+
+        # Same steps as main.compute_and_update_sentiment with a stub model
+        stub = StubSentimentPipeline()
+
+        def score_batch(_: Any) -> None:
+            unscored = dbm.get_articles(
+                n=args.score_n, has_sentiment=False, latest=True
+            )
+            # Same guard as compute_and_update_sentiment for small --days runs
+            if unscored.empty:
+                return
+            scores = utils.analyse_sentiment(unscored['headline'].tolist(), nlp=stub)
+            dbm.insert_articles(
+                unscored.merge(scores, left_index=True, right_index=True),
+                has_sentiment=True,
+            )
+
+        results.append(time_call('score_articles', score_batch, repeat=args.repeat))
+
+        # What a scoring run adds for readers: one copy of the whole database
+        results.append(
+            time_call(
+                'publish_snapshot',
+                lambda _: dbm.publish_snapshot(),
+                repeat=args.repeat,
+            )
+        )
+
+        # Turning model output into score columns, with the array path and with
+        # the pipeline's per-headline dicts (a plain callable takes the dict path)
+        headlines = articles_df['headline'].iloc[: args.score_n * 50].tolist()
+        results.extend(
+            [
+                time_call(
+                    'analyse_sentiment[direct]',
+                    lambda _: utils.analyse_sentiment(headlines, nlp=stub),
+                    repeat=args.repeat,
+                ),
+                time_call(
+                    'analyse_sentiment[dicts]',
+                    lambda _: utils.analyse_sentiment(
+                        headlines, nlp=lambda h, batch_size: stub(h, batch_size)
+                    ),
+                    repeat=args.repeat,
+                ),
+            ]
+        )
+
+        results.append(
+            time_call(
+                'deduplicate_db[full]',
+                lambda _: utils.deduplicate_db(incremental=False, db_path=dbm.db_path),
+                repeat=args.repeat,
+            )
+        )
+
+        # Incremental dedup after a new day of articles lands on top of the history
+        daily_batches = iter(range(args.repeat))
+
+        def add_daily_batch() -> None:
+            with dbm.get_connection() as conn:
+                watermark = conn.execute(DB_UTILS['latest_created_at']).fetchone()
+            dbm.set_state(DEDUP_WATERMARK_KEY, watermark[0])
+            batch = make_articles(
+                tickers_df['ticker'].tolist(),
+                days=1,
+                articles_per_day=args.articles_per_day,
+                seed=args.seed + 1000 + next(daily_batches),
+            )
+            dbm.insert_articles(batch, has_sentiment=False)
+
+        results.append(
+            time_call(
+                'deduplicate_db[incremental]',
+                lambda _: utils.deduplicate_db(incremental=True, db_path=dbm.db_path),
+                setup=add_daily_batch,
+                repeat=args.repeat,
+            )
+        )
+
+        dashboard = load_dashboard_module()
+        with dbm.get_connection() as conn:
+            all_scored = conn.execute(
+                'SELECT * FROM article_data WHERE compound_sentiment IS NOT NULL'
+            ).fetchdf()
+        ticker_metadata = dbm.get_ticker_metadata()
+        results.append(
+            time_call(
+                'dashboard_aggregation',
+                lambda _: dashboard.aggregate_ticker_scores(
+                    all_scored, ticker_metadata
+                ),
+                repeat=args.repeat,
+            )
+        )
+    finally:
+        shutil.rmtree(tempdir_path)
+
+    return finish(SUITE, params, results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
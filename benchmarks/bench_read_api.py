@@ -0,0 +1,211 @@
+"""
+Load test for the read API: p50 / p99 request latency of each view with a cold and
+a warm response cache, and the cost of date-range means from the prefix sums
+against the same means computed from the articles.
+
+A temporary database is filled with synthetic scored articles, tickers and index
+constituents, and the server runs on its own event loop thread. Clients hold
+`--connections` keep-alive connections and send requests back to back, each for a
+random ticker or index and a 7 or 30 day window ending in the synthetic data's
+range. Latency is measured per request on the client, from write to last body byte.
+The `miss` passes run with the cache disabled, so every request is computed; the
+`hit` passes replay requests whose responses are already cached. `range_means`
+times `--range-queries` random (ticker, window) mean sentiments.
+
+```
+uv run benchmarks/bench_read_api.py
+uv run benchmarks/bench_read_api.py --requests 5000 --connections 32
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from harness import BenchResult, add_common_args, finish, time_call
+from synthetic import make_articles, make_tickers, stub_scores
+
+from database import DatabaseManager
+from read_api import ReadAPI, start_server
+from sentiment_prefix import SentimentPrefix
+
+SUITE = 'read_api'
+# make_articles ends its data on this day by default
+DATA_END = date(2025, 6, 30)
+
+
+def fill_database(dbm: DatabaseManager, n_tickers: int, days: int, seed: int) -> None:
+    tickers_df = make_tickers(n_tickers, seed=seed)
+    tickers = tickers_df['ticker'].tolist()
+    articles_df = make_articles(tickers, days=days, articles_per_day=1000, seed=seed)
+    articles_df = pd.concat([articles_df, stub_scores(len(articles_df), seed)], axis=1)
+    constituents = [('nifty_500', t) for t in tickers] + [
+        ('nifty_50', t) for t in tickers[:50]
+    ]
+    with dbm.get_connection() as conn:
+        conn.execute('INSERT INTO ticker_meta SELECT * FROM tickers_df')
+        conn.executemany(
+            'INSERT INTO indices_constituents (index_name, ticker) VALUES (?, ?)',
+            constituents,
+        )
+    dbm.insert_articles(articles_df, has_sentiment=True)
+
+
+RANGE_MEAN_SQL = """
+    SELECT avg(compound_sentiment) FROM article_data
+    WHERE ticker = ? AND compound_sentiment IS NOT NULL
+        AND date_posted >= ? AND date_posted < ?
+"""
+
+
+def make_windows(
+    n: int, tickers: list[str], days: int, rng: np.random.Generator
+) -> list[tuple[str, date, date]]:
+    windows = []
+    for _ in range(n):
+        window = int(rng.choice([7, 30]))
+        end = DATA_END - timedelta(days=int(rng.integers(0, days - window)))
+        windows.append(
+            (str(rng.choice(tickers)), end - timedelta(days=window - 1), end)
+        )
+    return windows
+
+
+def make_targets(
+    route: str, n: int, tickers: list[str], days: int, rng: np.random.Generator
+) -> list[str]:
+    targets = []
+    for ticker, start, end in make_windows(n, tickers, days, rng):
+        if route == 'treemap':
+            subject = f'index={rng.choice(["nifty_50", "nifty_500"])}'
+        else:
+            subject = f'ticker={ticker}'
+        targets.append(f'/api/{route}?{subject}&start={start}&end={end}')
+    return targets
+
+
+async def _request(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, target: str
+) -> float:
+    start = time.perf_counter()
+    writer.write(f'GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = int(head.split(b'Content-Length: ')[1].split(b'\r\n', 1)[0])
+    await reader.readexactly(length)
+    return time.perf_counter() - start
+
+
+async def _load(port: int, targets: list[str], connections: int) -> list[float]:
+    async def client(share: list[str]) -> list[float]:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        latencies = [await _request(reader, writer, target) for target in share]
+        writer.close()
+        return latencies
+
+    shares = [targets[i::connections] for i in range(connections)]
+    results = await asyncio.gather(*(client(share) for share in shares if share))
+    return [latency for latencies in results for latency in latencies]
+
+
+async def stop_server(server: asyncio.Server, poller: asyncio.Task[None]) -> None:
+    poller.cancel()
+    server.close()
+    await server.wait_closed()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=600)
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--range-queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    add_common_args(parser)
+    args = parser.parse_args(argv)
+
+    params = {
+        'requests': args.requests,
+        'connections': args.connections,
+        'tickers': args.tickers,
+        'days': args.days,
+        'range_queries': args.range_queries,
+        'seed': args.seed,
+    }
+    rng = np.random.default_rng(args.seed)
+    tmp_dir = tempfile.mkdtemp()
+    dbm = DatabaseManager(db_path=os.path.join(tmp_dir, 'read_api.db'))
+    fill_database(dbm, args.tickers, args.days, args.seed)
+    tickers = make_tickers(args.tickers, seed=args.seed)['ticker'].tolist()
+
+    windows = make_windows(args.range_queries, tickers, args.days, rng)
+    prefix = SentimentPrefix.load(dbm)
+
+    def sql_means(_: object) -> None:
+        with dbm.get_connection() as conn:
+            for ticker, start, end in windows:
+                conn.execute(
+                    RANGE_MEAN_SQL, [ticker, str(start), str(end + timedelta(days=1))]
+                ).fetchone()
+
+    results: list[BenchResult] = [
+        time_call('range_means[articles]', sql_means, repeat=args.repeat),
+        time_call(
+            'range_means[prefix]',
+            lambda _: [prefix.mean(*window) for window in windows],
+            repeat=args.repeat,
+        ),
+    ]
+
+    api = ReadAPI(dbm)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    server, poller = asyncio.run_coroutine_threadsafe(
+        start_server(api, port=0, poll_interval=3600), loop
+    ).result()
+    port = server.sockets[0].getsockname()[1]
+
+    for route in ('news', 'series', 'treemap'):
+        targets = make_targets(route, args.requests, tickers, args.days, rng)
+        for outcome in ('miss', 'hit'):
+            p50s: list[float] = []
+            p99s: list[float] = []
+            for _ in range(args.repeat):
+                if outcome == 'miss':
+                    api.cache.max_size = 0
+                    api.cache.clear()
+                else:
+                    api.cache.max_size = len(targets)
+                    asyncio.run(_load(port, targets, args.connections))
+                latencies = np.array(
+                    asyncio.run(_load(port, targets, args.connections))
+                )
+                p50s.append(float(np.percentile(latencies, 50)) * 1000)
+                p99s.append(float(np.percentile(latencies, 99)) * 1000)
+            for name, runs in (('p50', p50s), ('p99', p99s)):
+                results.append(
+                    BenchResult(
+                        f'{route}[{outcome}].{name}',
+                        statistics.median(runs),
+                        unit='ms',
+                        runs=runs,
+                    )
+                )
+
+    asyncio.run_coroutine_threadsafe(stop_server(server, poller), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    return finish(SUITE, params, results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
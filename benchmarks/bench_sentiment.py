@@ -0,0 +1,134 @@
+"""
+Tokenization and forward-pass cost of finBERT scoring, separately and combined.
+
+Compares the slow (pure Python) and fast (Rust) tokenizers, a warm token-id cache,
+the bare forward pass over pre-tokenized batches, and `SentimentScorer` with and
+without tokenization overlapped with inference, against the HF pipeline it
+replaces. Loads the real model, so the first run downloads it.
+
+```
+uv run benchmarks/bench_sentiment.py
+uv run benchmarks/bench_sentiment.py --headlines 2000 --batch-size 16
+uv run benchmarks/bench_sentiment.py --update-baseline
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import Any
+
+from harness import BenchResult, add_common_args, finish, time_call
+from loguru import logger
+from synthetic import make_articles, make_tickers
+
+from config import BATCH_SIZE, SENTIMENT_MODEL_NAME
+from sentiment import SentimentScorer, TokenCache
+
+SUITE = 'sentiment'
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--headlines', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    add_common_args(parser)
+    args = parser.parse_args(argv)
+
+    logger.remove()
+
+    import torch
+    from transformers.models.bert import BertTokenizer
+    from transformers.pipelines import pipeline
+
+    params = {
+        'headlines': args.headlines,
+        'batch_size': args.batch_size,
+        'seed': args.seed,
+        'torch_threads': torch.get_num_threads(),
+    }
+    tickers = make_tickers(50, seed=args.seed)['ticker'].tolist()
+    articles_df = make_articles(
+        tickers, days=1, articles_per_day=args.headlines * 2, seed=args.seed
+    )
+    headlines: list[str] = articles_df['headline'].iloc[: args.headlines].tolist()
+    batches = [
+        headlines[i : i + args.batch_size]
+        for i in range(0, len(headlines), args.batch_size)
+    ]
+
+    scorer = SentimentScorer.from_pretrained(
+        SENTIMENT_MODEL_NAME, batch_size=args.batch_size
+    )
+    slow_tokenizer = BertTokenizer.from_pretrained(SENTIMENT_MODEL_NAME)
+
+    def tokenize_all(tokenizer: Any) -> None:
+        for batch in batches:
+            tokenizer(batch, padding=True, truncation=True)
+
+    def clear_cache() -> None:
+        scorer.cache = TokenCache(scorer.cache.max_size)
+
+    results: list[BenchResult] = [
+        time_call(
+            'tokenize[slow]', lambda _: tokenize_all(slow_tokenizer), repeat=args.repeat
+        ),
+        time_call(
+            'tokenize[fast]',
+            lambda _: tokenize_all(scorer.tokenizer),
+            repeat=args.repeat,
+        ),
+    ]
+
+    scorer.encode(headlines)
+    results.append(
+        time_call(
+            'tokenize[fast,cached]',
+            lambda _: [scorer._pad(scorer.encode(batch)) for batch in batches],
+            repeat=args.repeat,
+        )
+    )
+
+    padded = [scorer._pad(scorer.encode(batch)) for batch in batches]
+
+    def forward(_: Any) -> None:
+        with torch.inference_mode():
+            for input_ids, attention_mask in padded:
+                scorer.model(
+                    input_ids=torch.from_numpy(input_ids),
+                    attention_mask=torch.from_numpy(attention_mask),
+                )
+
+    results.append(time_call('forward', forward, repeat=args.repeat))
+
+    for overlap in (False, True):
+        name = 'score[overlapped]' if overlap else 'score[serial]'
+
+        def score(_: Any, overlap: bool = overlap) -> None:
+            scorer.overlap = overlap
+            scorer.predict_proba(headlines)
+
+        results.append(time_call(name, score, setup=clear_cache, repeat=args.repeat))
+
+    hf_pipeline = pipeline(
+        'sentiment-analysis',
+        model=scorer.model,
+        tokenizer=slow_tokenizer,
+        device=-1,
+        top_k=None,
+    )
+    results.append(
+        time_call(
+            'hf_pipeline',
+            lambda _: hf_pipeline(headlines, batch_size=args.batch_size),
+            repeat=args.repeat,
+        )
+    )
+
+    return finish(SUITE, params, results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
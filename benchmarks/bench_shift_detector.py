@@ -0,0 +1,121 @@
+"""
+Update cost of the streaming sentiment shift detector: `ShiftDetector.update`
+over `--tickers` tickers with `--events` scored articles each, streamed in
+posting order.
+
+`update[batch=N]` feeds the stream N articles at a time (a scoring run's 200, or
+a large backfill), so per-batch overhead shows next to per-article cost. `loop`
+is the same statistics kept one article at a time in Python, over the first
+`--loop-events` articles only. Each result's `ns_per_event` is its time per article.
+
+```
+uv run benchmarks/bench_shift_detector.py
+uv run benchmarks/bench_shift_detector.py --events 1000 --update-baseline
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+
+import numpy as np
+from harness import BenchResult, add_common_args, finish, time_call
+from synthetic import make_tickers
+
+from shift_detector import ShiftDetector
+
+SUITE = 'shift_detector'
+
+
+def loop_update(
+    tickers: list[str], compound: np.ndarray, posted_at: np.ndarray
+) -> list[str]:
+    detector = ShiftDetector()
+    decay = 1 - detector.alpha
+    state: dict[str, list[float]] = {}
+    shifts = []
+    for ticker, x, t in zip(
+        tickers, compound.tolist(), posted_at.tolist(), strict=True
+    ):
+        s, q, w, count, last, n = state.get(ticker, [0.0, 0.0, 0.0, 0.0, 0.0, 0])
+        if n >= detector.min_articles and w > 0:
+            mean = s / w
+            std = max(math.sqrt(max(q / w - mean * mean, 0)), detector.min_std)
+            if abs(x - mean) / std >= detector.z_threshold:
+                shifts.append(ticker)
+        count = count * math.exp(-(t - last) / detector.rate_seconds) + 1
+        state[ticker] = [
+            decay * s + x,
+            decay * q + x * x,
+            decay * w + 1,
+            count,
+            t,
+            n + 1,
+        ]
+    return shifts
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--events', type=int, default=10_000, help='per ticker')
+    parser.add_argument('--batches', type=int, nargs='+', default=[200, 5000])
+    parser.add_argument('--loop-events', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=0)
+    add_common_args(parser)
+    args = parser.parse_args(argv)
+
+    params = {
+        'tickers': args.tickers,
+        'events': args.events,
+        'batches': args.batches,
+        'loop_events': args.loop_events,
+        'seed': args.seed,
+    }
+    rng = np.random.default_rng(args.seed)
+    total = args.tickers * args.events
+    names = make_tickers(args.tickers, seed=args.seed)['ticker'].to_numpy()
+    # Interleaved ticker stream, a few minutes apart, with sentiment regimes
+    tickers = names[rng.integers(0, len(names), total)].tolist()
+    posted_at = 1.75e9 + np.cumsum(rng.exponential(60, total))
+    compound = np.clip(
+        np.repeat(rng.uniform(-0.5, 0.5, total // 1000 + 1), 1000)[:total]
+        + rng.normal(0, 0.3, total),
+        -1,
+        1,
+    )
+
+    def stream(batch: int) -> None:
+        detector = ShiftDetector()
+        for start in range(0, total, batch):
+            end = start + batch
+            detector.update(
+                tickers[start:end], compound[start:end], posted_at[start:end]
+            )
+
+    results: list[BenchResult] = []
+    for batch in args.batches:
+        results.append(
+            time_call(
+                f'update[batch={batch}]',
+                lambda _, b=batch: stream(b),
+                repeat=args.repeat,
+            )
+        )
+        results[-1].extra['ns_per_event'] = results[-1].value / total * 1e9
+    n = min(args.loop_events, total)
+    results.append(
+        time_call(
+            'loop',
+            lambda _: loop_update(tickers[:n], compound[:n], posted_at[:n]),
+            repeat=args.repeat,
+        )
+    )
+    results[-1].extra['ns_per_event'] = results[-1].value / n * 1e9
+    return finish(SUITE, params, results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
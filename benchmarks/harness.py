@@ -0,0 +1,191 @@
+"""
+Timing and baseline comparison shared by the benchmark scripts.
+
+Each script produces a list of `BenchResult`s and hands them to `finish()`, which
+prints a table, writes the results JSON, and compares them against
+`baselines/<suite>.json`. A result regresses when it exceeds its baseline value by
+more than the threshold ratio; `finish()` then returns a non-zero exit code.
+
+The threshold is resolved per benchmark, first match wins: a `threshold` on the
+benchmark's baseline entry, `--threshold` / `BENCH_THRESHOLD`, the file-level
+`threshold`, then `DEFAULT_THRESHOLD`. Baselines are only comparable at the same
+data scale, so a baseline recorded with different `params` is reported and skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(BENCH_DIR, 'baselines')
+SRC_PATH = os.path.join(os.path.dirname(BENCH_DIR), 'src')
+
+DEFAULT_THRESHOLD = 1.5
+# Timings below this many seconds are dominated by noise and never flagged
+DEFAULT_MIN_SECONDS = 0.01
+
+if SRC_PATH not in sys.path:
+    sys.path.append(SRC_PATH)
+
+
+@dataclass
+class BenchResult:
+    name: str
+    value: float
+    unit: str = 'seconds'
+    runs: list[float] = field(default_factory=list)
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+def time_call(
+    name: str,
+    run: Callable[[Any], Any],
+    setup: Callable[[], Any] | None = None,
+    repeat: int = 3,
+) -> BenchResult:
+    """
+    Median wall time of `run(setup())` over `repeat` runs. Only `run` is timed, so
+    stateful benchmarks (inserts, deletes) can rebuild their input in `setup`.
+    """
+    runs: list[float] = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        run(state)
+        runs.append(time.perf_counter() - start)
+    return BenchResult(name=name, value=statistics.median(runs), runs=runs)
+
+
+def add_common_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=float(os.environ['BENCH_THRESHOLD'])
+        if os.environ.get('BENCH_THRESHOLD')
+        else None,
+        help='allowed ratio over baseline before a result counts as a regression',
+    )
+    parser.add_argument(
+        '--min-seconds',
+        type=float,
+        default=DEFAULT_MIN_SECONDS,
+        help='ignore regressions in timings below this many seconds',
+    )
+    parser.add_argument(
+        '--update-baseline',
+        action='store_true',
+        help='overwrite the stored baseline with this run instead of comparing',
+    )
+    parser.add_argument('--output', help='also write results JSON to this path')
+
+
+def load_baseline(suite: str) -> dict[str, Any] | None:
+    path = os.path.join(BASELINE_DIR, f'{suite}.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def find_regressions(
+    results: list[BenchResult],
+    baseline: dict[str, Any],
+    threshold: float | None = None,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+) -> list[str]:
+    """Describe every result that exceeds its baseline by more than its threshold."""
+    regressions: list[str] = []
+    for result in results:
+        entry = baseline.get('benchmarks', {}).get(result.name)
+        if not entry:
+            continue
+        limit = (
+            entry.get('threshold')
+            or threshold
+            or baseline.get('threshold')
+            or DEFAULT_THRESHOLD
+        )
+        if result.unit == 'seconds' and result.value < min_seconds:
+            continue
+        if result.value > entry['value'] * limit:
+            regressions.append(
+                f'{result.name}: {result.value:.4g} {result.unit} vs baseline '
+                f'{entry["value"]:.4g} (limit x{limit:g})'
+            )
+    return regressions
+
+
+def results_to_json(
+    suite: str, params: dict[str, Any], results: list[BenchResult]
+) -> dict[str, Any]:
+    return {
+        'suite': suite,
+        'params': params,
+        'benchmarks': {
+            r.name: {'value': r.value, 'unit': r.unit, 'runs': r.runs, **r.extra}
+            for r in results
+        },
+    }
+
+
+def finish(
+    suite: str,
+    params: dict[str, Any],
+    results: list[BenchResult],
+    args: argparse.Namespace,
+) -> int:
+    """Print, persist and check results. Returns the process exit code."""
+    width = max(len(r.name) for r in results)
+    for r in results:
+        print(f'{r.name:<{width}}  {r.value:>12.4f} {r.unit}')
+
+    payload = results_to_json(suite, params, results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(payload, f, indent=2)
+
+    baseline_path = os.path.join(BASELINE_DIR, f'{suite}.json')
+    baseline = load_baseline(suite)
+
+    if args.update_baseline:
+        # Keep hand-tuned thresholds when refreshing the numbers
+        if baseline:
+            if 'threshold' in baseline:
+                payload['threshold'] = baseline['threshold']
+            for name, entry in baseline.get('benchmarks', {}).items():
+                if 'threshold' in entry and name in payload['benchmarks']:
+                    payload['benchmarks'][name]['threshold'] = entry['threshold']
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump(payload, f, indent=2)
+            f.write('\n')
+        print(f'Baseline written to {baseline_path}')
+        return 0
+
+    if baseline is None:
+        print(f'No baseline at {baseline_path}; run with --update-baseline to create')
+        return 0
+    if baseline.get('params') != params:
+        print(
+            f'Baseline params {baseline.get("params")} differ from {params}; '
+            'skipping regression check'
+        )
+        return 0
+
+    regressions = find_regressions(results, baseline, args.threshold, args.min_seconds)
+    if regressions:
+        print('Regressions:')
+        for line in regressions:
+            print(f'  {line}')
+        return 1
+    print('No regressions against baseline')
+    return 0
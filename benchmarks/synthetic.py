@@ -0,0 +1,168 @@
+"""
+Synthetic data for benchmarks: a ticker universe with sector/industry metadata and
+a few months of headlines whose per-ticker volume follows a Zipf-like skew, so a
+handful of large caps carry most of the news the way they do on the live sources.
+"""
+
+from __future__ import annotations
+
+import zlib
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+SECTORS: dict[str, list[str]] = {
+    'Financial Services': ['Private Sector Bank', 'Public Sector Bank', 'NBFC'],
+    'Information Technology': ['Computers - Software', 'IT Enabled Services'],
+    'Fast Moving Consumer Goods': ['Personal Care', 'Packaged Foods'],
+    'Healthcare': ['Pharmaceuticals', 'Hospital'],
+    'Oil Gas & Consumable Fuels': ['Refineries & Marketing', 'Gas Transmission'],
+    'Automobile and Auto Components': ['Passenger Cars', 'Auto Components'],
+    'Capital Goods': ['Heavy Electrical Equipment', 'Civil Construction'],
+    'Metals & Mining': ['Iron & Steel', 'Aluminium'],
+    'Power': ['Power Generation', 'Power Distribution'],
+    'Chemicals': ['Specialty Chemicals', 'Fertilizers'],
+}
+
+HEADLINE_TEMPLATES: list[str] = [
+    '{ticker} Q{q} results: net profit {direction} {pct}% YoY',
+    '{ticker} shares {direction} {pct}% after brokerage {action} target',
+    '{ticker} stock price today live updates {n}',
+    '{ticker} board approves dividend of Rs {n} per share',
+    '{ticker} bags order worth Rs {n} crore',
+    '{ticker} promoter {action} {pct}% stake in block deal',
+    'Why {ticker} shares are {direction} {pct}% today',
+    '{ticker} Q{q} preview: revenue seen {direction} {pct}%',
+    '{ticker} hits 52-week {extreme}; {n} lakh shares change hands',
+    'Brokerages {action} {ticker}, see {pct}% {direction}side',
+]
+DIRECTIONS = ['up', 'down', 'rising', 'falling', 'higher', 'lower']
+ACTIONS = ['raises', 'cuts', 'sells', 'buys', 'upgrade', 'downgrade']
+EXTREMES = ['high', 'low']
+SOURCES = ['Economic Times', 'Moneycontrol', 'Yahoo Finance', 'Finology', 'Mint']
+SOURCE_WEIGHTS = [0.3, 0.25, 0.2, 0.15, 0.1]
+
+
+def make_tickers(n_tickers: int = 500, seed: int = 0) -> pd.DataFrame:
+    """
+    Ticker metadata with the `ticker_meta` columns. Market caps are log-normal so
+    the treemap and cap-weighted aggregates see a realistic spread.
+    """
+    rng = np.random.default_rng(seed)
+    sector_names = list(SECTORS)
+    rows: list[list[Any]] = []
+    for i in range(n_tickers):
+        sector = sector_names[i % len(sector_names)]
+        industry = SECTORS[sector][int(rng.integers(len(SECTORS[sector])))]
+        mcap = round(float(rng.lognormal(mean=5.5, sigma=1.3)), 2)
+        rows.append([f'TICK{i:04d}', sector, industry, mcap, f'Company {i} Ltd.'])
+    return pd.DataFrame(
+        rows, columns=['ticker', 'sector', 'industry', 'mCap', 'companyName']
+    )
+
+
+def make_articles(
+    tickers: list[str],
+    days: int = 90,
+    articles_per_day: int = 1000,
+    skew: float = 1.1,
+    end: datetime | None = None,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Headlines with the columns produced by the news sources, unique on
+    (ticker, headline). Ticker `i` in a random ranking gets a share of articles
+    proportional to `1 / rank**skew`.
+    """
+    rng = np.random.default_rng(seed)
+    end = end or datetime(2025, 6, 30, 18, 0, 0)
+    n_articles = days * articles_per_day
+
+    ranks = rng.permutation(len(tickers)) + 1
+    weights = 1.0 / ranks.astype(float) ** skew
+    weights /= weights.sum()
+    ticker_idx = rng.choice(len(tickers), size=n_articles, p=weights)
+
+    offsets = rng.integers(0, days * 24 * 3600, size=n_articles)
+    template_idx = rng.integers(len(HEADLINE_TEMPLATES), size=n_articles)
+    pcts = np.round(rng.gamma(2.0, 2.5, size=n_articles), 1)
+    ns = rng.integers(1, 5000, size=n_articles)
+    quarters = rng.integers(1, 5, size=n_articles)
+    directions = rng.integers(len(DIRECTIONS), size=n_articles)
+    actions = rng.integers(len(ACTIONS), size=n_articles)
+    extremes = rng.integers(len(EXTREMES), size=n_articles)
+    source_idx = rng.choice(len(SOURCES), size=n_articles, p=SOURCE_WEIGHTS)
+
+    start = end - timedelta(days=days)
+    records: list[dict[str, str]] = []
+    for i in range(n_articles):
+        ticker = tickers[ticker_idx[i]]
+        headline = HEADLINE_TEMPLATES[template_idx[i]].format(
+            ticker=ticker,
+            q=quarters[i],
+            direction=DIRECTIONS[directions[i]],
+            pct=pcts[i],
+            action=ACTIONS[actions[i]],
+            n=ns[i],
+            extreme=EXTREMES[extremes[i]],
+        )
+        records.append(
+            {
+                'ticker': ticker,
+                'headline': headline,
+                'date_posted': (start + timedelta(seconds=int(offsets[i]))).strftime(
+                    '%Y-%m-%d %H:%M:%S'
+                ),
+                'article_link': f'https://news.example.com/{ticker}/{i}',
+                'source': SOURCES[source_idx[i]],
+            }
+        )
+
+    articles_df = pd.DataFrame(records)
+    articles_df.drop_duplicates(subset=['ticker', 'headline'], inplace=True)
+    return articles_df.reset_index(drop=True)
+
+
+class StubSentimentPipeline:
+    """
+    Stands in for the finBERT scorer in `utils.analyse_sentiment`: the same
+    `predict_proba` and pipeline-style call, with deterministic scores derived from
+    a hash of the headline.
+    """
+
+    labels: tuple[str, str, str] = ('Positive', 'Negative', 'Neutral')
+
+    def predict_proba(
+        self, headlines: list[str], batch_size: int | None = None
+    ) -> np.ndarray:
+        h = np.array([zlib.crc32(headline.encode()) for headline in headlines])
+        raw = 1 + np.stack([h & 0xFF, (h >> 8) & 0xFF, (h >> 16) & 0xFF], axis=1)
+        return raw / raw.sum(axis=1, keepdims=True)
+
+    def __call__(
+        self, headlines: list[str], batch_size: int | None = None
+    ) -> list[list[dict[str, Any]]]:
+        return [
+            [
+                {'label': label, 'score': float(score)}
+                for label, score in zip(self.labels, row, strict=True)
+            ]
+            for row in self.predict_proba(headlines)
+        ]
+
+
+def stub_scores(n: int, seed: int = 0) -> pd.DataFrame:
+    """Random Positive/Negative/Neutral/compound columns for `n` already scored rows."""
+    rng = np.random.default_rng(seed)
+    probs = rng.dirichlet([1.0, 1.0, 2.0], size=n)
+    compound = np.where(probs[:, 0] > probs[:, 1], probs[:, 0], -probs[:, 1])
+    return pd.DataFrame(
+        {
+            'Positive': probs[:, 0],
+            'Negative': probs[:, 1],
+            'Neutral': probs[:, 2],
+            'compound': np.round(compound, 4),
+        }
+    )
@@ -0,0 +1,80 @@
+"""
+Columnar container for scraped articles.
+
+News sources used to build one dict per article. `ArticleBatch` keeps one list per
+column instead, and interns the ticker and source names, which repeat on nearly
+every row, so no per-row dict or key references are built at all. Pickle memoizes
+repeated objects, so when a batch crosses a process boundary an interned ticker is
+sent once per batch rather than once per article.
+A batch converts straight to a DataFrame (or an Arrow table) for `insert_articles`.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Columns of `article_data` filled in by the news sources, in insert order
+ARTICLE_COLUMNS = ('ticker', 'headline', 'date_posted', 'article_link', 'source')
+
+
+class ArticleBatch:
+    """Articles for one or more tickers, one list per column of `ARTICLE_COLUMNS`."""
+
+    __slots__ = ARTICLE_COLUMNS
+
+    def __init__(self) -> None:
+        self.ticker: list[str] = []
+        self.headline: list[str] = []
+        self.date_posted: list[str | None] = []
+        self.article_link: list[str] = []
+        self.source: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.headline)
+
+    def __repr__(self) -> str:
+        return f'ArticleBatch({len(self)} articles)'
+
+    def append(
+        self,
+        ticker: str,
+        headline: str,
+        date_posted: str | None,
+        article_link: str,
+        source: str,
+    ) -> None:
+        self.ticker.append(sys.intern(ticker))
+        self.headline.append(headline)
+        self.date_posted.append(date_posted)
+        self.article_link.append(article_link)
+        self.source.append(sys.intern(source))
+
+    def extend(self, other: ArticleBatch) -> None:
+        for column in ARTICLE_COLUMNS:
+            getattr(self, column).extend(getattr(other, column))
+
+    @classmethod
+    def concat(cls, batches: Iterable[ArticleBatch]) -> ArticleBatch:
+        combined = cls()
+        for batch in batches:
+            combined.extend(batch)
+        return combined
+
+    def columns(self) -> dict[str, list[Any]]:
+        return {column: getattr(self, column) for column in ARTICLE_COLUMNS}
+
+    def to_dataframe(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.DataFrame(self.columns(), columns=list(ARTICLE_COLUMNS))
+
+    def to_arrow(self) -> Any:
+        """A `pyarrow.Table` of the batch. pyarrow is not a dependency of the project."""
+        import pyarrow as pa
+
+        return pa.table(self.columns())
@@ -0,0 +1,336 @@
+"""
+Command line entry point for the pipeline stages.
+
+```
+uv run src/cli.py fetch --universe nifty_500 [--run-id ID]
+uv run src/cli.py score --n 500
+uv run src/cli.py metadata --universe nifty_500
+uv run src/cli.py dashboard [--split [--out DIR]]
+uv run src/cli.py dedup [--full]
+uv run src/cli.py constituents [--force]
+uv run src/cli.py daemon --universe nifty_500 --requests-per-hour 1800
+uv run src/cli.py serve --port 8050
+uv run src/cli.py bundle
+uv run src/cli.py snapshot
+uv run src/cli.py rescore --cpu-seconds 600 [--promote]
+uv run src/cli.py cascade-report --n 2000 --threshold 0.5 --threshold 0.9
+uv run src/cli.py shifts --n 20
+```
+
+Only argparse, loguru and the light local modules are imported at startup. Each
+command imports the modules it needs when it runs, so `--help` or `dedup` never
+load httpx, curl_cffi, nse, bs4 or transformers. `benchmarks/bench_import.py`
+keeps the import cost of this module and its commands under budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import sys
+from collections.abc import Callable
+
+from loguru import logger
+
+import metrics
+import profiling
+from config import (
+    CASCADE_THRESHOLD,
+    LOG_FORMAT,
+    MODEL_BUNDLE_DIR,
+    PROFILE_ENV_VAR,
+    READ_API_HOST,
+    READ_API_PORT,
+    RESCORE_BATCH,
+    RESCORE_CPU_SECONDS,
+    SCHEDULER_REQUESTS_PER_HOUR,
+    SENTIMENT_MODEL_NAME,
+)
+
+UNIVERSES = ['nifty_50', 'nifty_100', 'nifty_200', 'nifty_500']
+
+
+def configure_logging() -> None:
+    # Remove the default logger to prevent duplicate log entries.
+    logger.remove()
+    logger.add(sys.stderr, colorize=True, level='INFO', format=LOG_FORMAT, enqueue=True)
+
+
+def cmd_fetch(args: argparse.Namespace) -> None:
+    from main import get_news
+
+    get_news(args.universe, concurrent=not args.sequential, run_id=args.run_id)
+
+
+def cmd_score(args: argparse.Namespace) -> None:
+    from main import compute_and_update_sentiment
+
+    compute_and_update_sentiment(n=args.n)
+
+
+def cmd_metadata(args: argparse.Namespace) -> None:
+    from main import update_ticker_metadata
+
+    update_ticker_metadata(args.universe)
+
+
+def cmd_dashboard(args: argparse.Namespace) -> None:
+    # The dashboard script has a hyphen in its name, so it can't be imported normally
+    spec = importlib.util.spec_from_file_location(
+        'dashboard_generation',
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'dashboard-generation.py'
+        ),
+    )
+    assert spec and spec.loader
+    dashboard = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(dashboard)
+    if args.out:
+        dashboard.main(split=True, directory=args.out)
+    else:
+        dashboard.main(split=args.split)
+
+
+def cmd_dedup(args: argparse.Namespace) -> None:
+    from utils import deduplicate_db
+
+    deduplicate_db(incremental=not args.full)
+
+
+def cmd_constituents(args: argparse.Namespace) -> None:
+    from constituents import refresh_constituents
+
+    refresh_constituents(args.index or None, force=args.force)
+
+
+def cmd_daemon(args: argparse.Namespace) -> None:
+    from scheduler import run_daemon
+
+    run_daemon(
+        args.universe,
+        requests_per_hour=args.requests_per_hour,
+        max_polls=args.max_polls,
+    )
+
+
+def cmd_serve(args: argparse.Namespace) -> None:
+    import asyncio
+
+    from read_api import serve
+
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        logger.info('Read API stopped')
+
+
+def cmd_bundle(args: argparse.Namespace) -> None:
+    from model_bundle import build_bundle
+
+    build_bundle(args.model, args.path)
+
+
+def cmd_snapshot(args: argparse.Namespace) -> None:
+    from database import DatabaseManager
+
+    path = DatabaseManager().publish_snapshot()
+    logger.success(f'Published database snapshot {path}')
+
+
+def cmd_rescore(args: argparse.Namespace) -> None:
+    from rescore import rescore
+
+    rescore(args.cpu_seconds, args.batch_size, promote=args.promote)
+
+
+def cmd_cascade_report(args: argparse.Namespace) -> None:
+    from database import DatabaseManager
+    from lexicon import cascade_report
+    from model_bundle import load_scorer
+
+    articles = DatabaseManager(read_only=True).get_articles(
+        n=args.n, has_sentiment=True
+    )
+    headlines = articles['headline'].drop_duplicates().tolist()
+    thresholds = args.threshold or [0.5, 0.67, 0.75, CASCADE_THRESHOLD]
+    report = cascade_report(headlines, load_scorer(), sorted(set(thresholds)))
+    print(report.to_string(index=False, float_format='{:.3f}'.format))
+
+
+def cmd_shifts(args: argparse.Namespace) -> None:
+    from database import DatabaseManager
+
+    shifts = DatabaseManager(read_only=True).get_sentiment_shifts(args.n)
+    if shifts.empty:
+        logger.info('No sentiment shifts detected yet')
+        return
+    print(shifts.to_string(index=False, float_format='{:.2f}'.format))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='nifty', description='Nifty 500 news sentiment pipeline'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        default=os.environ.get(PROFILE_ENV_VAR, '').lower()
+        not in ('', '0', 'false', 'no'),
+        help=f'profile the command (also enabled by {PROFILE_ENV_VAR}=1)',
+    )
+    parser.add_argument('--profile-dir', help='run directory for profiling artifacts')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fetch = subparsers.add_parser('fetch', help='fetch news for an index universe')
+    fetch.add_argument('--universe', choices=UNIVERSES, default='nifty_50')
+    fetch.add_argument(
+        '--sequential',
+        action='store_true',
+        help='fetch one ticker and source at a time instead of per-source queues',
+    )
+    fetch.add_argument(
+        '--run-id',
+        help='resume the fetch run with this id (default: universe and UTC date)',
+    )
+    fetch.set_defaults(handler=cmd_fetch)
+
+    score = subparsers.add_parser('score', help='score unscored articles')
+    score.add_argument('--n', type=int, default=200, help='articles to score')
+    score.set_defaults(handler=cmd_score)
+
+    metadata = subparsers.add_parser('metadata', help='refresh ticker metadata')
+    metadata.add_argument('--universe', choices=UNIVERSES, default='nifty_500')
+    metadata.set_defaults(handler=cmd_metadata)
+
+    dashboard = subparsers.add_parser('dashboard', help='regenerate the HTML dashboard')
+    dashboard.add_argument(
+        '--split',
+        action='store_true',
+        help='write a sector overview page that loads each sector on demand',
+    )
+    dashboard.add_argument(
+        '--out', help='directory for the --split output (default: dashboard/)'
+    )
+    dashboard.set_defaults(handler=cmd_dashboard)
+
+    dedup = subparsers.add_parser('dedup', help='delete duplicate articles')
+    dedup.add_argument(
+        '--full',
+        action='store_true',
+        help='rescan the whole table instead of rows since the last watermark',
+    )
+    dedup.set_defaults(handler=cmd_dedup)
+
+    constituents = subparsers.add_parser(
+        'constituents', help='refresh index constituents from NSE'
+    )
+    constituents.add_argument(
+        '--index',
+        choices=UNIVERSES,
+        action='append',
+        help='index to refresh, may be repeated (default: all)',
+    )
+    constituents.add_argument(
+        '--force',
+        action='store_true',
+        help='download and reapply even if NSE reports no change',
+    )
+    constituents.set_defaults(handler=cmd_constituents)
+
+    daemon = subparsers.add_parser(
+        'daemon', help='poll and score continuously with a per-ticker schedule'
+    )
+    daemon.add_argument('--universe', choices=UNIVERSES, default='nifty_500')
+    daemon.add_argument(
+        '--requests-per-hour',
+        type=float,
+        default=SCHEDULER_REQUESTS_PER_HOUR,
+        help='HTTP request budget across all tickers and sources',
+    )
+    daemon.add_argument(
+        '--max-polls',
+        type=int,
+        help='stop after this many polls (default: run forever)',
+    )
+    daemon.set_defaults(handler=cmd_daemon)
+
+    serve = subparsers.add_parser(
+        'serve', help='serve the sentiment views over a local HTTP read API'
+    )
+    serve.add_argument('--host', default=READ_API_HOST)
+    serve.add_argument('--port', type=int, default=READ_API_PORT)
+    serve.set_defaults(handler=cmd_serve)
+
+    bundle = subparsers.add_parser(
+        'bundle', help='build the offline model bundle that scoring loads'
+    )
+    bundle.add_argument('--model', default=SENTIMENT_MODEL_NAME)
+    bundle.add_argument('--path', default=MODEL_BUNDLE_DIR)
+    bundle.set_defaults(handler=cmd_bundle)
+
+    snapshot = subparsers.add_parser(
+        'snapshot', help='publish a read-only snapshot of the database for readers'
+    )
+    snapshot.set_defaults(handler=cmd_snapshot)
+
+    rescore = subparsers.add_parser(
+        'rescore',
+        help='score stored articles the current model version has not scored yet',
+    )
+    rescore.add_argument(
+        '--cpu-seconds',
+        type=float,
+        default=RESCORE_CPU_SECONDS,
+        help='CPU time budget, summed over all threads',
+    )
+    rescore.add_argument('--batch-size', type=int, default=RESCORE_BATCH)
+    rescore.add_argument(
+        '--promote',
+        action='store_true',
+        help='also make the new scores the current ones the dashboard shows',
+    )
+    rescore.set_defaults(handler=cmd_rescore)
+
+    cascade = subparsers.add_parser(
+        'cascade-report',
+        help='measure how often the lexicon cascade skips finBERT and agrees with it',
+    )
+    cascade.add_argument(
+        '--n', type=int, default=2000, help='latest scored articles to sample'
+    )
+    cascade.add_argument(
+        '--threshold',
+        type=float,
+        action='append',
+        help='lexicon confidence threshold, may be repeated',
+    )
+    cascade.set_defaults(handler=cmd_cascade_report)
+
+    shifts = subparsers.add_parser(
+        'shifts', help='list the latest detected sentiment shifts'
+    )
+    shifts.add_argument('--n', type=int, default=20, help='shifts to show')
+    shifts.set_defaults(handler=cmd_shifts)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    if args.profile:
+        profiling.enable(args.profile_dir)
+
+    handler: Callable[[argparse.Namespace], None] = args.handler
+    with metrics.span('stage', name=args.command), profiling.stage(args.command):
+        handler(args)
+
+    report_paths = metrics.write_report(args.command)
+    if report_paths:
+        logger.info(f'Wrote run metrics to {", ".join(report_paths)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
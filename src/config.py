@@ -6,6 +6,33 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Sentiment Analysis Configuration
 SENTIMENT_MODEL_NAME = 'yiyanghkust/finbert-tone'
 BATCH_SIZE = 8
+# Headlines whose token ids are kept between scoring runs
+TOKEN_CACHE_SIZE = 50_000
+# Local copy of the model built by `cli.py bundle`; scoring loads only from here
+MODEL_BUNDLE_DIR = os.path.join(BASE_DIR, 'models', 'finbert-tone')
+# Lexicon confidence at which a headline keeps the lexicon's scores and skips
+# finBERT (see lexicon.py); the default only lets boilerplate like 'stock price
+# today live updates' through, and a value above 1 sends everything to the model
+CASCADE_THRESHOLD = 0.9
+# Model version recorded for scores whose model is unknown: scores stored before
+# versioning, and scorers without a `version` attribute
+UNVERSIONED_SCORES = 'unversioned'
+# Rescoring job (`cli.py rescore`): CPU seconds it may spend, summed over all
+# threads, and articles scored per batch
+RESCORE_CPU_SECONDS = 600.0
+RESCORE_BATCH = 256
+# Sentiment shift detector (shift_detector.py): weight of each new article in a
+# ticker's EWMA mean and variance of compound, and hours over which its article
+# rate is averaged
+SHIFT_ALPHA = 0.05
+SHIFT_RATE_HOURS = 24.0
+# |z| of a scoring batch's mean compound against the ticker's EWMA that is
+# recorded as a shift, once the ticker has this many articles behind it
+SHIFT_Z_THRESHOLD = 3.0
+SHIFT_MIN_ARTICLES = 20
+# floor on the EWMA standard deviation, so a ticker with uniform history does not
+# report every small move
+SHIFT_MIN_STD = 0.1
 
 # Web Scraping Configuration
 HEADER: dict[str, str] = {
@@ -24,16 +51,81 @@ HEADER: dict[str, str] = {
     'Cache-Control': 'max-age=0',
 }
 
+# News source circuit breaker: consecutive failed or empty responses before a source
+# is skipped, and seconds before it is probed again
+SOURCE_BREAKER_THRESHOLD = 5
+SOURCE_BREAKER_COOLDOWN = 600
+# Requests in flight at once per news source host when fetching a whole universe
+SOURCE_CONCURRENCY: dict[str, int] = {
+    'GoogleFinance': 4,
+    'YahooFinance': 2,
+    'Finology': 2,
+}
+# Dates without a year (Finology's '14 Mar, 10:30 AM') are placed in the year that
+# puts them at or before the run's reference time; this much slack, in hours, keeps
+# timestamps slightly ahead of it (source time zone, clock skew) in the current year
+DATE_FUTURE_SLACK_HOURS = 24
+
 INDEX_CONSTITUENTS_URL: dict[str, str] = {
     'nifty_500': 'https://archives.nseindia.com/content/indices/ind_nifty500list.csv',
     'nifty_200': 'https://archives.nseindia.com/content/indices/ind_nifty200list.csv',
     'nifty_100': 'https://archives.nseindia.com/content/indices/ind_nifty100list.csv',
     'nifty_50': 'https://archives.nseindia.com/content/indices/ind_nifty50list.csv',
 }
+# seconds before the stored constituents are checked against NSE again
+CONSTITUENTS_MAX_AGE = 24 * 60 * 60
+
+# Logging Configuration
+LOG_FORMAT = '<white>{time:HH:mm:ss!UTC}({elapsed})</white> - <level> {level} - {message} </level>'
+
+# Instrumentation Configuration
+# set NIFTY_METRICS=1 to collect spans/counters and write a run report to METRICS_DIR
+METRICS_ENV_VAR = 'NIFTY_METRICS'
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+# set NIFTY_PROFILE=1 (or pass --profile to main.py) to profile each stage
+PROFILE_ENV_VAR = 'NIFTY_PROFILE'
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Ingest Run Journal Configuration
+# per-ticker checkpoints of unfinished fetch runs, one file per run id (run_journal.py);
+# a file is deleted once its run's articles are in the database
+RUN_JOURNAL_DIR = os.path.join(BASE_DIR, 'runs')
+
+# Intraday Scheduler Configuration
+# total HTTP requests the daemon may spend per hour across all sources and tickers
+SCHEDULER_REQUESTS_PER_HOUR = 1800
+# bounds on how often a single ticker is polled, in seconds
+SCHEDULER_MIN_INTERVAL = 5 * 60
+SCHEDULER_MAX_INTERVAL = 4 * 60 * 60
+# smoothing factor for the per-ticker EWMA of new headlines per hour
+SCHEDULER_RATE_ALPHA = 0.3
+# new headlines per hour assumed for a ticker before it has any history
+SCHEDULER_RATE_PRIOR = 0.5
+# score once this many new articles are pending, or the oldest has waited this long
+SCHEDULER_SCORE_BATCH = 64
+SCHEDULER_SCORE_MAX_DELAY = 120
+
+# Read API Configuration
+READ_API_HOST = '127.0.0.1'
+READ_API_PORT = 8050
+# cached JSON responses kept by the read API, least recently used evicted first
+READ_API_CACHE_SIZE = 512
+# seconds between checks for a completed ingest, which clears the response cache
+READ_API_POLL_INTERVAL = 2
+# date range served when a request gives no start (PRD default: 7D)
+READ_API_DEFAULT_DAYS = 7
+# most articles returned by the news view
+READ_API_NEWS_LIMIT = 100
 
 # Database Configuration
 DB_PATH = os.path.join(BASE_DIR, 'database')
 DB_NAME = 'ticker_data.db'
+# After every commit the writer publishes a read-only copy of the database into
+# '<db file>.snapshots/'; DatabaseManager(read_only=True) opens the newest one, so
+# readers never wait on the single DuckDB writer
+SNAPSHOT_ON_COMMIT = True
+# snapshots kept on disk, so a reader still on an older one is not cut off
+SNAPSHOT_KEEP = 3
 
 # SQL Queries
 CREATE_TABLE = {
@@ -61,6 +153,85 @@ CREATE_TABLE = {
             companyName TEXT NOT NULL
         )
     """,
+    'indices_constituents': """
+        CREATE TABLE IF NOT EXISTS indices_constituents (
+            index_name TEXT NOT NULL,
+            ticker TEXT NOT NULL,
+            company_name TEXT,
+            industry TEXT,
+            isin TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (index_name, ticker)
+        )
+    """,
+    # Per-ticker running totals of scored articles through each day that has any,
+    # kept up to date by DatabaseManager.insert_articles (see sentiment_prefix.py)
+    'sentiment_prefix': """
+        CREATE TABLE IF NOT EXISTS sentiment_prefix (
+            ticker TEXT NOT NULL,
+            day DATE NOT NULL,
+            articles BIGINT NOT NULL,
+            positive DOUBLE NOT NULL,
+            negative DOUBLE NOT NULL,
+            neutral DOUBLE NOT NULL,
+            compound DOUBLE NOT NULL,
+            version BIGINT NOT NULL,
+            PRIMARY KEY (ticker, day)
+        )
+    """,
+    # Stamps the sentiment_prefix rows each write changed, so readers can catch up
+    'sentiment_prefix_version': """
+        CREATE SEQUENCE IF NOT EXISTS sentiment_prefix_version START 1
+    """,
+    # Scores of every model version that has scored an article; article_data holds
+    # the current ones, see rescore.py
+    'sentiment_scores': """
+        CREATE TABLE IF NOT EXISTS sentiment_scores (
+            ticker TEXT NOT NULL,
+            headline TEXT NOT NULL,
+            model_version TEXT NOT NULL,
+            negative_sentiment FLOAT NOT NULL,
+            positive_sentiment FLOAT NOT NULL,
+            neutral_sentiment FLOAT NOT NULL,
+            compound_sentiment FLOAT NOT NULL,
+            scored_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (ticker, headline, model_version)
+        )
+    """,
+    # Streaming per-ticker statistics of shift_detector.ShiftDetector: EWMA sums of
+    # compound and compound^2 with their total weight, and the decayed article count
+    'shift_state': """
+        CREATE TABLE IF NOT EXISTS shift_state (
+            ticker TEXT PRIMARY KEY NOT NULL,
+            ewm_sum DOUBLE NOT NULL,
+            ewm_sq_sum DOUBLE NOT NULL,
+            ewm_weight DOUBLE NOT NULL,
+            decayed_count DOUBLE NOT NULL,
+            last_seen DOUBLE NOT NULL,
+            articles BIGINT NOT NULL
+        )
+    """,
+    # Scoring batches whose mean compound moved sharply from the ticker's EWMA
+    'sentiment_shifts': """
+        CREATE TABLE IF NOT EXISTS sentiment_shifts (
+            ticker TEXT NOT NULL,
+            posted_at DATETIME NOT NULL,
+            articles INTEGER NOT NULL,
+            batch_mean DOUBLE NOT NULL,
+            baseline_mean DOUBLE NOT NULL,
+            baseline_std DOUBLE NOT NULL,
+            z DOUBLE NOT NULL,
+            articles_per_hour DOUBLE NOT NULL,
+            detected_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    'pipeline_state': """
+        CREATE TABLE IF NOT EXISTS pipeline_state (
+            key TEXT PRIMARY KEY NOT NULL,
+            value TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
 }
 
 CREATE_INDEX = {}
@@ -88,6 +259,37 @@ INSERT_DATA = {
         INSERT OR REPLACE INTO ticker_meta
         VALUES (?, ?, ?, ?, ?)
     """,
+    'pipeline_state': """
+        INSERT OR REPLACE INTO pipeline_state (key, value, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+    """,
+    # Parameter: model version
+    'sentiment_scores': """
+        INSERT OR REPLACE INTO sentiment_scores
+        SELECT
+            ticker, headline, ?, Negative, Positive, Neutral, compound,
+            CURRENT_TIMESTAMP
+        FROM articles_df
+    """,
+    'shift_state': """
+        INSERT OR REPLACE INTO shift_state SELECT * FROM state_df
+    """,
+    'sentiment_shifts': """
+        INSERT INTO sentiment_shifts (
+            ticker, posted_at, articles, batch_mean, baseline_mean, baseline_std, z,
+            articles_per_hour
+        )
+        SELECT * FROM shifts_df
+    """,
+    # One-off copy of scores written before versioning, as UNVERSIONED_SCORES
+    'unversioned_scores': """
+        INSERT OR IGNORE INTO sentiment_scores
+        SELECT
+            ticker, headline, ?, negative_sentiment, positive_sentiment,
+            neutral_sentiment, compound_sentiment, created_at
+        FROM article_data
+        WHERE compound_sentiment IS NOT NULL
+    """,
 }
 
 GET_DATA = {
@@ -95,11 +297,89 @@ GET_DATA = {
         SELECT * FROM ticker_meta
     """,
     'index_constituents': """
-        SELECT ticker FROM indices_constituents WHERE {} = true
+        SELECT ticker FROM indices_constituents WHERE index_name = ? ORDER BY ticker
     """,
     'articles_base': """
         SELECT * FROM article_data WHERE 1=1
     """,
+    'pipeline_state': """
+        SELECT value FROM pipeline_state WHERE key = ?
+    """,
+    # Rescoring work in priority order: articles with no scores at all, then the
+    # newest first, as recent days are what the dashboard and read API show
+    'articles_missing_version': """
+        SELECT a.ticker, a.headline, a.date_posted, a.source, a.article_link
+        FROM article_data a
+        ANTI JOIN sentiment_scores s
+            ON s.ticker = a.ticker AND s.headline = a.headline AND s.model_version = ?
+        ORDER BY a.compound_sentiment IS NULL DESC, a.date_posted DESC
+        LIMIT ?
+    """,
+    'shift_state': """
+        SELECT * FROM shift_state ORDER BY ticker
+    """,
+    'sentiment_shifts': """
+        SELECT * FROM sentiment_shifts ORDER BY posted_at DESC LIMIT ?
+    """,
+    'score_versions': """
+        SELECT model_version, count(*) AS articles, max(scored_at) AS last_scored
+        FROM sentiment_scores
+        GROUP BY model_version
+        ORDER BY last_scored DESC
+    """,
+    # Articles with the scores of one model version, or where it has not scored an
+    # article and fallback is true, of the version that scored it last. Parameters:
+    # version, version, fallback; filters are appended
+    'articles_versioned': """
+        SELECT
+            a.ticker, a.headline, a.date_posted, a.source, a.article_link,
+            s.negative_sentiment, s.positive_sentiment, s.neutral_sentiment,
+            s.compound_sentiment, a.created_at, s.model_version
+        FROM article_data a
+        LEFT JOIN (
+            SELECT * FROM sentiment_scores
+            QUALIFY row_number() OVER (
+                PARTITION BY ticker, headline
+                ORDER BY model_version = ? DESC, scored_at DESC
+            ) = 1
+        ) s ON s.ticker = a.ticker AND s.headline = a.headline
+            AND (s.model_version = ? OR ?)
+        WHERE 1=1
+    """,
+    'existing_headlines': """
+        SELECT headline FROM article_data
+        WHERE ticker = ? AND list_contains(?, headline)
+    """,
+    'sentiment_prefix_since': """
+        SELECT ticker, day, articles, positive, negative, neutral, compound, version
+        FROM sentiment_prefix
+        WHERE version > ?
+        ORDER BY ticker, day
+    """,
+    # Read API views; date bounds are 'YYYY-MM-DD', start inclusive, end exclusive
+    'api_news': """
+        SELECT
+            ticker, headline, date_posted, source, article_link,
+            positive_sentiment, negative_sentiment, neutral_sentiment, compound_sentiment
+        FROM article_data
+        WHERE ticker = ? AND date_posted >= ? AND date_posted < ?
+        ORDER BY date_posted DESC
+        LIMIT ?
+    """,
+    'api_sentiment_series': """
+        SELECT
+            substr(date_posted, 1, 10) AS day,
+            count(*) AS articles,
+            avg(positive_sentiment) AS positive,
+            avg(negative_sentiment) AS negative,
+            avg(neutral_sentiment) AS neutral,
+            avg(compound_sentiment) AS compound
+        FROM article_data
+        WHERE ticker = ? AND date_posted >= ? AND date_posted < ?
+            AND compound_sentiment IS NOT NULL
+        GROUP BY day
+        ORDER BY day
+    """,
 }
 
 
@@ -139,8 +419,254 @@ DB_UTILS = {
         delete from article_data
         where rowid in (select rowid from duplicates_cte);
     """,
+    # Index constituents: load an NSE CSV into a temp snapshot, then apply only the
+    # rows that were added, removed or changed since the stored one
+    'stage_constituents': """
+        CREATE OR REPLACE TEMP TABLE constituents_snapshot AS
+        SELECT DISTINCT
+            CAST(? AS TEXT) AS index_name,
+            trim("Symbol") AS ticker,
+            trim("Company Name") AS company_name,
+            trim("Industry") AS industry,
+            trim("ISIN Code") AS isin
+        FROM read_csv(?, header = true, all_varchar = true)
+        WHERE nullif(trim("Symbol"), '') IS NOT NULL;
+    """,
+    'constituents_diff': """
+        with changed as (
+            select index_name, ticker, company_name, industry, isin
+            from constituents_snapshot
+            except
+            select index_name, ticker, company_name, industry, isin
+            from indices_constituents where index_name = ?
+        )
+        select
+            count(*) filter (where c.ticker is null) as added,
+            count(*) filter (where c.ticker is not null) as changed
+        from changed
+        left join indices_constituents c using (index_name, ticker);
+    """,
+    'delete_removed_constituents': """
+        delete from indices_constituents
+        where index_name = ?
+            and ticker not in (select ticker from constituents_snapshot);
+    """,
+    'upsert_changed_constituents': """
+        insert or replace into indices_constituents
+            (index_name, ticker, company_name, industry, isin, updated_at)
+        select *, CURRENT_TIMESTAMP from (
+            select index_name, ticker, company_name, industry, isin
+            from constituents_snapshot
+            except
+            select index_name, ticker, company_name, industry, isin
+            from indices_constituents where index_name = ?
+        );
+    """,
+    'latest_created_at': """
+        select CAST(max(created_at) AS TEXT) from article_data;
+    """,
+    'delete_duplicates_since': """
+        with new_keys as (
+        -- keys inserted or replaced since the last dedup watermark
+        select distinct ticker, headline
+        from article_data
+        where created_at > CAST(? AS TIMESTAMP)
+        ),
+        duplicates_cte as (
+        -- only rows sharing a key with a new row take part in the window
+        select
+            a.rowid as row_id,
+            ROW_NUMBER() OVER (
+            partition by a.ticker, a.headline order by a.created_at asc
+            ) as rn
+        from article_data a
+        semi join new_keys k on a.ticker = k.ticker and a.headline = k.headline
+        )
+        delete from article_data
+        where rowid in (select row_id from duplicates_cte where rn > 1);
+    """,
+    # Columns of a table, to recognise layouts written by older releases
+    'table_columns': """
+        select column_name from information_schema.columns
+        where table_schema = 'main' and table_name = ?;
+    """,
+    # indices_constituents used to hold one row per ticker with a BOOLEAN column per
+    # index (see docs/PRD.md); it is set aside and copied into the (index_name,
+    # ticker) table one index column at a time
+    'set_aside_legacy_constituents': """
+        alter table indices_constituents rename to indices_constituents_legacy;
+    """,
+    'copy_legacy_constituents': """
+        insert or ignore into indices_constituents (index_name, ticker, isin)
+        select ?, ticker, {isin} from indices_constituents_legacy
+        where "{index}" and ticker is not null;
+    """,
+    'drop_legacy_constituents': """
+        drop table indices_constituents_legacy;
+    """,
 }
 
+# Scores an insert replaces, negated so they cancel out of the running totals
+_REPLACED_SCORES = """
+    SELECT
+        a.ticker, a.date_posted, -1 AS articles,
+        -a.positive_sentiment AS positive, -a.negative_sentiment AS negative,
+        -a.neutral_sentiment AS neutral, -a.compound_sentiment AS compound
+    FROM article_data a
+    SEMI JOIN articles_df n ON a.ticker = n.ticker AND a.headline = n.headline
+    WHERE a.compound_sentiment IS NOT NULL
+"""
+# An insert without scores keeps the stored ones (INSERT OR REPLACE only sets the
+# listed columns) but may move them to a new date_posted
+_KEPT_SCORES = """
+    SELECT
+        n.ticker, n.date_posted, 1 AS articles,
+        a.positive_sentiment AS positive, a.negative_sentiment AS negative,
+        a.neutral_sentiment AS neutral, a.compound_sentiment AS compound
+    FROM article_data a
+    JOIN articles_df n ON a.ticker = n.ticker AND a.headline = n.headline
+    WHERE a.compound_sentiment IS NOT NULL
+"""
+# New scores, cast to the FLOAT they are stored as so a later replacement
+# subtracts exactly what was added
+_INSERTED_SCORES = """
+    SELECT
+        ticker, date_posted, 1 AS articles,
+        CAST(Positive AS FLOAT) AS positive, CAST(Negative AS FLOAT) AS negative,
+        CAST(Neutral AS FLOAT) AS neutral, CAST(compound AS FLOAT) AS compound
+    FROM articles_df
+    WHERE compound IS NOT NULL
+"""
+
+
+def _stage_sentiment_deltas(scores: str) -> str:
+    """Net change per (ticker, day) that inserting `articles_df` makes to the scores."""
+    return f"""
+        CREATE OR REPLACE TEMP TABLE sentiment_deltas AS
+        SELECT
+            ticker, day, sum(articles) AS articles, sum(positive) AS positive,
+            sum(negative) AS negative, sum(neutral) AS neutral, sum(compound) AS compound
+        FROM (
+            SELECT *, TRY_CAST(substr(date_posted, 1, 10) AS DATE) AS day
+            FROM ({scores})
+        )
+        WHERE day IS NOT NULL
+        GROUP BY ticker, day
+        HAVING sum(articles) != 0 OR sum(positive) != 0 OR sum(negative) != 0
+            OR sum(neutral) != 0 OR sum(compound) != 0;
+    """
+
+
+# Incremental upkeep of sentiment_prefix around an article insert: stage the
+# deltas, add a row for each new (ticker, day) carrying the previous running total,
+# then add every delta to the rows on and after its day. Equality joins and
+# windows only: an ASOF join against the transaction-local deltas table is several
+# times slower.
+SENTIMENT_PREFIX = {
+    'stage_deltas_with_sentiment': _stage_sentiment_deltas(
+        f'{_INSERTED_SCORES} UNION ALL {_REPLACED_SCORES}'
+    ),
+    'stage_deltas_without_sentiment': _stage_sentiment_deltas(
+        f'{_KEPT_SCORES} UNION ALL {_REPLACED_SCORES}'
+    ),
+    'count_deltas': """
+        SELECT count(*) FROM sentiment_deltas;
+    """,
+    'next_version': """
+        SELECT nextval('sentiment_prefix_version');
+    """,
+    'insert_days': """
+        INSERT INTO sentiment_prefix
+        SELECT
+            ticker, day, coalesce(articles, 0), coalesce(positive, 0),
+            coalesce(negative, 0), coalesce(neutral, 0), coalesce(compound, 0), ?
+        FROM (
+            -- each new day takes the running totals of the latest stored day before it
+            SELECT
+                ticker, day, is_new,
+                last_value(articles IGNORE NULLS) OVER w AS articles,
+                last_value(positive IGNORE NULLS) OVER w AS positive,
+                last_value(negative IGNORE NULLS) OVER w AS negative,
+                last_value(neutral IGNORE NULLS) OVER w AS neutral,
+                last_value(compound IGNORE NULLS) OVER w AS compound
+            FROM (
+                SELECT
+                    ticker, day, false AS is_new,
+                    articles, positive, negative, neutral, compound
+                FROM sentiment_prefix
+                WHERE ticker IN (SELECT ticker FROM sentiment_deltas)
+                UNION ALL
+                SELECT
+                    ticker, day, true AS is_new,
+                    NULL, NULL, NULL, NULL, NULL
+                FROM sentiment_deltas
+                ANTI JOIN sentiment_prefix USING (ticker, day)
+            )
+            WINDOW w AS (PARTITION BY ticker ORDER BY day)
+        )
+        WHERE is_new;
+    """,
+    'apply_deltas': """
+        UPDATE sentiment_prefix AS p
+        SET
+            articles = p.articles + c.articles,
+            positive = p.positive + c.positive,
+            negative = p.negative + c.negative,
+            neutral = p.neutral + c.neutral,
+            compound = p.compound + c.compound,
+            version = ?
+        FROM (
+            -- every row on or after a ticker's first delta gains the deltas so far
+            SELECT
+                p.ticker, p.day,
+                count(d.day) OVER w AS deltas_so_far,
+                sum(coalesce(d.articles, 0)) OVER w AS articles,
+                sum(coalesce(d.positive, 0)) OVER w AS positive,
+                sum(coalesce(d.negative, 0)) OVER w AS negative,
+                sum(coalesce(d.neutral, 0)) OVER w AS neutral,
+                sum(coalesce(d.compound, 0)) OVER w AS compound
+            FROM sentiment_prefix p
+            LEFT JOIN sentiment_deltas d USING (ticker, day)
+            WHERE p.ticker IN (SELECT ticker FROM sentiment_deltas)
+            WINDOW w AS (PARTITION BY p.ticker ORDER BY p.day)
+        ) c
+        WHERE p.ticker = c.ticker AND p.day = c.day AND c.deltas_so_far > 0;
+    """,
+    'clear': """
+        DELETE FROM sentiment_prefix;
+    """,
+    'rebuild': """
+        INSERT INTO sentiment_prefix
+        SELECT
+            ticker, day,
+            sum(articles) OVER w, sum(positive) OVER w, sum(negative) OVER w,
+            sum(neutral) OVER w, sum(compound) OVER w, ?
+        FROM (
+            SELECT
+                ticker, day, count(*) AS articles,
+                sum(positive_sentiment) AS positive, sum(negative_sentiment) AS negative,
+                sum(neutral_sentiment) AS neutral, sum(compound_sentiment) AS compound
+            FROM (
+                SELECT *, TRY_CAST(substr(date_posted, 1, 10) AS DATE) AS day
+                FROM article_data
+                WHERE compound_sentiment IS NOT NULL
+            )
+            WHERE day IS NOT NULL
+            GROUP BY ticker, day
+        )
+        WINDOW w AS (PARTITION BY ticker ORDER BY day);
+    """,
+}
+
+# Keys used in the pipeline_state table
+DEDUP_WATERMARK_KEY = 'dedup_watermark'
+# changed by every article insert; readers drop cached results when it moves
+ARTICLES_GENERATION_KEY = 'articles_generation'
+# version of the last full sentiment_prefix rebuild from article_data
+SENTIMENT_PREFIX_BUILT_KEY = 'sentiment_prefix_built'
+# set once the scores stored before sentiment_scores existed have been copied into it
+UNVERSIONED_SCORES_KEY = 'unversioned_scores_copied'
+
 
 # Query building utilities
 def build_articles_query(
@@ -148,28 +674,41 @@ def build_articles_query(
     after_date: str | None = None,
     latest: bool = True,
     limit: int = 20,
+    version: str | None = None,
+    fallback: bool = True,
 ) -> tuple[str, list]:
     """
     Build dynamic query for articles with filters and parameters.
 
+    With a model `version` the scores come from `sentiment_scores`: that version's,
+    or with `fallback` the latest available version's where it has not scored an
+    article. Without `fallback` such articles have no scores.
+
     Returns:
         tuple: (query_string, parameters_list)
     """
-    query_parts = [GET_DATA['articles_base']]
-    params = []
+    params: list = []
+    if version is None:
+        query_parts = [GET_DATA['articles_base']]
+        prefix = ''
+    else:
+        query_parts = [GET_DATA['articles_versioned']]
+        params.extend([version, version, fallback])
+        prefix = 'a.'
 
     # Apply sentiment filter
     if not has_sentiment:
-        query_parts.append('AND compound_sentiment IS NULL')
+        column = 's.compound_sentiment' if version is not None else 'compound_sentiment'
+        query_parts.append(f'AND {column} IS NULL')
 
     # Apply date filter
     if after_date is not None:
-        query_parts.append('AND date_posted >= ?')
+        query_parts.append(f'AND {prefix}date_posted >= ?')
         params.append(after_date)
 
     # Apply ordering
     order_direction = 'DESC' if latest else 'ASC'
-    query_parts.append(f'ORDER BY date_posted {order_direction}')
+    query_parts.append(f'ORDER BY {prefix}date_posted {order_direction}')
 
     # Apply limit
     query_parts.append('LIMIT ?')
@@ -0,0 +1,142 @@
+"""
+Index constituents from the NSE CSVs listed in `INDEX_CONSTITUENTS_URL`.
+
+`refresh_constituents` keeps the `indices_constituents` table in step with NSE
+while touching the network as little as possible:
+
+- an index checked within `CONSTITUENTS_MAX_AGE` is not requested at all;
+- otherwise the CSV is requested conditionally, with the `ETag` and
+  `Last-Modified` validators from the previous download, so an unchanged list
+  costs one 304 response;
+- a 200 whose body hashes the same as the stored snapshot is not applied again;
+- a changed CSV is bulk-loaded with DuckDB's `read_csv` and only the added,
+  removed or changed rows are written (`DatabaseManager.apply_index_constituents`).
+
+Validators, the content hash and the time of the last check are kept per index in
+`pipeline_state`. When NSE can't be reached the stored snapshot is used as is.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+from loguru import logger
+
+from config import CONSTITUENTS_MAX_AGE, HEADER, INDEX_CONSTITUENTS_URL
+from database import DatabaseManager
+
+
+def _state_key(index: str) -> str:
+    return f'constituents:{index}'
+
+
+def _download(url: str, state: dict[str, Any], get: Callable[..., Any] | None) -> Any:
+    headers = {'User-Agent': HEADER['User-Agent'], 'Accept': 'text/csv,*/*'}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
+    if get is None:
+        import httpx
+
+        get = httpx.get
+    return get(url, headers=headers, follow_redirects=True, timeout=30)
+
+
+def refresh_index(
+    index: str,
+    dbm: DatabaseManager,
+    max_age: float = CONSTITUENTS_MAX_AGE,
+    force: bool = False,
+    get: Callable[..., Any] | None = None,
+) -> tuple[int, int, int] | None:
+    """
+    Bring the stored constituents of `index` up to date with NSE. `force` skips
+    the age check and the validators. `get` stands in for `httpx.get` in tests.
+
+    Returns:
+        (added, removed, changed) when a new snapshot was applied, else None
+    """
+    url = INDEX_CONSTITUENTS_URL[index]
+    raw_state = dbm.get_state(_state_key(index))
+    state: dict[str, Any] = json.loads(raw_state) if raw_state else {}
+    now = time.time()
+    if not force and now - state.get('checked_at', 0) < max_age:
+        logger.debug(f'Constituents of {index} checked recently, not requesting')
+        return None
+
+    try:
+        response = _download(url, {} if force else state, get)
+        if response.status_code == 304:
+            logger.info(f'Constituents of {index} not modified since last download')
+            state['checked_at'] = now
+            dbm.set_state(_state_key(index), json.dumps(state))
+            return None
+        response.raise_for_status()
+    except Exception as e:
+        logger.warning(f'Could not refresh constituents of {index}, using stored: {e}')
+        return None
+
+    content: bytes = response.content
+    digest = hashlib.sha256(content).hexdigest()
+    changes: tuple[int, int, int] | None = None
+    if force or digest != state.get('sha256'):
+        # read_csv needs a path, so the body goes through a temporary file
+        fd, csv_path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            changes = dbm.apply_index_constituents(index, csv_path)
+        except Exception as e:
+            logger.warning(f'Could not load constituents of {index}, using stored: {e}')
+            return None
+        finally:
+            os.remove(csv_path)
+        added, removed, changed = changes
+        logger.info(
+            f'Constituents of {index}: {added} added, {removed} removed, {changed} changed'
+        )
+    else:
+        logger.info(f'Constituents of {index} unchanged')
+
+    dbm.set_state(
+        _state_key(index),
+        json.dumps(
+            {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha256': digest,
+                'checked_at': now,
+            }
+        ),
+    )
+    return changes
+
+
+def refresh_constituents(
+    indices: list[str] | None = None,
+    dbm: DatabaseManager | None = None,
+    force: bool = False,
+) -> dict[str, tuple[int, int, int] | None]:
+    """Refresh every index in `indices`, all of `INDEX_CONSTITUENTS_URL` by default."""
+    dbm = dbm or DatabaseManager()
+    return {
+        index: refresh_index(index, dbm, force=force)
+        for index in indices or list(INDEX_CONSTITUENTS_URL)
+    }
+
+
+def universe_tickers(universe: str, dbm: DatabaseManager | None = None) -> list[str]:
+    """Tickers in `universe`, refreshing the stored constituents first if stale."""
+    dbm = dbm or DatabaseManager()
+    refresh_index(universe, dbm)
+    tickers: list[str] = dbm.get_index_constituents(universe)['ticker'].tolist()
+    if not tickers:
+        logger.warning(f'No constituents stored for {universe}')
+    return tickers
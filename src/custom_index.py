@@ -0,0 +1,151 @@
+"""
+Market-cap weighted sentiment for many user-defined indices at once.
+
+A `TickerUniverse` fixes an order over the tickers in `ticker_meta`, so a custom
+index is a row of a boolean membership bitmap over that order, and per-ticker
+aggregates (e.g. `SentimentPrefix.ticker_means`) are vectors in the same order.
+For `n` indices over `t` tickers, with `M` the (n, t) bitmap, `c` the market caps,
+`s` the per-ticker mean compound score and `a` the mask of tickers that have
+articles:
+
+```
+W = M * (c * a)                           # (n, t) weights of covered members
+index     = W @ s / W.sum(1)              # (n,)
+sector    = W @ (G * s) / W @ G           # (n, groups), G the (t, groups) one-hot
+weight    = W / W.sum(1)                  # (n, t) constituent weights
+```
+
+Members without articles in the range, or without a market cap, carry no weight;
+`coverage` is the share of each index's market cap that did contribute.
+
+```
+universe = TickerUniverse(dbm.get_ticker_metadata())
+members = universe.bitmap([['TCS', 'INFY', 'WIPRO'], ['HDFCBANK', 'ICICIBANK']])
+result = score_indices(universe, members, prefix.ticker_means(start, end))
+result.index, result.groups['sector'], result.constituents(0)
+```
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+GROUP_LEVELS = ('sector', 'industry')
+
+
+class TickerUniverse:
+    """Fixed ticker order with market caps and group codes from `ticker_meta`."""
+
+    def __init__(self, meta: pd.DataFrame) -> None:
+        meta = meta.sort_values('ticker').reset_index(drop=True)
+        self.meta = meta
+        self.tickers: list[str] = meta['ticker'].tolist()
+        self.position = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.mcap = meta['mCap'].fillna(0).clip(lower=0).to_numpy(dtype=float)
+        self.group_names: dict[str, list[str]] = {}
+        # level -> (tickers, groups) one-hot membership
+        self.group_onehot: dict[str, np.ndarray] = {}
+        for level in GROUP_LEVELS:
+            codes, names = meta[level].factorize(sort=True)
+            self.group_names[level] = names.tolist()
+            onehot = np.zeros((len(self.tickers), len(names)))
+            onehot[np.arange(len(codes)), codes] = 1
+            self.group_onehot[level] = onehot
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def positions(self, tickers: Iterable[str]) -> np.ndarray:
+        """Positions of `tickers` in the universe; unknown tickers raise ValueError."""
+        tickers = list(tickers)
+        unknown = [ticker for ticker in tickers if ticker not in self.position]
+        if unknown:
+            raise ValueError(f'Tickers not in the universe: {", ".join(unknown)}')
+        return np.fromiter(
+            (self.position[ticker] for ticker in tickers),
+            dtype=np.intp,
+            count=len(tickers),
+        )
+
+    def bitmap(self, indices: Sequence[Iterable[str]]) -> np.ndarray:
+        """(len(indices), len(universe)) membership bitmap of ticker lists."""
+        members = [self.positions(tickers) for tickers in indices]
+        bitmap = np.zeros((len(members), len(self)), dtype=bool)
+        rows = np.repeat(np.arange(len(members)), [len(m) for m in members])
+        bitmap[rows, np.concatenate(members) if members else []] = True
+        return bitmap
+
+    def align(self, aggregates: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Per-ticker compound score and covered mask in universe order, from a frame
+        with `ticker` and `compound` columns. Tickers outside the universe are
+        dropped; tickers missing from the frame are uncovered.
+        """
+        scores = np.zeros(len(self))
+        covered = np.zeros(len(self), dtype=bool)
+        rows = aggregates[aggregates['ticker'].isin(self.position)]
+        rows = rows[rows['compound'].notna()]
+        at = self.positions(rows['ticker'])
+        scores[at] = rows['compound'].to_numpy(dtype=float)
+        covered[at] = True
+        return scores, covered
+
+
+@dataclass(slots=True)
+class IndexSentiment:
+    universe: TickerUniverse
+    # (indices,) weighted compound score, NaN where no member has articles
+    index: np.ndarray
+    # (indices,) share of member market cap with articles in the range
+    coverage: np.ndarray
+    # level -> (indices, groups) weighted compound score, NaN for empty groups
+    groups: dict[str, np.ndarray]
+    # (indices, tickers) weight of each covered member within its index
+    weights: np.ndarray
+    # (tickers,) per-ticker compound score, meaningful where covered
+    scores: np.ndarray
+    covered: np.ndarray
+
+    def constituents(self, i: int) -> pd.DataFrame:
+        """Covered members of index `i` with their metadata, weight and score."""
+        at = np.flatnonzero(self.weights[i] > 0)
+        frame = self.universe.meta.iloc[at].reset_index(drop=True)
+        return frame.assign(weight=self.weights[i, at], compound=self.scores[at])
+
+
+def score_indices(
+    universe: TickerUniverse, members: np.ndarray, aggregates: pd.DataFrame
+) -> IndexSentiment:
+    """
+    Market-cap weighted index, sector / industry and constituent sentiment of every
+    row of the `members` bitmap, given per-ticker aggregates (see `align`).
+    """
+    scores, covered = universe.align(aggregates)
+    members = members.astype(float)
+    weights = members * (universe.mcap * covered)
+    total = weights.sum(axis=1)
+    cap = members @ universe.mcap
+    with np.errstate(invalid='ignore', divide='ignore'):
+        index = weights @ scores / total
+        coverage = np.where(cap > 0, total / cap, 0.0)
+        groups = {
+            level: (weights @ (onehot * scores[:, None])) / (weights @ onehot)
+            for level, onehot in universe.group_onehot.items()
+        }
+        weights = np.nan_to_num(weights / total[:, None])
+    return IndexSentiment(
+        universe=universe,
+        index=index,
+        coverage=coverage,
+        groups=groups,
+        weights=weights,
+        scores=scores,
+        covered=covered,
+    )
@@ -1,81 +1,260 @@
 # Imports
 
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Any
+
 import pandas as pd
 import plotly.express as px
+from plotly.graph_objects import Figure
 from whenever import Instant
 
+import metrics
 from database import DatabaseManager
 
-# Initialize database manager
-db_manager = DatabaseManager()
-
-# Get data from database
-article_data = db_manager.get_articles()
-ticker_metadata = db_manager.get_ticker_metadata()
-
-# aggregate article scores by ticker name
-ticker_scores = (
-    article_data.loc[
-        :,
-        [
-            'ticker',
-            'neutral_sentiment',
-            'positive_sentiment',
-            'negative_sentiment',
-            'compound_sentiment',
+DASHBOARD_PATH = '../NIFTY_500_live_sentiment.html'
+# --split output: an overview page of sector tiles, with each sector's treemap in a
+# compressed JSON file that is fetched when its tile is clicked
+SPLIT_DASHBOARD_DIR = '../dashboard'
+
+
+def aggregate_ticker_scores(
+    article_data: pd.DataFrame, ticker_metadata: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Average article sentiment per ticker and join it onto the ticker metadata,
+    renaming columns to the labels shown on the treemap.
+    """
+    # aggregate article scores by ticker name
+    ticker_scores = (
+        article_data.loc[
+            :,
+            [
+                'ticker',
+                'neutral_sentiment',
+                'positive_sentiment',
+                'negative_sentiment',
+                'compound_sentiment',
+            ],
+        ]
+        .groupby('ticker')
+        .mean()
+        .reset_index()
+    )
+
+    # merge dfs
+    final_df = pd.merge(ticker_metadata, ticker_scores, on='ticker', how='inner')
+
+    final_df.rename(
+        columns={
+            'mCap': 'Market Cap (Billion Rs)',
+            'compound_sentiment': 'Sentiment Score',
+            'neutral_sentiment': 'Neutral',
+            'positive_sentiment': 'Positive',
+            'negative_sentiment': 'Negative',
+        },
+        inplace=True,
+    )
+    return final_df
+
+
+def build_treemap(final_df: pd.DataFrame) -> Figure:
+    fig = px.treemap(
+        final_df,
+        path=[px.Constant('Nifty 500'), 'sector', 'industry', 'ticker'],
+        values='Market Cap (Billion Rs)',
+        color='Sentiment Score',
+        hover_data=[
+            'companyName',
+            'Negative',
+            'Neutral',
+            'Positive',
+            'Sentiment Score',
         ],
+        color_continuous_scale=['#FF0000', '#000000', '#00FF00'],
+        color_continuous_midpoint=0,
+    )
+    fig.data[0].customdata = final_df[
+        ['companyName', 'Negative', 'Neutral', 'Positive', 'Sentiment Score']
     ]
-    .groupby('ticker')
-    .mean()
-    .reset_index()
-)
-
-# merge dfs
-final_df = pd.merge(ticker_metadata, ticker_scores, on='ticker', how='inner')
-
-
-final_df.rename(
-    columns={
-        'mCap': 'Market Cap (Billion Rs)',
-        'compound_sentiment': 'Sentiment Score',
-        'neutral_sentiment': 'Neutral',
-        'positive_sentiment': 'Positive',
-        'negative_sentiment': 'Negative',
-    },
-    inplace=True,
-)
-
-# graphing
-print('Generating Plots')
-fig = px.treemap(
-    final_df,
-    path=[px.Constant('Nifty 500'), 'sector', 'industry', 'ticker'],
-    values='Market Cap (Billion Rs)',
-    color='Sentiment Score',
-    hover_data=['companyName', 'Negative', 'Neutral', 'Positive', 'Sentiment Score'],
-    color_continuous_scale=['#FF0000', '#000000', '#00FF00'],
-    color_continuous_midpoint=0,
-)
-fig.data[0].customdata = final_df[
-    ['companyName', 'Negative', 'Neutral', 'Positive', 'Sentiment Score']
-]
-fig.data[0].texttemplate = '%{label}<br>%{customdata[4]}'
-fig.update_traces(textposition='middle center')
-fig.update_layout(margin=dict(t=30, l=10, r=10, b=10), font_size=20)
-
-
-# Get current date, time and timezone to print to the html page
-now = Instant.now().to_tz('Asia/Kolkata')
-datetime_now = now.py_datetime().strftime('%d/%m/%Y %H:%M:%S')
-
-# Generate HTML File with Updated Time and Treemap
-print('Writing HTML')
-with open('../NIFTY_500_live_sentiment.html', 'a') as f:
-    f.truncate(0)  # clear file if something is already written on it
+    fig.data[0].texttemplate = '%{label}<br>%{customdata[4]}'
+    fig.update_traces(textposition='middle center')
+    fig.update_layout(margin=dict(t=30, l=10, r=10, b=10), font_size=20)
+    return fig
+
+
+def header_html() -> str:
+    # Get current date, time and timezone to print to the html page
+    now = Instant.now().to_tz('Asia/Kolkata')
+    # From the fields rather than py_datetime(), which newer whenever releases rename
+    datetime_now = (
+        f'{now.day:02d}/{now.month:02d}/{now.year} '
+        f'{now.hour:02d}:{now.minute:02d}:{now.second:02d}'
+    )
     title = '<h1>NIFTY 500 Stock Sentiment Dashboard</h1>'
-    updated = f'<h2>Last updated: {datetime_now} (Timezone: {now.tz})</h2>'
+    updated = f'<h2>Last updated: {datetime_now} (Timezone: {now.tz_id})</h2>'
     description = 'This dashboard is updated at 17:30 IST Every Day with sentiment analysis performed on latest scraped news headlines.<br><br>'
-    f.write(title + updated + description)
-    f.write(
-        fig.to_html(full_html=False, include_plotlyjs='cdn')
-    )  # write the fig created above into the html file
+    return title + updated + description
+
+
+def write_dashboard(fig: Figure, path: str = DASHBOARD_PATH) -> None:
+    # Generate HTML File with Updated Time and Treemap
+    with open(path, 'a') as f:
+        f.truncate(0)  # clear file if something is already written on it
+        f.write(header_html())
+        f.write(
+            fig.to_html(full_html=False, include_plotlyjs='cdn')
+        )  # write the fig created above into the html file
+
+
+def aggregate_sector_scores(final_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Market cap and market-cap weighted sentiment per sector: the values the full
+    treemap shows on its sector tiles.
+    """
+    df = final_df.assign(
+        weighted=final_df['Market Cap (Billion Rs)'] * final_df['Sentiment Score']
+    )
+    sectors = df.groupby('sector').agg(
+        mcap=('Market Cap (Billion Rs)', 'sum'),
+        weighted=('weighted', 'sum'),
+        Tickers=('ticker', 'size'),
+    )
+    sectors['Sentiment Score'] = sectors['weighted'] / sectors['mcap']
+    return (
+        sectors.drop(columns='weighted')
+        .rename(columns={'mcap': 'Market Cap (Billion Rs)'})
+        .reset_index()
+    )
+
+
+def build_sector_overview(sector_df: pd.DataFrame) -> Figure:
+    fig = px.treemap(
+        sector_df,
+        path=[px.Constant('Nifty 500'), 'sector'],
+        values='Market Cap (Billion Rs)',
+        color='Sentiment Score',
+        hover_data=['Tickers', 'Sentiment Score'],
+        color_continuous_scale=['#FF0000', '#000000', '#00FF00'],
+        color_continuous_midpoint=0,
+    )
+    fig.data[0].texttemplate = '%{label}<br>%{color:.3f}'
+    fig.update_traces(textposition='middle center')
+    fig.update_layout(margin=dict(t=30, l=10, r=10, b=10), font_size=20)
+    return fig
+
+
+# Runs once the overview is drawn. Sector files are content-addressed, so the
+# browser can keep them until the manifest (revalidated on every load) names new ones.
+SECTOR_LOADER_JS = """
+const manifest = fetch('manifest.json', {cache: 'no-cache'}).then(r => r.json());
+document.getElementById('{plot_id}').on('plotly_treemapclick', event => {
+    const sector = event.points[0].label;
+    manifest.then(m => {
+        const entry = m.sectors[sector];
+        if (!entry) return;
+        fetch(entry.file)
+            .then(r => new Response(
+                r.body.pipeThrough(new DecompressionStream('gzip'))
+            ).json())
+            .then(fig => {
+                Plotly.react('sector', fig.data, fig.layout);
+                document.getElementById('sector').scrollIntoView();
+            });
+    });
+    // Keep the overview as it is rather than zooming into the clicked tile
+    return false;
+});
+"""
+
+
+def write_split_dashboard(
+    final_df: pd.DataFrame, directory: str = SPLIT_DASHBOARD_DIR
+) -> dict[str, Any]:
+    """
+    Write the overview page, one gzipped treemap figure per sector and the
+    manifest naming them to `directory`, removing sector files of earlier runs.
+    Returns the manifest.
+    """
+    sector_dir = os.path.join(directory, 'sectors')
+    os.makedirs(sector_dir, exist_ok=True)
+
+    sectors: dict[str, dict[str, Any]] = {}
+    for sector, sector_df in final_df.groupby('sector'):
+        # mtime=0 keeps the bytes, and so the file name, stable for unchanged data
+        data = gzip.compress(build_treemap(sector_df).to_json().encode(), mtime=0)
+        slug = re.sub(r'[^a-z0-9]+', '-', str(sector).lower()).strip('-')
+        name = f'{slug}.{hashlib.sha256(data).hexdigest()[:12]}.json.gz'
+        path = os.path.join(sector_dir, name)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(data)
+        sectors[str(sector)] = {
+            'file': f'sectors/{name}',
+            'tickers': len(sector_df),
+            'bytes': len(data),
+        }
+
+    manifest = {'generated': Instant.now().format_iso(), 'sectors': sectors}
+    overview = build_sector_overview(aggregate_sector_scores(final_df))
+    page = (
+        header_html()
+        + overview.to_html(
+            full_html=False, include_plotlyjs='cdn', post_script=SECTOR_LOADER_JS
+        )
+        + '<div id="sector"></div>'
+    )
+    # Replace the page and manifest whole, so a reader never sees half of either
+    for name, content in (
+        ('index.html', page),
+        ('manifest.json', json.dumps(manifest)),
+    ):
+        path = os.path.join(directory, name)
+        with open(f'{path}.tmp', 'w') as f:
+            f.write(content)
+        os.replace(f'{path}.tmp', path)
+
+    current = {os.path.basename(entry['file']) for entry in sectors.values()}
+    for name in os.listdir(sector_dir):
+        if name not in current:
+            os.remove(os.path.join(sector_dir, name))
+    return manifest
+
+
+def main(split: bool = False, directory: str = SPLIT_DASHBOARD_DIR) -> None:
+    # Read the latest published snapshot, so a running ingest is never waited on
+    db_manager = DatabaseManager(read_only=True)
+
+    # Get data from database
+    with metrics.span('dashboard_query'):
+        article_data = db_manager.get_articles()
+        ticker_metadata = db_manager.get_ticker_metadata()
+
+    final_df = aggregate_ticker_scores(article_data, ticker_metadata)
+
+    if split:
+        print('Writing sector-split dashboard')
+        with metrics.span('dashboard_write', split=True):
+            manifest = write_split_dashboard(final_df, directory)
+        print(f'Wrote {len(manifest["sectors"])} sector files to {directory}')
+    else:
+        # graphing
+        with metrics.span('dashboard_render'):
+            print('Generating Plots')
+            fig = build_treemap(final_df)
+
+        print('Writing HTML')
+        with metrics.span('dashboard_write'):
+            write_dashboard(fig)
+
+    report_paths = metrics.write_report('dashboard')
+    if report_paths:
+        print(f'Wrote run metrics to {", ".join(report_paths)}')
+
+
+if __name__ == '__main__':
+    main(split='--split' in sys.argv[1:])
@@ -8,29 +8,83 @@ This module includes:
   article data and ticker metadata, and retrieving data.
 
 It uses DuckDB for storage and Pandas DataFrames for data manipulation.
+
+DuckDB allows one writer process per database file. So that the dashboard, the
+read API and notebooks never contend with ingest, every write commit ends with
+`publish_snapshot`: a transactionally consistent copy of the database is written to
+`<db file>.snapshots/<ns>.db`, then the `LATEST` pointer is atomically replaced to
+name it. A reader opens the snapshot `LATEST` names at each connection, so it picks
+up a new publish on its next query:
+
+```
+DatabaseManager(read_only=True).get_articles(n=100)
+```
 """
 
 # TODO: evaluate the need to implement duckdb cursor to write to same db with multiple threads
 # TODO: make all sql queries consistent and use parameterized queries to prevent SQL injection
 
+from __future__ import annotations
+
 import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 from types import TracebackType
-from typing import final
+from typing import TYPE_CHECKING, final
 
 import duckdb
-import pandas as pd
 from loguru import logger
 
+import metrics
 from config import (
+    ARTICLES_GENERATION_KEY,
     BASE_DIR,
     CREATE_TABLE,
     DB_NAME,
+    DB_UTILS,
     GET_DATA,
+    INDEX_CONSTITUENTS_URL,
     INSERT_DATA,
+    SENTIMENT_PREFIX,
+    SENTIMENT_PREFIX_BUILT_KEY,
+    SNAPSHOT_KEEP,
+    SNAPSHOT_ON_COMMIT,
+    UNVERSIONED_SCORES,
+    UNVERSIONED_SCORES_KEY,
     build_articles_query,
 )
 
+# pandas is only needed for annotations here; duckdb imports it when fetching frames
+if TYPE_CHECKING:
+    import pandas as pd
+
 DB_PATH = os.path.join(BASE_DIR, 'database')
+# Names the current snapshot in a database's snapshot directory
+LATEST_SNAPSHOT_FILE = 'LATEST'
+
+
+class SnapshotNotFoundError(FileNotFoundError):
+    pass
+
+
+def snapshot_dir(db_path: str) -> str:
+    """Directory the read-only snapshots of the database at `db_path` go to."""
+    return f'{db_path}.snapshots'
+
+
+def latest_snapshot(db_path: str) -> str:
+    """Path of the newest published snapshot of the database at `db_path`."""
+    directory = snapshot_dir(db_path)
+    try:
+        with open(os.path.join(directory, LATEST_SNAPSHOT_FILE)) as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        raise SnapshotNotFoundError(
+            f'No snapshot of {db_path} has been published yet: run the pipeline or '
+            '`uv run src/cli.py snapshot`'
+        ) from None
 
 
 class DatabaseConnection:
@@ -38,14 +92,20 @@ class DatabaseConnection:
     A context manager class for DuckDB database connections.
     """
 
-    def __init__(self, db_path: str) -> None:
+    # DuckDB fails when two threads attach or detach the same file at once, so
+    # opening and closing are serialized; queries on open connections still overlap
+    _attach_lock = threading.Lock()
+
+    def __init__(self, db_path: str, read_only: bool = False) -> None:
         """
         Initialize the database connection context manager.
 
         Args:
             db_path: Path to the DuckDB database file
+            read_only: Open the file read-only, which any number of processes may do
         """
         self.db_path: str = db_path
+        self.read_only = read_only
         self.conn: duckdb.DuckDBPyConnection | None = None
 
     def __enter__(self):
@@ -55,7 +115,8 @@ class DatabaseConnection:
         Returns:
             The DuckDB connection object
         """
-        self.conn = duckdb.connect(self.db_path)
+        with self._attach_lock:
+            self.conn = duckdb.connect(self.db_path, read_only=self.read_only)
         return self.conn
 
     def __exit__(
@@ -68,7 +129,8 @@ class DatabaseConnection:
         Exit the context manager, closing the database connection.
         """
         if self.conn:
-            self.conn.close()
+            with self._attach_lock:
+                self.conn.close()
 
 
 @final
@@ -77,14 +139,36 @@ class DatabaseManager:
     A class to handle database operations.
     """
 
-    def __init__(self, db_path: str = ''):
-        """Initialize the database manager with the database path."""
+    # (db_path, index) -> (file read, constituents); cleared when a CSV is applied
+    _constituents_cache: dict[tuple[str, str], tuple[str, pd.DataFrame]] = {}
+
+    def __init__(
+        self,
+        db_path: str = '',
+        read_only: bool = False,
+        publish_snapshots: bool = SNAPSHOT_ON_COMMIT,
+    ):
+        """
+        Initialize the database manager with the database path.
+
+        Args:
+            db_path: Path to the DuckDB database file (default: the pipeline's)
+            read_only: Reader mode: every connection opens the latest published
+                snapshot of `db_path` read-only instead of the database itself
+            publish_snapshots: Publish a snapshot after each write commit
+        """
         if not db_path:
             # Construct path relative to this file's directory
             self.db_path = os.path.join(DB_PATH, DB_NAME)
         else:
             self.db_path = db_path
-        self._initialize_db()
+        self.read_only = read_only
+        self.publish_snapshots = publish_snapshots and not read_only
+        if read_only:
+            # Fail on construction rather than on the first query
+            latest_snapshot(self.db_path)
+        else:
+            self._initialize_db()
 
     def get_connection(self) -> DatabaseConnection:
         """
@@ -100,8 +184,72 @@ class DatabaseManager:
                 result = conn.execute("SELECT * FROM article_data").fetchdf()
             ```
         """
+        if self.read_only:
+            return DatabaseConnection(latest_snapshot(self.db_path), read_only=True)
         return DatabaseConnection(self.db_path)
 
+    def publish_snapshot(self) -> str:
+        """
+        Write a read-only copy of the database and make it the latest snapshot,
+        removing all but the newest `SNAPSHOT_KEEP`. Returns the snapshot's path.
+        """
+        if self.read_only:
+            raise ValueError('A read-only DatabaseManager cannot publish snapshots')
+        # Readers cannot build the prefix sums themselves
+        if self.get_state(SENTIMENT_PREFIX_BUILT_KEY) is None:
+            self._rebuild_sentiment_prefix()
+
+        directory = snapshot_dir(self.db_path)
+        os.makedirs(directory, exist_ok=True)
+        name = f'{time.time_ns()}.db'
+        path = os.path.join(directory, name)
+        partial = f'{path}.partial'
+        with metrics.span('db_snapshot'), self.get_connection() as conn:
+            database = conn.execute('SELECT current_database()').fetchone()
+            assert database
+            quoted = partial.replace("'", "''")
+            conn.execute(f"ATTACH '{quoted}' AS snapshot")
+            try:
+                # One transaction: the copy is consistent even with other writers
+                conn.execute(f'COPY FROM DATABASE "{database[0]}" TO snapshot')
+            finally:
+                conn.execute('DETACH snapshot')
+        os.replace(partial, path)
+
+        pointer = os.path.join(directory, f'{LATEST_SNAPSHOT_FILE}.partial')
+        with open(pointer, 'w') as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer, os.path.join(directory, LATEST_SNAPSHOT_FILE))
+
+        # Names are creation times, so they sort oldest first
+        snapshots = sorted(f for f in os.listdir(directory) if f.endswith('.db'))
+        for old in snapshots[:-SNAPSHOT_KEEP]:
+            os.remove(os.path.join(directory, old))
+        logger.debug(f'Published database snapshot {path}')
+        return path
+
+    def _committed(self) -> None:
+        """Called after each write commit."""
+        if self.publish_snapshots:
+            self.publish_snapshot()
+
+    @contextmanager
+    def deferred_snapshot(self) -> Iterator[None]:
+        """
+        Publish one snapshot after the commits made inside the block, rather than
+        one per commit. Nothing is published if the block raises.
+        """
+        publish = self.publish_snapshots
+        self.publish_snapshots = False
+        try:
+            yield
+        finally:
+            self.publish_snapshots = publish
+        if publish:
+            self.publish_snapshot()
+
     def _initialize_db(self) -> None:
         """Initialize the database tables if they don't exist."""
         with self.get_connection() as conn:
@@ -111,8 +259,76 @@ class DatabaseManager:
             # Create ticker metadata table with ticker as primary key
             conn.execute(CREATE_TABLE['ticker_meta'])
 
+            # Create index membership table, filled by constituents.refresh_constituents
+            self._migrate_legacy_constituents(conn)
+            conn.execute(CREATE_TABLE['indices_constituents'])
+
+            # Create running sentiment totals per ticker and day, see sentiment_prefix.py
+            conn.execute(CREATE_TABLE['sentiment_prefix'])
+            conn.execute(CREATE_TABLE['sentiment_prefix_version'])
+
+            # Create key/value table for pipeline bookkeeping (watermarks etc.)
+            conn.execute(CREATE_TABLE['pipeline_state'])
+
+            # Create streaming shift detector state and its events
+            conn.execute(CREATE_TABLE['shift_state'])
+            conn.execute(CREATE_TABLE['sentiment_shifts'])
+
+            # Create per-model-version scores, seeded once with the scores stored
+            # before it existed
+            conn.execute(CREATE_TABLE['sentiment_scores'])
+            copied = conn.execute(
+                GET_DATA['pipeline_state'], [UNVERSIONED_SCORES_KEY]
+            ).fetchone()
+            if copied is None:
+                conn.execute('BEGIN TRANSACTION')
+                conn.execute(INSERT_DATA['unversioned_scores'], [UNVERSIONED_SCORES])
+                conn.execute(
+                    INSERT_DATA['pipeline_state'], [UNVERSIONED_SCORES_KEY, 'true']
+                )
+                conn.execute('COMMIT')
+
+    @staticmethod
+    def _migrate_legacy_constituents(conn: duckdb.DuckDBPyConnection) -> None:
+        """
+        Move the memberships of an `indices_constituents` table in the older layout,
+        one row per ticker with a BOOLEAN column per index, into one row per
+        (index_name, ticker). `CREATE TABLE IF NOT EXISTS` would keep the old table,
+        which the constituents queries cannot read.
+        """
+        # Column names match case-insensitively in DuckDB
+        columns = {
+            row[0].lower(): row[0]
+            for row in conn.execute(
+                DB_UTILS['table_columns'], ['indices_constituents']
+            ).fetchall()
+        }
+        if not columns or 'index_name' in columns:
+            return
+        isin = f'"{columns["isin_code"]}"' if 'isin_code' in columns else 'NULL'
+        indices = [index for index in INDEX_CONSTITUENTS_URL if index in columns]
+        conn.execute('BEGIN TRANSACTION')
+        conn.execute(DB_UTILS['set_aside_legacy_constituents'])
+        conn.execute(CREATE_TABLE['indices_constituents'])
+        for index in indices:
+            conn.execute(
+                DB_UTILS['copy_legacy_constituents'].format(
+                    index=columns[index], isin=isin
+                ),
+                [index],
+            )
+        conn.execute(DB_UTILS['drop_legacy_constituents'])
+        conn.execute('COMMIT')
+        logger.info(
+            f'Migrated index constituents of {", ".join(indices) or "no index"} '
+            'to one row per index and ticker'
+        )
+
     def insert_articles(
-        self, articles_df: pd.DataFrame, has_sentiment: bool = False
+        self,
+        articles_df: pd.DataFrame,
+        has_sentiment: bool = False,
+        model_version: str | None = None,
     ) -> None:
         """
         Insert articles into the database with conflict resolution to avoid duplicates.
@@ -120,17 +336,88 @@ class DatabaseManager:
         Args:
             articles_df: DataFrame with article data
             has_sentiment: Whether the DataFrame includes sentiment columns
+            model_version: Version of the model that produced the scores, recorded
+                with them in `sentiment_scores` (default: `UNVERSIONED_SCORES`)
         """
         logger.info(
             f'Inserting {articles_df.shape[0]} articles {"with" if has_sentiment else "without"} sentiment into the database'
         )
-        with self.get_connection() as conn:
+        with (
+            metrics.span('db_insert', has_sentiment=has_sentiment),
+            self.get_connection() as conn,
+        ):
+            conn.execute('BEGIN TRANSACTION')
+            # Deltas are staged first, while the rows being replaced are still there
             if has_sentiment:
+                conn.execute(SENTIMENT_PREFIX['stage_deltas_with_sentiment'])
+                self._apply_sentiment_deltas(conn)
                 conn.execute(INSERT_DATA['article_data_with_sentiment'])
+                conn.execute(
+                    INSERT_DATA['sentiment_scores'],
+                    [model_version or UNVERSIONED_SCORES],
+                )
             else:
+                conn.execute(SENTIMENT_PREFIX['stage_deltas_without_sentiment'])
+                self._apply_sentiment_deltas(conn)
                 conn.execute(INSERT_DATA['article_data_without_sentiment'])
+            # Lets readers in other processes (the read API) see that data changed
+            conn.execute(
+                INSERT_DATA['pipeline_state'],
+                [ARTICLES_GENERATION_KEY, str(time.time_ns())],
+            )
+            conn.execute('COMMIT')
+        self._committed()
+        metrics.incr('articles_inserted', articles_df.shape[0])
         logger.success(f'Inserted {articles_df.shape[0]} articles into the database')
 
+    def insert_scores(self, articles_df: pd.DataFrame, model_version: str) -> None:
+        """
+        Record scores of `model_version` in `sentiment_scores` only, leaving the
+        current scores in `article_data` as they are.
+
+        Args:
+            articles_df: DataFrame with ticker, headline and sentiment columns
+            model_version: Version of the model that produced the scores
+        """
+        with self.get_connection() as conn:
+            conn.execute(INSERT_DATA['sentiment_scores'], [model_version])
+        self._committed()
+
+    @staticmethod
+    def _apply_sentiment_deltas(conn: duckdb.DuckDBPyConnection) -> None:
+        """Fold the staged `sentiment_deltas` into `sentiment_prefix`."""
+        staged = conn.execute(SENTIMENT_PREFIX['count_deltas']).fetchone()
+        if not staged or not staged[0]:
+            return
+        version_row = conn.execute(SENTIMENT_PREFIX['next_version']).fetchone()
+        version = version_row[0] if version_row else 0
+        conn.execute(SENTIMENT_PREFIX['insert_days'], [version])
+        conn.execute(SENTIMENT_PREFIX['apply_deltas'], [version])
+
+    def rebuild_sentiment_prefix(self) -> None:
+        """
+        Recompute `sentiment_prefix` from `article_data`. Needed once for a database
+        scored before the table existed, and after rows are deleted outside
+        `insert_articles`.
+        """
+        self._rebuild_sentiment_prefix()
+        self._committed()
+
+    def _rebuild_sentiment_prefix(self) -> None:
+        with self.get_connection() as conn:
+            conn.execute('BEGIN TRANSACTION')
+            version_row = conn.execute(SENTIMENT_PREFIX['next_version']).fetchone()
+            version = version_row[0] if version_row else 0
+            conn.execute(SENTIMENT_PREFIX['clear'])
+            conn.execute(SENTIMENT_PREFIX['rebuild'], [version])
+            # Readers holding a copy reload it when this changes
+            conn.execute(
+                INSERT_DATA['pipeline_state'],
+                [SENTIMENT_PREFIX_BUILT_KEY, str(version)],
+            )
+            conn.execute('COMMIT')
+        logger.info('Rebuilt sentiment prefix sums from article_data')
+
     def insert_ticker_metadata(
         self, ticker_meta: list[list[str | float | None]]
     ) -> None:
@@ -145,6 +432,7 @@ class DatabaseManager:
             # Using UPSERT pattern for each row
             for meta in ticker_meta:
                 conn.execute(INSERT_DATA['ticker_meta'], meta)
+        self._committed()
 
     def get_articles(
         self,
@@ -152,6 +440,8 @@ class DatabaseManager:
         latest: bool = True,
         has_sentiment: bool = True,
         after_date: str | None = None,
+        version: str | None = None,
+        fallback: bool = True,
     ) -> pd.DataFrame:
         """
         Retrieve articles from the database with filtering options.
@@ -161,6 +451,10 @@ class DatabaseManager:
             latest: If True, returns the n latest articles; if False, returns the n oldest
             has_sentiment: If False, returns only articles without sentiment scores
             after_date: Filter for articles after this date in 'yyyy-MM-dd' format (None for no date filtering)
+            version: Model version whose scores to return, with a `model_version`
+                column (None for the current scores in `article_data`)
+            fallback: With a `version`, score the articles it has not scored with
+                the latest version that has; if False they have no scores
 
         Returns:
             DataFrame containing the filtered articles
@@ -171,21 +465,120 @@ class DatabaseManager:
                 after_date=after_date,
                 latest=latest,
                 limit=n,
+                version=version,
+                fallback=fallback,
             )
             return conn.execute(query, params).fetchdf()
 
+    def get_articles_missing_version(self, model_version: str, n: int) -> pd.DataFrame:
+        """Up to `n` articles `model_version` has not scored, in rescoring order."""
+        with self.get_connection() as conn:
+            return conn.execute(
+                GET_DATA['articles_missing_version'], [model_version, n]
+            ).fetchdf()
+
+    def get_shift_state(self) -> pd.DataFrame:
+        """Stored `ShiftDetector` state, one row per ticker."""
+        with self.get_connection() as conn:
+            return conn.execute(GET_DATA['shift_state']).fetchdf()
+
+    def save_shift_state(self, state_df: pd.DataFrame, shifts_df: pd.DataFrame) -> None:
+        """Upsert detector state rows and append the shifts they detected."""
+        with self.get_connection() as conn:
+            conn.execute('BEGIN TRANSACTION')
+            conn.execute(INSERT_DATA['shift_state'])
+            if not shifts_df.empty:
+                conn.execute(INSERT_DATA['sentiment_shifts'])
+            conn.execute('COMMIT')
+        self._committed()
+
+    def get_sentiment_shifts(self, n: int = 100) -> pd.DataFrame:
+        """The `n` most recent sentiment shifts."""
+        with self.get_connection() as conn:
+            return conn.execute(GET_DATA['sentiment_shifts'], [n]).fetchdf()
+
+    def get_score_versions(self) -> pd.DataFrame:
+        """Model versions in `sentiment_scores`, most recently scored first."""
+        with self.get_connection() as conn:
+            return conn.execute(GET_DATA['score_versions']).fetchdf()
+
     def get_ticker_metadata(self) -> pd.DataFrame:
         """Retrieve all ticker metadata from the database."""
         with self.get_connection() as conn:
             return conn.execute(GET_DATA['ticker_meta']).fetchdf()
 
+    def get_existing_headlines(self, ticker: str, headlines: list[str]) -> set[str]:
+        """Return the subset of `headlines` already stored for `ticker`."""
+        if not headlines:
+            return set()
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                GET_DATA['existing_headlines'], [ticker, headlines]
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def get_state(self, key: str) -> str | None:
+        """Read a value from the pipeline_state table, None if the key is unset."""
+        with self.get_connection() as conn:
+            row = conn.execute(GET_DATA['pipeline_state'], [key]).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str) -> None:
+        """Insert or replace a value in the pipeline_state table."""
+        with self.get_connection() as conn:
+            conn.execute(INSERT_DATA['pipeline_state'], [key, value])
+
     def get_index_constituents(self, index: str = 'nifty_50') -> pd.DataFrame:
-        """get index constituents from the database"""
-        # TODO: validate index input against known indices
+        """
+        Get index constituents from the database. Results are cached per database
+        and index until `apply_index_constituents` changes them.
+        """
+        if index not in INDEX_CONSTITUENTS_URL:
+            raise ValueError(
+                f'Unknown index {index!r}, expected one of {list(INDEX_CONSTITUENTS_URL)}'
+            )
+        key = (self.db_path, index)
+        # In reader mode a newly published snapshot may hold new constituents
+        source = latest_snapshot(self.db_path) if self.read_only else self.db_path
+        cached = self._constituents_cache.get(key)
+        if cached is None or cached[0] != source:
+            with self.get_connection() as conn:
+                frame = conn.execute(GET_DATA['index_constituents'], [index]).fetchdf()
+            cached = source, frame
+            self._constituents_cache[key] = cached
+        return cached[1].copy()
+
+    def apply_index_constituents(
+        self, index: str, csv_path: str
+    ) -> tuple[int, int, int]:
+        """
+        Replace the stored constituents of `index` with an NSE constituents CSV,
+        writing only the rows that changed. An empty CSV is rejected rather than
+        treated as every ticker leaving the index.
+
+        Returns:
+            (added, removed, changed) row counts
+        """
         with self.get_connection() as conn:
-            return conn.execute(
-                GET_DATA['index_constituents'].format(index)  # nosec B608
-            ).fetchdf()
+            conn.execute('BEGIN TRANSACTION')
+            conn.execute(DB_UTILS['stage_constituents'], [index, csv_path])
+            snapshot_rows = conn.execute(
+                'SELECT count(*) FROM constituents_snapshot'
+            ).fetchone()
+            if not snapshot_rows or not snapshot_rows[0]:
+                conn.execute('ROLLBACK')
+                raise ValueError(f'No constituents found in {csv_path} for {index}')
+            diff = conn.execute(DB_UTILS['constituents_diff'], [index]).fetchone()
+            removed = conn.execute(
+                DB_UTILS['delete_removed_constituents'], [index]
+            ).fetchone()
+            conn.execute(DB_UTILS['upsert_changed_constituents'], [index])
+            conn.execute('COMMIT')
+
+        self._constituents_cache.pop((self.db_path, index), None)
+        self._committed()
+        added, changed = diff if diff else (0, 0)
+        return added, removed[0] if removed else 0, changed
 
 
 if __name__ == '__main__':
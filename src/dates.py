@@ -0,0 +1,177 @@
+"""
+Turns the dates news sources print ('2 hours ago', 'yesterday', '14 Mar, 10:30 AM')
+into `'%Y-%m-%d %H:%M:%S'` strings against one reference instant per scraper run.
+
+A `DateNormalizer` fixes `reference` when it is created, so every article of a run
+is dated against the same "now" rather than whenever its page happened to be parsed,
+and memoizes each (string, format) it has seen: a run sees the same few relative
+strings thousands of times. `parse_column` normalizes a whole column at once,
+parsing only its distinct new values, and those with a format in one vectorized
+`pd.to_datetime` call.
+
+Formats without a year get the year that puts the date at or before the reference
+(plus `DATE_FUTURE_SLACK_HOURS`), so a run on 2 January dates '30 Dec' to the
+previous year, and '29 Feb' resolves to the most recent leap year.
+
+```
+dates = DateNormalizer()
+dates.parse('3 hours ago')
+dates.parse('14 Mar, 10:30 AM', '%d %b, %I:%M %p')
+dates.parse_column(batch.date_posted)
+```
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+from dateutil.relativedelta import relativedelta
+from loguru import logger
+
+from config import DATE_FUTURE_SLACK_HOURS
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Relative units, singular and abbreviated, to one step back in time
+UNITS: dict[str, timedelta | relativedelta] = {
+    'second': timedelta(seconds=1),
+    'sec': timedelta(seconds=1),
+    's': timedelta(seconds=1),
+    'minute': timedelta(minutes=1),
+    'min': timedelta(minutes=1),
+    'm': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'hr': timedelta(hours=1),
+    'h': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'd': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'wk': timedelta(weeks=1),
+    'w': timedelta(weeks=1),
+    'month': relativedelta(months=1),
+    'mo': relativedelta(months=1),
+    'year': relativedelta(years=1),
+    'yr': relativedelta(years=1),
+    'y': relativedelta(years=1),
+}
+# Relative dates without a count
+NAMED: dict[str, timedelta] = {
+    'now': timedelta(0),
+    'just now': timedelta(0),
+    'today': timedelta(0),
+    'yesterday': timedelta(days=1),
+}
+# '3 hours ago', 'an hour ago', '2h ago', 'last week'
+RELATIVE = re.compile(r'(\d+|an?|last)\s*([a-z]+?)s?(?:\s+ago)?')
+
+
+class DateNormalizer:
+    def __init__(self, reference: datetime | None = None) -> None:
+        self.reference = reference or datetime.now()
+        self._latest = self.reference + timedelta(hours=DATE_FUTURE_SLACK_HOURS)
+        # (date string, format) -> formatted date, '' when it could not be parsed
+        self._memo: dict[tuple[str, str | None], str] = {}
+
+    def parse(self, date_string: str, format: str | None = None) -> str:
+        """
+        Format `date_string`, relative to `reference` unless a strptime `format` is
+        given. Returns '' for strings that cannot be parsed.
+        """
+        key = (date_string, format)
+        parsed = self._memo.get(key)
+        if parsed is None:
+            parsed = self._memo[key] = (
+                self._absolute(date_string, format)
+                if format
+                else self._relative(date_string)
+            )
+        return parsed
+
+    def parse_column(
+        self, date_strings: Sequence[str | None], format: str | None = None
+    ) -> list[str]:
+        """`parse` every string of a column; None and unparseable strings give ''."""
+        memo = self._memo
+        misses = [
+            value
+            for value in dict.fromkeys(date_strings)
+            if value is not None and (value, format) not in memo
+        ]
+        if format and len(misses) > 1:
+            memo.update(
+                zip(
+                    ((value, format) for value in misses),
+                    self._absolute_many(misses, format),
+                    strict=True,
+                )
+            )
+        else:
+            for value in misses:
+                self.parse(value, format)
+        return [
+            '' if value is None else memo[(value, format)] for value in date_strings
+        ]
+
+    def _relative(self, date_string: str) -> str:
+        text = ' '.join(date_string.lower().split())
+        step = NAMED.get(text)
+        if step is not None:
+            return (self.reference - step).strftime(DATE_FORMAT)
+        match = RELATIVE.fullmatch(text)
+        unit = UNITS.get(match.group(2)) if match else None
+        if match is None or unit is None:
+            logger.warning(f'Unknown date format: {date_string}')
+            return ''
+        count = match.group(1)
+        return (
+            self.reference - unit * (int(count) if count.isdigit() else 1)
+        ).strftime(DATE_FORMAT)
+
+    def _absolute(self, date_string: str, format: str) -> str:
+        try:
+            if '%Y' in format or '%y' in format:
+                return datetime.strptime(date_string, format).strftime(DATE_FORMAT)
+            # Check the format against a leap year, since strptime's default 1900
+            # rejects '29 Feb'
+            datetime.strptime(f'{date_string} 2000', f'{format} %Y')
+        except ValueError as e:
+            logger.warning(f"Error parsing date '{date_string}': {e}")
+            return ''
+        for year in _candidate_years(self._latest):
+            try:
+                parsed = datetime.strptime(f'{date_string} {year}', f'{format} %Y')
+            except ValueError:
+                continue  # 29 Feb outside a leap year
+            if parsed <= self._latest:
+                return parsed.strftime(DATE_FORMAT)
+        return ''
+
+    def _absolute_many(self, date_strings: list[str], format: str) -> list[str]:
+        import pandas as pd
+
+        if '%Y' in format or '%y' in format:
+            parsed = pd.to_datetime(date_strings, format=format, errors='coerce')
+        else:
+            values = pd.Series(date_strings)
+            parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+            # Try the latest year first, then step back for dates still unplaced
+            for year in _candidate_years(self._latest):
+                todo = parsed.isna()
+                if not todo.any():
+                    break
+                attempt = pd.to_datetime(
+                    values[todo] + f' {year}', format=f'{format} %Y', errors='coerce'
+                )
+                parsed[todo] = attempt.where(attempt <= self._latest)
+        formatted = pd.Series(parsed).dt.strftime(DATE_FORMAT).fillna('').tolist()
+        for value, result in zip(date_strings, formatted, strict=True):
+            if not result:
+                logger.warning(f"Error parsing date '{value}'")
+        return formatted
+
+
+def _candidate_years(latest: datetime) -> range:
+    """Years to try for a date without one, latest first; a leap year is among them."""
+    return range(latest.year, latest.year - 5, -1)
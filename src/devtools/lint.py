@@ -5,7 +5,7 @@ from rich import get_console, reconfigure
 from rich import print as rprint
 
 # Update as needed.
-SRC_PATHS = ['tests', 'src']
+SRC_PATHS = ['tests', 'src', 'benchmarks']
 DOC_PATHS = ['docs', 'readme.md']
 
 
@@ -0,0 +1,210 @@
+"""
+Finance-lexicon pre-classifier that lets confident headlines skip finBERT.
+
+A large share of scraped headlines are boilerplate ('TCS stock price today live
+updates') or carry plain polar wording ('shares surge 8% after record profit').
+`LexiconScorer` scores a whole column of headlines with pandas' vectorized string
+methods: it counts positive and negative lexicon words and matches neutral
+boilerplate patterns, then turns the counts into a label and a confidence:
+
+- boilerplate with no polar words: Neutral with `NEUTRAL_CONFIDENCE`
+- otherwise `|pos - neg| / (pos + neg + 1)` for the dominant polarity, so one
+  word gives 0.5, two 0.67, three 0.75, and mixed wording gives less
+- no lexicon hits at all: confidence 0
+
+The label gets probability `1/3 + 2/3 * confidence` and the other two share the
+rest, so confidence 0 is uniform and 1 is certain.
+
+`CascadeScorer` wraps a finBERT scorer. Headlines whose lexicon confidence reaches
+`threshold` keep the lexicon probabilities, and only the rest go through the model.
+`cascade_report` runs both on a sample and reports, per threshold, the share of
+inference avoided and how often the lexicon's label agrees with the model's.
+
+```
+scorer = CascadeScorer(load_scorer(), threshold=CASCADE_THRESHOLD)
+probs = scorer.predict_proba(headlines)
+cascade_report(sample_headlines, load_scorer(), thresholds=[0.5, 0.67, 0.9])
+```
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+import metrics
+from config import CASCADE_THRESHOLD, UNVERSIONED_SCORES
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+POSITIVE_WORDS = (
+    'gain', 'gains', 'rise', 'rises', 'rising', 'rose', 'jump', 'jumps', 'jumped',
+    'surge', 'surges', 'surged', 'soar', 'soars', 'soared', 'rally', 'rallies',
+    'climbs', 'climbed', 'higher', 'record', 'beat', 'beats', 'upgrade', 'upgrades',
+    'upgraded', 'outperform', 'bullish', 'growth', 'dividend', 'bonus', 'wins',
+    'bags', 'approves', 'expands', 'strong', 'boost', 'boosts', 'profit', 'profits',
+    'upside', 'buy', 'raises', 'robust', 'positive', 'recovery',
+)  # fmt: skip
+NEGATIVE_WORDS = (
+    'fall', 'falls', 'falling', 'fell', 'drop', 'drops', 'dropped', 'decline',
+    'declines', 'declined', 'slump', 'slumps', 'plunge', 'plunges', 'plunged',
+    'tumble', 'tumbles', 'crash', 'crashes', 'slides', 'slipped', 'lower', 'loss',
+    'losses', 'miss', 'misses', 'missed', 'downgrade', 'downgrades', 'downgraded',
+    'underperform', 'bearish', 'weak', 'cuts', 'probe', 'penalty', 'fraud',
+    'default', 'resigns', 'lawsuit', 'downside', 'sell', 'negative', 'warning',
+)  # fmt: skip
+# Boilerplate that carries no sentiment of its own
+NEUTRAL_PATTERNS = (
+    r'price today',
+    r'live updates?',
+    r'live blog',
+    r'share price live',
+    r'stocks? to watch',
+    r'stocks? in (?:the )?news',
+    r'things to know',
+    r'what to expect',
+    r'preview',
+)
+NEUTRAL_CONFIDENCE = 0.95
+
+# Label order of the probabilities LexiconScorer returns
+LABELS = ('Positive', 'Negative', 'Neutral')
+
+
+def _words(words: Sequence[str]) -> str:
+    return r'\b(?:' + '|'.join(map(re.escape, words)) + r')\b'
+
+
+class LexiconScorer:
+    """Vectorized lexicon probabilities and confidences for a column of headlines."""
+
+    labels = LABELS
+
+    def __init__(
+        self,
+        positive: Sequence[str] = POSITIVE_WORDS,
+        negative: Sequence[str] = NEGATIVE_WORDS,
+        neutral: Sequence[str] = NEUTRAL_PATTERNS,
+    ) -> None:
+        self._positive = _words(positive)
+        self._negative = _words(negative)
+        self._neutral = r'\b(?:' + '|'.join(neutral) + r')\b'
+
+    def score(self, headlines: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Probabilities of shape `(len(headlines), 3)` in `LABELS` order and the
+        confidence of each row's label.
+        """
+        import pandas as pd
+
+        text = pd.Series(list(headlines), dtype=object).str.lower()
+        pos = text.str.count(self._positive).to_numpy()
+        neg = text.str.count(self._negative).to_numpy()
+        boilerplate = text.str.contains(self._neutral).to_numpy()
+
+        polar = pos + neg
+        confidence = np.abs(pos - neg) / (polar + 1)
+        label = np.where(pos > neg, 0, 1)
+        neutral = (polar == 0) & boilerplate
+        confidence[neutral] = NEUTRAL_CONFIDENCE
+        label[neutral] = 2
+
+        # From uniform at confidence 0 to certain at 1
+        top = 1 / 3 + 2 / 3 * confidence
+        probs = np.repeat(((1 - top) / 2)[:, None], 3, axis=1)
+        probs[np.arange(len(label)), label] = top
+        return probs, confidence
+
+
+class CascadeScorer:
+    """
+    finBERT behind the lexicon: rows whose lexicon confidence is at least
+    `threshold` keep the lexicon probabilities, the rest are scored by `model`.
+    A threshold above 1 sends every headline to the model.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        threshold: float = CASCADE_THRESHOLD,
+        lexicon: LexiconScorer | None = None,
+    ) -> None:
+        self.model = model
+        self.threshold = threshold
+        self.lexicon = lexicon or LexiconScorer()
+        self.labels: list[str] = list(model.labels)
+        # Lexicon scores differ from the model's, so they get their own version
+        model_version = getattr(model, 'version', UNVERSIONED_SCORES)
+        self.version: str = (
+            f'{model_version}+lexicon@{threshold:g}'
+            if threshold <= 1
+            else model_version
+        )
+        # Lexicon columns in the model's label order
+        self._columns = [LABELS.index(label) for label in self.labels]
+
+    def predict_proba(
+        self, headlines: Sequence[str], batch_size: int | None = None
+    ) -> np.ndarray:
+        lexicon_probs, confidence = self.lexicon.score(headlines)
+        probs = lexicon_probs[:, self._columns]
+        ambiguous = np.flatnonzero(confidence < self.threshold)
+        metrics.incr('cascade_lexicon_scored', len(headlines) - len(ambiguous))
+        metrics.incr('cascade_model_scored', len(ambiguous))
+        if len(ambiguous):
+            probs[ambiguous] = self.model.predict_proba(
+                [headlines[i] for i in ambiguous], batch_size=batch_size
+            )
+        return probs
+
+    def __call__(
+        self, headlines: Sequence[str], batch_size: int | None = None
+    ) -> list[list[dict[str, Any]]]:
+        """Pipeline-compatible output: label/score dicts for every label."""
+        from sentiment import label_dicts
+
+        return label_dicts(self.predict_proba(headlines, batch_size), self.labels)
+
+
+def cascade_report(
+    headlines: Sequence[str],
+    model: Any,
+    thresholds: Sequence[float],
+    lexicon: LexiconScorer | None = None,
+) -> pd.DataFrame:
+    """
+    Score `headlines` with both the lexicon and `model` and report, per threshold,
+    the share of headlines the lexicon would resolve (inference avoided) and how
+    many of those get the same top label from the model (agreement).
+    """
+    import pandas as pd
+
+    lexicon = lexicon or LexiconScorer()
+    lexicon_probs, confidence = lexicon.score(headlines)
+    model_probs = model.predict_proba(list(headlines))
+    lexicon_labels = np.array(LABELS)[lexicon_probs.argmax(axis=1)]
+    model_labels = np.array(list(model.labels))[model_probs.argmax(axis=1)]
+    agrees = lexicon_labels == model_labels
+
+    def share(rows: np.ndarray) -> float | None:
+        return float(agrees[rows].mean()) if rows.any() else None
+
+    neutral = lexicon_labels == 'Neutral'
+    rows = []
+    for threshold in thresholds:
+        resolved = confidence >= threshold
+        rows.append(
+            {
+                'threshold': threshold,
+                'headlines': len(headlines),
+                'avoided': float(resolved.mean()) if len(headlines) else 0.0,
+                'agreement': share(resolved),
+                'neutral_agreement': share(resolved & neutral),
+                'polar_agreement': share(resolved & ~neutral),
+            }
+        )
+    return pd.DataFrame(rows)
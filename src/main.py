@@ -1,117 +1,183 @@
 """
 This script fetches stock news articles, adds them to a database and computes sentiment scores for articles that don't have them yet.
 """
-# Note: During multiprocessing, individual processes do not share memory. Hence, data is returned from each process and aggregated and not stored in a class variable directly.
 
-import multiprocessing as mp
+# pandas, tqdm and news_fetcher (bs4) are imported inside the stage functions so that
+# CLI commands which only score or deduplicate do not pay for the fetch stack.
+from __future__ import annotations
+
+import argparse
+import os
 import sys
+from typing import TYPE_CHECKING, Any
 
-import pandas as pd
 from loguru import logger
-from tqdm import tqdm
 
+import metrics
+import profiling
+import source_health
 import utils as utils
+from articles import ArticleBatch
+from config import LOG_FORMAT, PROFILE_ENV_VAR, UNVERSIONED_SCORES
+from constituents import universe_tickers
 from database import DatabaseManager
-from news_fetcher import TickerNewsObject
+from run_journal import RunJournal, default_run_id
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Remove the default logger to prevent duplicate log entries.
 logger.remove()
 # Define the logging format.
-fmt: str = '<white>{time:HH:mm:ss!UTC}({elapsed})</white> - <level> {level} - {message} </level>'
+fmt: str = LOG_FORMAT
 # Add a new logger configuration.
 logger.add(sys.stderr, colorize=True, level='INFO', format=fmt, enqueue=True)
 
 
-# Define the worker function outside the class for multiprocessing
-def worker_collect_news(ticker_obj: TickerNewsObject) -> list[dict[str, str]]:
-    """Collects news for a ticker object."""
-    try:
-        news: list[dict[str, str]] = ticker_obj.collect_news()
-        return news
-    except Exception as e:
-        logger.error(f'Error collecting news for {ticker_obj.ticker}: {e}')
-        return []  # Return empty list on error
-
-
-def get_news(universe: str, multiprocess: bool) -> None:
+def get_news(universe: str, concurrent: bool = True, run_id: str | None = None) -> None:
     """
     Collect the news articles for a given universe of tickers and store them in the database.
+
+    Each ticker is checkpointed to the run's journal once fetched, see `run_journal`.
+    A rerun with the same `run_id` (default: the universe and UTC date) skips the
+    tickers an interrupted run completed and inserts their journaled articles.
     """
+    from tqdm import tqdm
+
+    from news_fetcher import NEWS_SOURCES, TickerNewsObject, fetch_universe
+
     dbm = DatabaseManager()
 
     # Fetch the tickers
-    tickers_df: pd.Series[str] = dbm.get_index_constituents(universe).loc[:, 'ticker']
-    ticker_objs: list[TickerNewsObject] = [
-        TickerNewsObject(ticker) for ticker in tickers_df
-    ]
-
-    # Fetch and process news data for all tickers.
-    logger.info(f'Start Processing {len(ticker_objs)} Tickers for {universe}')
-
-    all_articles: list[dict[str, str]] = []
-
-    if not multiprocess:
-        # Process tickers sequentially.
-        logger.info('Processing tickers sequentially.')
-        for ticker_obj in tqdm(ticker_objs, desc='Processing Tickers'):
-            try:
-                news: list[dict[str, str]] = ticker_obj.collect_news()
-                all_articles.extend(news)
-            except Exception as e:
-                logger.error(
-                    f'Error collecting news for {ticker_obj.ticker} (sequential): {e}'
-                )
-    else:
-        # Process tickers in parallel using multiprocessing.
-        logger.info(f'Processing tickers in parallel using {mp.cpu_count()} processes.')
-        with mp.Pool(processes=mp.cpu_count()) as pool:
-            # pool.map applies worker_collect_news to each item in ticker_objs
-            # The result is a list of lists (one list of articles per ticker)
-            results_list_of_lists: list[list[dict[str, str]]] = list(
-                tqdm(
-                    pool.map(
-                        worker_collect_news, ticker_objs
-                    ),  # Pass the worker function and the objects
-                    total=len(ticker_objs),  # Use the correct list length
-                    desc='Processing Tickers (Parallel)',
-                )
+    tickers: list[str] = universe_tickers(universe, dbm)
+
+    journal = RunJournal(run_id or default_run_id(universe))
+    with journal:
+        # Articles of tickers completed by an earlier attempt at this run
+        all_articles = journal.staged()
+        pending = [ticker for ticker in tickers if ticker not in journal.completed]
+
+        # Fetch and process news data for all tickers.
+        logger.info(
+            f'Start Processing {len(pending)} Tickers for {universe} '
+            f'({len(tickers) - len(pending)} already fetched in run {journal.run_id})'
+        )
+
+        if not concurrent:
+            # Process tickers sequentially.
+            logger.info('Processing tickers sequentially.')
+            for ticker in tqdm(pending, desc='Processing Tickers'):
+                try:
+                    ticker_news = TickerNewsObject(ticker)
+                    news: ArticleBatch = ticker_news.collect_news()
+                    all_articles.extend(news)
+                    if not ticker_news.failed_sources:
+                        journal.record(ticker, news)
+                except Exception as e:
+                    logger.error(
+                        f'Error collecting news for {ticker} (sequential): {e}'
+                    )
+        else:
+            # One work queue per source host, each with its own concurrency limit
+            logger.info(
+                f'Processing tickers on per-source queues for {len(NEWS_SOURCES)} sources.'
             )
-        # Flatten the list of lists into a single list of articles
-        all_articles: list[dict[str, str]] = [
-            article for sublist in results_list_of_lists for article in sublist
-        ]
+            with tqdm(
+                total=len(pending) * len(NEWS_SOURCES),
+                desc='Processing Tickers (Parallel)',
+            ) as progress:
+                batches = fetch_universe(
+                    pending, on_fetched=progress.update, on_ticker=journal.record
+                )
+            all_articles.extend(ArticleBatch.concat(batches))
+
+        if _store_articles(dbm, all_articles, len(tickers)):
+            journal.discard()
+
 
+def _store_articles(
+    dbm: DatabaseManager, all_articles: ArticleBatch, n_tickers: int
+) -> bool:
+    """Insert a run's articles; False if the insert failed."""
     # --- Aggregation and Processing ---
+    source_health.log_summary()
     logger.success(
-        f'Collected {len(all_articles)} articles in total for {len(ticker_objs)} tickers'
+        f'Collected {len(all_articles)} articles in total for {n_tickers} tickers'
     )
     # Check if any articles were collected
     if not all_articles:
         logger.warning(
             'No news articles found for any ticker after processing. Exiting!'
         )
-        return
+        return True
 
-    # Create DataFrame directly from the flattened list
-    articles_df = pd.DataFrame(all_articles)
-    logger.info(
-        f'Fetched {articles_df.shape[0]} articles from {len(ticker_objs)} tickers'
-    )
+    # Build the DataFrame straight from the batch columns
+    articles_df: pd.DataFrame = all_articles.to_dataframe()
+    logger.info(f'Fetched {articles_df.shape[0]} articles from {n_tickers} tickers')
 
     # Drop rows where essential info might be missing (e.g., headline)
     articles_df.dropna(subset=['headline'], inplace=True)
 
+    # The same headline is often returned by more than one source. Keep the first copy
+    # so the batch upsert never touches the same (ticker, headline) key twice.
+    batch_size: int = articles_df.shape[0]
+    articles_df.drop_duplicates(
+        subset=['ticker', 'headline'], keep='first', inplace=True
+    )
+    if articles_df.shape[0] < batch_size:
+        logger.info(
+            f'Dropped {batch_size - articles_df.shape[0]} duplicate articles from the batch'
+        )
+
     try:
         dbm.insert_articles(articles_df, has_sentiment=False)
     except Exception as e:
         logger.error(f'Error inserting articles into database: {e}')
+        return False
+    return True
 
 
-def compute_and_update_sentiment(n: int = 200):
+def update_ticker_metadata(universe: str) -> None:
+    """
+    Fetch sector, industry and market cap from NSE for every constituent of
+    `universe` and upsert them into `ticker_meta`.
+    """
+    from tqdm import tqdm
+
+    dbm = DatabaseManager()
+    tickers: list[str] = universe_tickers(universe, dbm)
+    logger.info(f'Fetching metadata for {len(tickers)} tickers in {universe}')
+
+    ticker_meta: list[list[str | float | None]] = []
+    for ticker in tqdm(tickers, desc='Fetching Metadata'):
+        try:
+            meta = utils.fetch_metadata(ticker)
+        except Exception as e:
+            logger.error(f'Error fetching metadata for {ticker}: {e}')
+            continue
+        if meta is not None:
+            ticker_meta.append(meta)
+
+    if not ticker_meta:
+        logger.warning(f'No metadata fetched for {universe}')
+        return
+    dbm.insert_ticker_metadata(ticker_meta)
+    logger.success(f'Updated metadata for {len(ticker_meta)} tickers')
+
+
+def compute_and_update_sentiment(n: int = 200, nlp: Any = None):
     """
     Fetch the latest N articles without sentiment scores from the database and compute their sentiment scores.
     Then, update the database with the computed sentiment scores.
+
+    Long-running callers pass a pipeline from `utils.load_sentiment_pipeline` as `nlp`
+    so the model is loaded once rather than on every call.
     """
+    if nlp is None:
+        from model_bundle import check_bundle
+
+        # Fail before querying anything if the model would not load
+        check_bundle()
     # get 200 latest articles without sentiment score from the database
     dbm: DatabaseManager = DatabaseManager()
     articles_df: pd.DataFrame = dbm.get_articles(n=n, has_sentiment=False, latest=True)
@@ -122,25 +188,76 @@ def compute_and_update_sentiment(n: int = 200):
         f'Fetched {articles_df.shape[0]} articles without sentiment scores from the database'
     )
     # perform sentiment analysis on them
+    if nlp is None:
+        nlp = utils.load_sentiment_pipeline()
     headlines: list[str] = articles_df['headline'].tolist()
-    sentiment_scores = utils.analyse_sentiment(headlines)
+    with metrics.span('score_articles'):
+        sentiment_scores = utils.analyse_sentiment(headlines, nlp=nlp)
+    metrics.incr('articles_scored', sentiment_scores.shape[0])
     articles_df_with_sentiment = articles_df.merge(
         sentiment_scores, left_index=True, right_index=True, how='inner'
     )
+    # Deferred like the other heavy imports, as shift_detector loads numpy
+    from shift_detector import record_shifts
+
     # update the database with the sentiment scores
     # we can use insert function since all the duplicate articles (ticker, headline) will be replaced
     # and the new sentiment scores will be added.
-    dbm.insert_articles(articles_df_with_sentiment, has_sentiment=True)
+    with dbm.deferred_snapshot():
+        dbm.insert_articles(
+            articles_df_with_sentiment,
+            has_sentiment=True,
+            model_version=getattr(nlp, 'version', UNVERSIONED_SCORES),
+        )
+        # Compare each ticker's new scores with its running baseline
+        record_shifts(dbm, articles_df_with_sentiment)
     logger.success(
         f'Updated database with sentiment scores for {articles_df_with_sentiment.shape[0]} articles.'
     )
 
 
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    # Choose the universe: "nifty_50", "nifty_100", "nifty_200", "nifty_500"
+    parser.add_argument('--universe', default='nifty_50')
+    parser.add_argument(
+        '--sequential',
+        action='store_true',
+        help='fetch one ticker and source at a time instead of per-source queues',
+    )
+    parser.add_argument(
+        '--run-id',
+        help='resume the fetch run with this id (default: universe and UTC date)',
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        default=os.environ.get(PROFILE_ENV_VAR, '').lower()
+        not in ('', '0', 'false', 'no'),
+        help=f'write cProfile, flamegraph and tracemalloc reports per stage '
+        f'(also enabled by {PROFILE_ENV_VAR}=1)',
+    )
+    parser.add_argument(
+        '--profile-dir',
+        help='run directory for profiling artifacts (default: a new timestamped '
+        'directory under profiles/)',
+    )
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
     # Example usage: Fetch data for Nifty 50.
-    # Choose the universe: "nifty_50", "nifty_100", "nifty_200", "nifty_500"
-    universe: str = 'nifty_50'
-    multiprocess: bool = True
+    args = parse_args()
+    if args.profile:
+        profiling.enable(args.profile_dir)
     # Call the function to fetch news
-    get_news(universe, multiprocess)
-    compute_and_update_sentiment()
+    with metrics.span('stage', name='get_news'), profiling.stage('get_news'):
+        get_news(args.universe, concurrent=not args.sequential, run_id=args.run_id)
+    with (
+        metrics.span('stage', name='compute_and_update_sentiment'),
+        profiling.stage('compute_and_update_sentiment'),
+    ):
+        compute_and_update_sentiment()
+    report_paths = metrics.write_report('main')
+    if report_paths:
+        logger.info(f'Wrote run metrics to {", ".join(report_paths)}')
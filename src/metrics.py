@@ -0,0 +1,265 @@
+"""
+Lightweight timing spans, counters and observations for the pipeline.
+
+Collection is off unless the `NIFTY_METRICS` environment variable is set or
+`enable()` is called. While disabled, `span()` hands back a shared no-op context
+manager and `incr()` / `observe()` return immediately, so instrumented code pays
+one attribute lookup and one branch per call.
+
+Every series is keyed by (kind, name, labels) and keeps count, sum, min and max.
+Worker processes do not share memory with the parent, so they `drain()` their
+series and return them alongside their results for the parent to `merge()`.
+At the end of a run `write_report()` writes a JSON report and a Prometheus
+textfile (for the node_exporter textfile collector) to `METRICS_DIR`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import UTC, datetime
+from types import TracebackType
+from typing import Any
+
+from config import METRICS_DIR, METRICS_ENV_VAR
+
+SPAN = 'span'
+COUNTER = 'counter'
+OBSERVATION = 'observation'
+
+Labels = tuple[tuple[str, str], ...]
+SeriesKey = tuple[str, str, Labels]
+
+_enabled: bool = os.environ.get(METRICS_ENV_VAR, '').lower() not in (
+    '',
+    '0',
+    'false',
+    'no',
+)
+_lock = threading.Lock()
+# (kind, name, labels) -> [count, sum, min, max]
+_series: dict[SeriesKey, list[float]] = {}
+_started_at: float = time.time()
+_NOOP = nullcontext()
+
+
+class _Span:
+    __slots__ = ('name', 'labels', 'start')
+
+    def __init__(self, name: str, labels: Labels) -> None:
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> _Span:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        _record(SPAN, self.name, self.labels, time.perf_counter() - self.start)
+
+
+def _labels(labels: dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _record(kind: str, name: str, labels: Labels, value: float) -> None:
+    key = (kind, name, labels)
+    with _lock:
+        stats = _series.get(key)
+        if stats is None:
+            _series[key] = [1, value, value, value]
+            return
+        stats[0] += 1
+        stats[1] += value
+        if value < stats[2]:
+            stats[2] = value
+        if value > stats[3]:
+            stats[3] = value
+
+
+def enable(enabled: bool = True) -> None:
+    """Turn collection on or off for this process (and any process forked after)."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str, /, **labels: Any) -> _Span | nullcontext[None]:
+    """
+    Time the enclosed block in seconds:
+    ```
+    with metrics.span('http_request', source='GoogleFinance'):
+        ...
+    ```
+    """
+    if not _enabled:
+        return _NOOP
+    return _Span(name, _labels(labels))
+
+
+def incr(name: str, value: float = 1, /, **labels: Any) -> None:
+    """Add `value` to a counter."""
+    if not _enabled:
+        return
+    _record(COUNTER, name, _labels(labels), value)
+
+
+def observe(name: str, value: float, /, **labels: Any) -> None:
+    """Record one sample of a quantity such as a page size or a padding ratio."""
+    if not _enabled:
+        return
+    _record(OBSERVATION, name, _labels(labels), value)
+
+
+def _rows() -> list[list[Any]]:
+    return [
+        [kind, name, [list(label) for label in labels], *stats]
+        for (kind, name, labels), stats in _series.items()
+    ]
+
+
+def snapshot() -> list[list[Any]]:
+    """
+    Picklable copy of all series as `[kind, name, labels, count, sum, min, max]` rows.
+    """
+    with _lock:
+        return _rows()
+
+
+def drain() -> list[list[Any]]:
+    """Return `snapshot()` and clear local series, e.g. before a worker returns."""
+    if not _enabled:
+        return []
+    with _lock:
+        rows = _rows()
+        _series.clear()
+    return rows
+
+
+def merge(rows: list[list[Any]]) -> None:
+    """Fold rows produced by `snapshot()` / `drain()` in another process into ours."""
+    with _lock:
+        for kind, name, labels, count, total, low, high in rows:
+            key = (kind, name, tuple((str(k), str(v)) for k, v in labels))
+            stats = _series.get(key)
+            if stats is None:
+                _series[key] = [count, total, low, high]
+                continue
+            stats[0] += count
+            stats[1] += total
+            stats[2] = min(stats[2], low)
+            stats[3] = max(stats[3], high)
+
+
+def reset() -> None:
+    global _started_at
+    with _lock:
+        _series.clear()
+    _started_at = time.time()
+
+
+def report(run_name: str) -> dict[str, Any]:
+    """Build the JSON-serialisable run report."""
+    finished_at = time.time()
+    series = []
+    for kind, name, labels, count, total, low, high in sorted(
+        snapshot(), key=lambda row: (row[0], row[1], row[2])
+    ):
+        series.append(
+            {
+                'kind': kind,
+                'name': name,
+                'labels': dict(labels),
+                'count': count,
+                'sum': total,
+                'mean': total / count if count else 0.0,
+                'min': low,
+                'max': high,
+            }
+        )
+    return {
+        'run': run_name,
+        'started_at': datetime.fromtimestamp(_started_at, UTC).isoformat(),
+        'finished_at': datetime.fromtimestamp(finished_at, UTC).isoformat(),
+        'wall_seconds': round(finished_at - _started_at, 3),
+        'series': series,
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def to_prometheus(run_name: str) -> str:
+    """
+    Render all series in the Prometheus text exposition format. Spans become
+    `nifty_<name>_seconds` summaries, counters `nifty_<name>_total` and observations
+    `nifty_<name>` summaries, each with an extra `_max` gauge.
+    """
+    # metric family -> (type, sample lines); samples of one family must be contiguous
+    families: dict[str, tuple[str, list[str]]] = {}
+
+    def add(family: str, metric_type: str, sample: str) -> None:
+        families.setdefault(family, (metric_type, []))[1].append(sample)
+
+    for kind, name, labels, count, total, _low, high in sorted(
+        snapshot(), key=lambda row: (row[1], row[0], row[2])
+    ):
+        label_pairs = [('run', run_name), *((k, v) for k, v in labels)]
+        label_str = ','.join(f'{k}="{_escape(v)}"' for k, v in label_pairs)
+        if kind == COUNTER:
+            family = f'nifty_{name}_total'
+            add(family, 'counter', f'{family}{{{label_str}}} {total:g}')
+            continue
+
+        family = f'nifty_{name}_seconds' if kind == SPAN else f'nifty_{name}'
+        add(family, 'summary', f'{family}_sum{{{label_str}}} {total:.6g}')
+        add(family, 'summary', f'{family}_count{{{label_str}}} {count:g}')
+        add(f'{family}_max', 'gauge', f'{family}_max{{{label_str}}} {high:.6g}')
+
+    add(
+        'nifty_run_last_success_timestamp_seconds',
+        'gauge',
+        f'nifty_run_last_success_timestamp_seconds{{run="{_escape(run_name)}"}} {time.time():.0f}',
+    )
+
+    lines: list[str] = []
+    for family, (metric_type, samples) in families.items():
+        lines.append(f'# TYPE {family} {metric_type}')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+def _write_atomic(path: str, content: str) -> None:
+    # The textfile collector may read at any moment, so never expose a partial file
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_report(run_name: str, out_dir: str = METRICS_DIR) -> tuple[str, str] | None:
+    """
+    Write `<run_name>.json` and `<run_name>.prom` to `out_dir`, returning their
+    paths, or None when collection is disabled.
+    """
+    if not _enabled:
+        return None
+    os.makedirs(out_dir, exist_ok=True)
+    json_path = os.path.join(out_dir, f'{run_name}.json')
+    prom_path = os.path.join(out_dir, f'{run_name}.prom')
+    _write_atomic(json_path, json.dumps(report(run_name), indent=2))
+    _write_atomic(prom_path, to_prometheus(run_name))
+    return json_path, prom_path
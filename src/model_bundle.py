@@ -0,0 +1,307 @@
+"""
+Offline finBERT bundle, loaded by memory-mapping its weights.
+
+`SentimentScorer.from_pretrained` resolves the model through the Hugging Face hub
+cache (and the network, on a cold cache). It also imports the transformers
+modeling stack, which takes longer than importing torch itself. `build_bundle`
+(`cli.py bundle`) writes the model once to `MODEL_BUNDLE_DIR`:
+
+```
+models/finbert-tone/
+    bundle.json          manifest: source model and version, tokenizer settings,
+                         file sizes
+    config.json          model config (labels, dimensions)
+    model.safetensors    inference weights, with each layer's Q/K/V fused
+    tokenizer.json       fast tokenizer
+```
+
+`load_scorer` needs only torch and `tokenizers`, and never touches the network.
+It maps `model.safetensors` copy-on-write, and `BundleModel` runs finBERT's
+forward pass (BERT encoder, pooler, classifier) directly on views into that
+mapping. Weight pages are read from the page cache as inference touches them, and
+they are shared by every process that maps the same file. The fused Q/K/V
+projection takes one matmul per layer instead of three. A missing or incomplete
+bundle raises `ModelBundleError` straight away.
+
+```
+uv run src/cli.py bundle
+scorer = load_scorer()
+```
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from loguru import logger
+
+from config import MODEL_BUNDLE_DIR, SENTIMENT_MODEL_NAME
+
+if TYPE_CHECKING:
+    import torch
+
+    from sentiment import SentimentScorer
+
+MANIFEST_FILE = 'bundle.json'
+WEIGHTS_FILE = 'model.safetensors'
+CONFIG_FILE = 'config.json'
+TOKENIZER_FILE = 'tokenizer.json'
+# safetensors dtype names to torch dtype attributes
+_DTYPES = {
+    'F64': 'float64',
+    'F32': 'float32',
+    'F16': 'float16',
+    'BF16': 'bfloat16',
+    'I64': 'int64',
+    'I32': 'int32',
+    'I16': 'int16',
+    'I8': 'int8',
+    'U8': 'uint8',
+    'BOOL': 'bool',
+}
+
+
+class ModelBundleError(FileNotFoundError):
+    pass
+
+
+def build_bundle(
+    model_name: str = SENTIMENT_MODEL_NAME, path: str = MODEL_BUNDLE_DIR
+) -> dict[str, Any]:
+    """
+    Load `model_name` (hub id or local directory) and write it as a bundle to
+    `path`, replacing any bundle there. Returns the manifest.
+    """
+    import torch
+    from safetensors.torch import save_file
+
+    from sentiment import SentimentScorer
+
+    scorer = SentimentScorer.from_pretrained(model_name)
+    staging = f'{path}.partial'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    config = scorer.model.config
+    if (
+        config.model_type != 'bert'
+        or config.hidden_act != 'gelu'
+        or getattr(config, 'position_embedding_type', 'absolute') != 'absolute'
+    ):
+        raise ValueError(f'{model_name} is not a BERT model that BundleModel can run')
+    config.save_pretrained(staging)
+    scorer.tokenizer.backend_tokenizer.save(os.path.join(staging, TOKENIZER_FILE))
+    tensors = {
+        name: t.detach().contiguous()
+        for name, t in scorer.model.named_parameters()
+        if '.attention.self.' not in name
+    }
+    # One (3 * hidden, hidden) projection per layer instead of separate Q, K and V
+    for i in range(config.num_hidden_layers):
+        attention = scorer.model.bert.encoder.layer[i].attention.self
+        for kind in ('weight', 'bias'):
+            tensors[f'bert.encoder.layer.{i}.attention.self.qkv.{kind}'] = torch.cat(
+                [
+                    getattr(attention, part).state_dict()[kind]
+                    for part in ('query', 'key', 'value')
+                ]
+            ).contiguous()
+    weights = os.path.join(staging, WEIGHTS_FILE)
+    save_file(tensors, weights, metadata={'model': model_name})
+    digest = hashlib.sha256()
+    with open(weights, 'rb') as f:
+        while chunk := f.read(1 << 24):
+            digest.update(chunk)
+
+    manifest = {
+        'model': model_name,
+        # Stored with every score the bundle produces; changes with the weights
+        'version': f'{model_name}@{digest.hexdigest()[:12]}',
+        'built_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'tokenizer': {
+            'model_max_length': min(scorer.max_length, config.max_position_embeddings),
+            'pad_token_id': scorer.pad_token_id,
+        },
+        'files': {
+            name: os.path.getsize(os.path.join(staging, name))
+            for name in sorted(os.listdir(staging))
+        },
+    }
+    with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(staging, path)
+    logger.success(
+        f'Wrote model bundle for {model_name} to {path} '
+        f'({sum(manifest["files"].values()) / 1e6:.0f} MB)'
+    )
+    return manifest
+
+
+def check_bundle(path: str = MODEL_BUNDLE_DIR) -> dict[str, Any]:
+    """The bundle's manifest; raises ModelBundleError if any of its files is missing."""
+    hint = f'build it with `uv run src/cli.py bundle` (expected at {path})'
+    try:
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest: dict[str, Any] = json.load(f)
+    except FileNotFoundError:
+        raise ModelBundleError(f'No model bundle found: {hint}') from None
+    for name, size in manifest['files'].items():
+        file = os.path.join(path, name)
+        if not os.path.isfile(file) or os.path.getsize(file) != size:
+            raise ModelBundleError(f'Model bundle is incomplete ({name}): {hint}')
+    for name in (CONFIG_FILE, WEIGHTS_FILE, TOKENIZER_FILE):
+        if name not in manifest['files']:
+            raise ModelBundleError(f'Model bundle has no {name}: {hint}')
+    return manifest
+
+
+def map_weights(file: str) -> dict[str, torch.Tensor]:
+    """
+    Tensors of a safetensors file as views into one copy-on-write mapping of it,
+    without reading the file.
+    """
+    import torch
+
+    size = os.path.getsize(file)
+    storage = torch.UntypedStorage.from_file(file, shared=False, nbytes=size)
+    data = torch.empty(0, dtype=torch.uint8).set_(storage)
+    header_size = int.from_bytes(data[:8].numpy().tobytes(), 'little')
+    header = json.loads(data[8 : 8 + header_size].numpy().tobytes())
+    header.pop('__metadata__', None)
+    start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        begin, end = info['data_offsets']
+        tensors[name] = (
+            data[start + begin : start + end]
+            .view(getattr(torch, _DTYPES[info['dtype']]))
+            .view(info['shape'])
+        )
+    return tensors
+
+
+class BundleTokenizer:
+    """
+    The bundle's fast tokenizer, called like the part of `BertTokenizerFast` that
+    `SentimentScorer` uses: truncated input ids, no padding.
+    """
+
+    def __init__(self, file: str, model_max_length: int, pad_token_id: int) -> None:
+        from tokenizers import Tokenizer
+
+        self._tokenizer = Tokenizer.from_file(file)
+        self._tokenizer.no_padding()
+        self.model_max_length = model_max_length
+        self.pad_token_id = pad_token_id
+        self._max_length: int | None = None
+
+    def __call__(
+        self,
+        texts: list[str],
+        truncation: bool = True,
+        max_length: int | None = None,
+        **kwargs: Any,
+    ) -> dict[str, list[list[int]]]:
+        length = (max_length or self.model_max_length) if truncation else None
+        if length != self._max_length:
+            if length is None:
+                self._tokenizer.no_truncation()
+            else:
+                self._tokenizer.enable_truncation(length)
+            self._max_length = length
+        return {'input_ids': [e.ids for e in self._tokenizer.encode_batch(texts)]}
+
+
+class ModelOutput(NamedTuple):
+    logits: torch.Tensor
+
+
+class BundleModel:
+    """finBERT's inference forward pass over the bundle's tensors."""
+
+    def __init__(self, config: dict[str, Any], tensors: dict[str, torch.Tensor]):
+        self.config = SimpleNamespace(
+            id2label={int(i): label for i, label in config['id2label'].items()}
+        )
+        self.layers: int = config['num_hidden_layers']
+        self.heads: int = config['num_attention_heads']
+        self.eps: float = config['layer_norm_eps']
+        self.tensors = tensors
+
+    def _linear(self, x: torch.Tensor, name: str) -> torch.Tensor:
+        import torch.nn.functional as F
+
+        return F.linear(x, self.tensors[f'{name}.weight'], self.tensors[f'{name}.bias'])
+
+    def _norm(self, x: torch.Tensor, name: str) -> torch.Tensor:
+        import torch.nn.functional as F
+
+        return F.layer_norm(
+            x,
+            x.shape[-1:],
+            self.tensors[f'{name}.weight'],
+            self.tensors[f'{name}.bias'],
+            self.eps,
+        )
+
+    def __call__(
+        self, input_ids: torch.Tensor, attention_mask: torch.Tensor
+    ) -> ModelOutput:
+        import torch
+        import torch.nn.functional as F
+
+        t = self.tensors
+        batch, length = input_ids.shape
+        x = (
+            t['bert.embeddings.word_embeddings.weight'][input_ids]
+            + t['bert.embeddings.position_embeddings.weight'][:length]
+            + t['bert.embeddings.token_type_embeddings.weight'][0]
+        )
+        x = self._norm(x, 'bert.embeddings.LayerNorm')
+        hidden = x.shape[-1]
+        # Padded positions are never attended to
+        mask = attention_mask.bool()[:, None, None, :]
+        for i in range(self.layers):
+            layer = f'bert.encoder.layer.{i}'
+            q, k, v = (
+                self._linear(x, f'{layer}.attention.self.qkv')
+                .view(batch, length, 3, self.heads, hidden // self.heads)
+                .permute(2, 0, 3, 1, 4)
+            )
+            attended = F.scaled_dot_product_attention(q, k, v, attn_mask=mask)
+            attended = attended.transpose(1, 2).reshape(batch, length, hidden)
+            x = self._norm(
+                self._linear(attended, f'{layer}.attention.output.dense') + x,
+                f'{layer}.attention.output.LayerNorm',
+            )
+            intermediate = F.gelu(self._linear(x, f'{layer}.intermediate.dense'))
+            x = self._norm(
+                self._linear(intermediate, f'{layer}.output.dense') + x,
+                f'{layer}.output.LayerNorm',
+            )
+        pooled = torch.tanh(self._linear(x[:, 0], 'bert.pooler.dense'))
+        return ModelOutput(self._linear(pooled, 'classifier'))
+
+
+def load_scorer(path: str = MODEL_BUNDLE_DIR, **kwargs: Any) -> SentimentScorer:
+    """A `SentimentScorer` over the bundle at `path`, loaded offline."""
+    from sentiment import SentimentScorer
+
+    manifest = check_bundle(path)
+    with open(os.path.join(path, CONFIG_FILE)) as f:
+        config = json.load(f)
+    model = BundleModel(config, map_weights(os.path.join(path, WEIGHTS_FILE)))
+    tokenizer = BundleTokenizer(
+        os.path.join(path, TOKENIZER_FILE), **manifest['tokenizer']
+    )
+    # Bundles built before versions were recorded are told apart by build time
+    version = manifest.get('version') or f'{manifest["model"]}@{manifest["built_at"]}'
+    return SentimentScorer(model, tokenizer, **{'version': version, **kwargs})
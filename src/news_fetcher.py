@@ -1,26 +1,43 @@
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from typing import final, override  # type: ignore
 
 from bs4 import BeautifulSoup, Tag
 from loguru import logger
 
-from utils import get_webpage_content, parse_date
+import metrics
+import source_health
+from articles import ArticleBatch
+from config import SOURCE_CONCURRENCY
+from dates import DateNormalizer
+from utils import get_webpage_content
 
 
 class NewsSource(ABC):
+    # Set to False by get_articles when the page could not be fetched or parsed, so
+    # callers can tell a failed request from a page without articles
+    response_ok: bool = True
+
+    def __init__(self, dates: DateNormalizer | None = None) -> None:
+        # Shared by every source of a run, so all dates use one reference time
+        self.dates: DateNormalizer = dates or DateNormalizer()
+
     @abstractmethod
-    def get_articles(self, ticker: str) -> list[dict[str, str]]:
+    def get_articles(self, ticker: str) -> ArticleBatch:
         """
-        make http request to the news source, parse the response, and return a list of articles
+        make http request to the news source, parse the response, and return a batch of articles
         """
         pass
 
 
 @final
 class GoogleFinanceSource(NewsSource):
-    def __init__(self):
+    def __init__(self, dates: DateNormalizer | None = None):
+        super().__init__(dates)
         self.base_url: str = 'https://www.google.com/finance/quote'
-        self.articles: list[dict[str, str]] = []
         self.article_selector: str = 'div.z4rs2b'
         self.headline_selector: str = 'div.Yfwt5'
         self.date_selector: str = 'div.Adak'
@@ -28,256 +45,387 @@ class GoogleFinanceSource(NewsSource):
         self.link_selector: str = 'a'
 
     @override
-    def get_articles(self, ticker: str) -> list[dict[str, str]]:
+    def get_articles(self, ticker: str) -> ArticleBatch:
+        articles = ArticleBatch()
         try:
             url = f'{self.base_url}/{ticker}:NSE'
-            response = get_webpage_content(url)
+            with metrics.span('http_request', source='GoogleFinance'):
+                response = get_webpage_content(url)
             if not response:
                 logger.warning(f'No response from Google Finance for {ticker}')
-                return self.articles
-            soup = BeautifulSoup(response, 'html.parser')
-            article_elements = soup.select(self.article_selector)
-
-            for article in article_elements:
-                try:
-                    headline_tag: Tag | None = article.select_one(
-                        self.headline_selector
-                    )
-                    date_tag: Tag | None = article.select_one(self.date_selector)
-                    source_tag: Tag | None = article.select_one(self.source_selector)
-                    link_tag: Tag | None = article.select_one(self.link_selector)
-
-                    if not all([headline_tag, date_tag, source_tag, link_tag]):
-                        logger.warning(
-                            f'Missing elements in Google Finance article for {ticker}'
+                self.response_ok = False
+                return articles
+            with metrics.span('parse', source='GoogleFinance'):
+                soup = BeautifulSoup(response, 'html.parser')
+                article_elements = soup.select(self.article_selector)
+
+                for article in article_elements:
+                    try:
+                        headline_tag: Tag | None = article.select_one(
+                            self.headline_selector
                         )
-                        continue
+                        date_tag: Tag | None = article.select_one(self.date_selector)
+                        source_tag: Tag | None = article.select_one(
+                            self.source_selector
+                        )
+                        link_tag: Tag | None = article.select_one(self.link_selector)
+
+                        if not all([headline_tag, date_tag, source_tag, link_tag]):
+                            logger.warning(
+                                f'Missing elements in Google Finance article for {ticker}'
+                            )
+                            continue
+
+                        headline: str = (
+                            headline_tag.text.strip().replace('\\n', '')
+                            if headline_tag
+                            else ''
+                        )
+                        relative_date_str: str = date_tag.text if date_tag else ''
+                        source: str = source_tag.text if source_tag else ''
+                        article_link_raw = link_tag.get('href', '') if link_tag else ''
+                        article_link: str = (
+                            str(article_link_raw) if article_link_raw else ''
+                        )
+
+                        if not article_link:
+                            logger.warning(
+                                f'Missing article link in Google Finance article for {ticker}'
+                            )
+                            continue
 
-                    headline: str = (
-                        headline_tag.text.strip().replace('\\n', '')
-                        if headline_tag
-                        else ''
-                    )
-                    relative_date_str: str = date_tag.text if date_tag else ''
-                    source: str = source_tag.text if source_tag else ''
-                    article_link_raw = link_tag.get('href', '') if link_tag else ''
-                    article_link: str = (
-                        str(article_link_raw) if article_link_raw else ''
-                    )
-
-                    if not article_link:
+                        # Dates are normalized for the whole page below
+                        articles.append(
+                            ticker, headline, relative_date_str, article_link, source
+                        )
+                    except Exception as e:
                         logger.warning(
-                            f'Missing article link in Google Finance article for {ticker}'
+                            f'Error parsing Google Finance article for {ticker}: {str(e)}'
                         )
                         continue
-
-                    date_posted: str | None = parse_date(relative_date_str)
-
-                    self.articles.append(
-                        {
-                            'ticker': ticker,
-                            'headline': headline,
-                            'date_posted': date_posted,
-                            'article_link': article_link,
-                            'source': source,
-                        }
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f'Error parsing Google Finance article for {ticker}: {str(e)}'
-                    )
-                    continue
+                articles.date_posted = self.dates.parse_column(articles.date_posted)
+            metrics.observe('articles_per_page', len(articles), source='GoogleFinance')
 
         except Exception as e:
             logger.error(f'Error fetching from Google Finance for {ticker}: {str(e)}')
-        return self.articles
+            self.response_ok = False
+        return articles
 
 
 @final
 class YahooFinanceSource(NewsSource):
-    def __init__(self):
+    def __init__(self, dates: DateNormalizer | None = None):
+        super().__init__(dates)
         self.base_url = 'https://finance.yahoo.com/quote'
-        self.articles: list[dict[str, str]] = []
         self.article_selector: str = 'li.stream-item.story-item.yf-1drgw5l'
         self.headline_selector: str = 'a h3'
         self.footer_selector: str = 'div.publishing.yf-1weyqlp'
         self.link_selector: str = 'a'
 
     @override
-    def get_articles(self, ticker: str) -> list[dict[str, str]]:
+    def get_articles(self, ticker: str) -> ArticleBatch:
+        articles = ArticleBatch()
         try:
             url = f'{self.base_url}/{ticker}.NS/news/'
-            response = get_webpage_content(url, impersonate=True)
+            with metrics.span('http_request', source='YahooFinance'):
+                response = get_webpage_content(url, impersonate=True)
             if not response:
                 logger.warning(f'No response from Yahoo Finance for {ticker}')
-                return self.articles
-
-            soup = BeautifulSoup(response, 'html.parser')
-            article_elements = soup.select(self.article_selector)
+                self.response_ok = False
+                return articles
+
+            with metrics.span('parse', source='YahooFinance'):
+                soup = BeautifulSoup(response, 'html.parser')
+                article_elements = soup.select(self.article_selector)
+
+                for article in article_elements:
+                    try:
+                        link_tag: Tag | None = article.select_one(self.link_selector)
+                        headline_tag: Tag | None = article.select_one(
+                            self.headline_selector
+                        )
+                        footer_tag: Tag | None = article.select_one(
+                            self.footer_selector
+                        )
 
-            for article in article_elements:
-                try:
-                    link_tag: Tag | None = article.select_one(self.link_selector)
-                    headline_tag: Tag | None = article.select_one(
-                        self.headline_selector
-                    )
-                    footer_tag: Tag | None = article.select_one(self.footer_selector)
+                        if not link_tag or not headline_tag:  # Footer is optional
+                            logger.warning(
+                                f'Missing link or headline in Yahoo Finance article for {ticker}'
+                            )
+                            continue
 
-                    if not link_tag or not headline_tag:  # Footer is optional
-                        logger.warning(
-                            f'Missing link or headline in Yahoo Finance article for {ticker}'
+                        article_link_raw = link_tag.get('href')
+                        article_link: str = (
+                            str(article_link_raw) if article_link_raw else ''
                         )
-                        continue
-
-                    article_link_raw = link_tag.get('href')
-                    article_link: str = (
-                        str(article_link_raw) if article_link_raw else ''
-                    )
-                    if not article_link:
+                        if not article_link:
+                            logger.warning(
+                                f'Missing article link in Yahoo Finance article for {ticker}'
+                            )
+                            continue
+
+                        # Make sure we have a full URL
+                        if not article_link.startswith('http'):
+                            article_link = 'https://finance.yahoo.com' + article_link
+
+                        headline: str = headline_tag.text.strip()
+
+                        # Get publisher and date from the footer
+                        source = 'Yahoo Finance'  # Default source
+                        time_str = ''
+                        if footer_tag:
+                            footer_text = footer_tag.text.strip()
+                            parts = footer_text.split('•')
+                            source = (
+                                parts[0].strip() if len(parts) > 0 else 'Yahoo Finance'
+                            )
+                            time_str = parts[1].strip() if len(parts) > 1 else ''
+
+                        articles.append(
+                            ticker, headline, time_str, article_link, source
+                        )
+                    except Exception as e:
                         logger.warning(
-                            f'Missing article link in Yahoo Finance article for {ticker}'
+                            f'Error parsing Yahoo Finance article for {ticker}: {str(e)}'
                         )
                         continue
-
-                    # Make sure we have a full URL
-                    if not article_link.startswith('http'):
-                        article_link = 'https://finance.yahoo.com' + article_link
-
-                    headline: str = headline_tag.text.strip()
-
-                    # Get publisher and date from the footer
-                    source = 'Yahoo Finance'  # Default source
-                    time_str = ''
-                    if footer_tag:
-                        footer_text = footer_tag.text.strip()
-                        parts = footer_text.split('•')
-                        source = parts[0].strip() if len(parts) > 0 else 'Yahoo Finance'
-                        time_str = parts[1].strip() if len(parts) > 1 else ''
-
-                    date_posted: str = parse_date(time_str)
-
-                    data_dict = {
-                        'ticker': ticker,
-                        'headline': headline,
-                        'date_posted': date_posted,
-                        'article_link': article_link,
-                        'source': source,
-                    }
-                    self.articles.append(data_dict)
-                except Exception as e:
-                    logger.warning(
-                        f'Error parsing Yahoo Finance article for {ticker}: {str(e)}'
-                    )
-                    continue
+                articles.date_posted = self.dates.parse_column(articles.date_posted)
+            metrics.observe('articles_per_page', len(articles), source='YahooFinance')
 
         except Exception as e:
             logger.error(f'Error fetching from Yahoo Finance for {ticker}: {str(e)}')
-        return self.articles
+            self.response_ok = False
+        return articles
+
+
+# Finology prints dates without a year, e.g. '14 Mar, 10:30 AM'
+FINOLOGY_DATE_FORMAT = '%d %b, %I:%M %p'
 
 
 @final
 class FinologySource(NewsSource):
-    def __init__(self):
+    def __init__(self, dates: DateNormalizer | None = None):
+        super().__init__(dates)
         self.base_url = 'https://ticker.finology.in/company'
-        self.articles: list[dict[str, str]] = []
         self.article_selector: str = 'div#newsarticles a#btnDetails.newslink'
         self.headline_selector: str = 'span'
         self.date_selector: str = 'small'
 
     @override
-    def get_articles(self, ticker: str) -> list[dict[str, str]]:
+    def get_articles(self, ticker: str) -> ArticleBatch:
+        articles = ArticleBatch()
         try:
             url = f'{self.base_url}/{ticker}'
-            response = get_webpage_content(url, custom_header=True, impersonate=True)
+            with metrics.span('http_request', source='Finology'):
+                response = get_webpage_content(
+                    url, custom_header=True, impersonate=True
+                )
             if not response:
                 logger.warning(f'No response from Finology for {ticker}')
-                return self.articles
-
-            soup = BeautifulSoup(response, 'html.parser')
-            article_elements = soup.select(self.article_selector)
+                self.response_ok = False
+                return articles
 
-            for article in article_elements:
-                try:
-                    headline_tag: Tag | None = article.select_one(
-                        self.headline_selector
-                    )
-                    date_tag: Tag | None = article.select_one(self.date_selector)
+            with metrics.span('parse', source='Finology'):
+                soup = BeautifulSoup(response, 'html.parser')
+                article_elements = soup.select(self.article_selector)
 
-                    if not headline_tag or not date_tag:
+                for article in article_elements:
+                    try:
+                        headline_tag: Tag | None = article.select_one(
+                            self.headline_selector
+                        )
+                        date_tag: Tag | None = article.select_one(self.date_selector)
+
+                        if not headline_tag or not date_tag:
+                            logger.warning(
+                                f'Missing elements in Finology article for {ticker}'
+                            )
+                            continue
+
+                        headline: str = headline_tag.text.strip()
+                        date_str: str = date_tag.text.strip()
+
+                        articles.append(
+                            ticker,
+                            headline,
+                            date_str,
+                            url,  # Finology links point back to the main page
+                            'Finology',
+                        )
+                    except Exception as e:
                         logger.warning(
-                            f'Missing elements in Finology article for {ticker}'
+                            f'Error parsing Finology article for {ticker}: {str(e)}'
                         )
                         continue
-
-                    headline: str = headline_tag.text.strip()
-                    date_str: str = date_tag.text.strip()
-
-                    date_posted = parse_date(
-                        date_str, relative=False, format='%d %b, %I:%M %p'
-                    )
-
-                    self.articles.append(
-                        {
-                            'ticker': ticker,
-                            'headline': headline,
-                            'date_posted': date_posted,
-                            'article_link': url,  # Finology links point back to the main page
-                            'source': 'Finology',
-                        }
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f'Error parsing Finology article for {ticker}: {str(e)}'
-                    )
-                    continue
+                articles.date_posted = self.dates.parse_column(
+                    articles.date_posted, format=FINOLOGY_DATE_FORMAT
+                )
+            metrics.observe('articles_per_page', len(articles), source='Finology')
 
         except Exception as e:
             logger.error(f'Error fetching from Finology for {ticker}: {str(e)}')
-        return self.articles
+            self.response_ok = False
+        return articles
+
+
+# Sources in the order their articles are joined for a ticker, which decides the
+# copy kept when more than one source returns the same headline
+NEWS_SOURCES: dict[str, type[NewsSource]] = {
+    'GoogleFinance': GoogleFinanceSource,
+    'YahooFinance': YahooFinanceSource,
+    'Finology': FinologySource,
+}
+
+
+def fetch_source(
+    source_name: str,
+    source_cls: type[NewsSource],
+    ticker: str,
+    dates: DateNormalizer | None = None,
+) -> ArticleBatch:
+    """
+    Fetch one ticker from one source through the source's circuit breaker, see
+    `source_health`. Returns an empty batch when the source is skipped or fails.
+    """
+    return _fetch_source(source_name, source_cls, ticker, dates)[0]
+
+
+def _fetch_source(
+    source_name: str,
+    source_cls: type[NewsSource],
+    ticker: str,
+    dates: DateNormalizer | None,
+) -> tuple[ArticleBatch, bool]:
+    """`fetch_source`, and whether the source answered (not skipped or failed)."""
+    if not source_health.allow(source_name):
+        logger.debug(f'Skipping {source_name} for {ticker}: circuit breaker open')
+        return ArticleBatch(), False
+    logger.info(f'Fetching articles from {source_name} for {ticker}')
+    try:
+        source = source_cls(dates)
+        fetched_articles: ArticleBatch = source.get_articles(ticker)
+        logger.info(
+            f'Fetched {len(fetched_articles)} articles from {source_name} for {ticker}'
+        )
+    except Exception as e:
+        source_health.record(source_name, source_health.FAILED)
+        logger.error(f'Failed to fetch from {source_name} for {ticker}: {e}')
+        return ArticleBatch(), False
+
+    if not source.response_ok:
+        source_health.record(source_name, source_health.FAILED)
+    elif not fetched_articles:
+        source_health.record(source_name, source_health.EMPTY)
+    else:
+        source_health.record(source_name, source_health.OK, len(fetched_articles))
+    return fetched_articles, source.response_ok
 
 
 class TickerNewsObject:
-    def __init__(self, ticker: str) -> None:
+    def __init__(self, ticker: str, dates: DateNormalizer | None = None) -> None:
         self.ticker: str = ticker
-        self.news_sources: dict[
-            str,
-            type[GoogleFinanceSource] | type[YahooFinanceSource] | type[FinologySource],
-        ] = {
-            'GoogleFinance': GoogleFinanceSource,
-            'YahooFinance': YahooFinanceSource,
-            'Finology': FinologySource,
-        }
-        self.articles: list[dict[str, str]] = []
-
-    def collect_news(self) -> list[dict[str, str]]:
+        self.dates = dates or DateNormalizer()
+        self.news_sources: dict[str, type[NewsSource]] = dict(NEWS_SOURCES)
+        self.articles = ArticleBatch()
+        # Sources that were skipped or failed in collect_news
+        self.failed_sources: list[str] = []
+
+    def collect_news(self) -> ArticleBatch:
         """
         Calls each news source's get_articles method to fetch articles for the ticker.
         """
         for source_name, source_cls in self.news_sources.items():
-            logger.info(f'Fetching articles from {source_name} for {self.ticker}')
-            try:
-                fetched_articles: list[dict[str, str]] = source_cls().get_articles(
-                    self.ticker
-                )
-                logger.info(
-                    f'Fetched {len(fetched_articles)} articles from {source_name} for {self.ticker}'
-                )
-                if fetched_articles:
-                    self.articles.extend(fetched_articles)
-            except Exception as e:
-                logger.error(
-                    f'Failed to fetch from {source_name} for {self.ticker}: {e}'
-                )
-                continue
+            articles, answered = _fetch_source(
+                source_name, source_cls, self.ticker, self.dates
+            )
+            self.articles.extend(articles)
+            if not answered:
+                self.failed_sources.append(source_name)
         logger.success(
             f'Collected {len(self.articles)} articles in total for {self.ticker}'
         )
         return self.articles
 
 
+def fetch_universe(
+    tickers: list[str],
+    sources: dict[str, type[NewsSource]] | None = None,
+    concurrency: dict[str, int] | None = None,
+    on_fetched: Callable[[], None] | None = None,
+    on_ticker: Callable[[str, ArticleBatch], None] | None = None,
+) -> list[ArticleBatch]:
+    """
+    Fetch every ticker from every source, with one work queue per source host.
+
+    Each host works through the tickers on its own pool of `concurrency[source]`
+    threads (`SOURCE_CONCURRENCY` by default), so a slow or throttled host only
+    delays its own queue and the run takes about as long as the slowest host's
+    workload rather than the sum of all of them. The per-host limits also cap how
+    hard each site is hit at once. `on_fetched` is called after every
+    (ticker, source) request, e.g. to advance a progress bar. `on_ticker(ticker,
+    articles)` is called as soon as every source has answered a ticker, from the
+    thread of the last one, e.g. to journal it; tickers with a skipped or failed
+    source are not reported.
+
+    Returns one batch per ticker, in the order given, with each ticker's articles
+    joined in `sources` order like `TickerNewsObject.collect_news`.
+    """
+    sources = sources or NEWS_SOURCES
+    limits = {**SOURCE_CONCURRENCY, **(concurrency or {})}
+    # One reference time and date memo for the whole run
+    dates = DateNormalizer()
+
+    # Per ticker: each source's batch, and whether every source answered so far
+    fetched: list[dict[str, ArticleBatch]] = [{} for _ in tickers]
+    answered = [True] * len(tickers)
+    lock = threading.Lock()
+
+    def joined(i: int) -> ArticleBatch:
+        return ArticleBatch.concat(fetched[i][source_name] for source_name in sources)
+
+    def fetch(source_name: str, source_cls: type[NewsSource], i: int) -> None:
+        try:
+            articles, ok = _fetch_source(source_name, source_cls, tickers[i], dates)
+            with lock:
+                fetched[i][source_name] = articles
+                answered[i] = answered[i] and ok
+                complete = answered[i] and len(fetched[i]) == len(sources)
+            if complete and on_ticker is not None:
+                on_ticker(tickers[i], joined(i))
+        finally:
+            if on_fetched is not None:
+                on_fetched()
+
+    def run_host(source_name: str) -> None:
+        source_cls = sources[source_name]
+        started = time.perf_counter()
+        with (
+            metrics.span('host_queue', source=source_name),
+            ThreadPoolExecutor(
+                max_workers=max(1, limits.get(source_name, 1)),
+                thread_name_prefix=source_name,
+            ) as pool,
+        ):
+            list(
+                pool.map(
+                    lambda i: fetch(source_name, source_cls, i), range(len(tickers))
+                )
+            )
+        logger.info(
+            f'{source_name} finished {len(tickers)} tickers in '
+            f'{time.perf_counter() - started:.1f}s'
+        )
+
+    with ThreadPoolExecutor(max_workers=len(sources)) as hosts:
+        list(hosts.map(run_host, sources))
+
+    return [joined(i) for i in range(len(tickers))]
+
+
 if __name__ == '__main__':
     ticker = 'SBIN'
 
     ticker_news = TickerNewsObject(ticker)
     articles = ticker_news.collect_news()
     logger.info(f'Collected {len(articles)} articles for {ticker}')
+    source_health.log_summary()
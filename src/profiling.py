@@ -0,0 +1,202 @@
+"""
+On-demand CPU and memory profiling of pipeline stages.
+
+Profiling is off unless `enable()` is called (main.py does so for `--profile` or
+the `NIFTY_PROFILE` environment variable). While disabled, `stage()` returns a
+shared no-op context manager. While enabled, each stage writes to the run
+directory:
+
+- `<stage>.prof`: cProfile stats, loadable with `pstats` or snakeviz
+- `<stage>.pstats.txt`: the top functions by cumulative time
+- `<stage>.collapsed`: sampled stacks in the collapsed format read by
+  flamegraph.pl, speedscope and inferno
+- `<stage>.tracemalloc.txt`: the top allocation sites that grew during the stage
+
+and `run.json` indexes the artifacts with each stage's wall time and peak traced
+memory. cProfile, the stack sampler and tracemalloc all run at once, so wall times
+under profiling are inflated and only useful relative to each other.
+
+Only the calling thread is profiled: the fetch stage runs its requests on
+per-source worker threads and shows time spent waiting on them, so profile
+fetching with `--sequential`.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from datetime import UTC, datetime
+from types import FrameType
+from typing import Any
+
+from loguru import logger
+
+from config import PROFILE_DIR
+
+DEFAULT_TOP_N = 30
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+_run_dir: str | None = None
+_top_n: int = DEFAULT_TOP_N
+_sample_interval: float = DEFAULT_SAMPLE_INTERVAL
+_stages: list[dict[str, Any]] = []
+_NOOP = nullcontext()
+
+
+def enable(
+    run_dir: str | None = None,
+    top_n: int = DEFAULT_TOP_N,
+    sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+) -> str:
+    """
+    Turn profiling on and create the run directory, by default a timestamped
+    folder under `PROFILE_DIR`. Returns the run directory.
+    """
+    global _run_dir, _top_n, _sample_interval
+    if run_dir is None:
+        run_dir = os.path.join(
+            PROFILE_DIR, datetime.now(UTC).strftime('%Y%m%dT%H%M%SZ')
+        )
+    os.makedirs(run_dir, exist_ok=True)
+    _run_dir = run_dir
+    _top_n = top_n
+    _sample_interval = sample_interval
+    _stages.clear()
+    logger.info(f'Profiling enabled, writing artifacts to {run_dir}')
+    return run_dir
+
+
+def disable() -> None:
+    global _run_dir
+    _run_dir = None
+
+
+def is_enabled() -> bool:
+    return _run_dir is not None
+
+
+class _StackSampler(threading.Thread):
+    """
+    Periodically records the stack of one thread. cProfile only knows caller/callee
+    pairs, so full stacks for a flame graph have to be sampled.
+    """
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(name='stack-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame: FrameType | None = sys._current_frames().get(self.thread_id)
+            names: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(
+                    f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+                )
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _write_text(path: str, content: str) -> None:
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+@contextmanager
+def _profile_stage(name: str, run_dir: str) -> Iterator[None]:
+    tracemalloc_was_tracing = tracemalloc.is_tracing()
+    if not tracemalloc_was_tracing:
+        tracemalloc.start(25)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+
+    sampler = _StackSampler(threading.get_ident(), _sample_interval)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+        wall_seconds = time.perf_counter() - started
+        after = tracemalloc.take_snapshot()
+        _current, peak = tracemalloc.get_traced_memory()
+        if not tracemalloc_was_tracing:
+            tracemalloc.stop()
+
+        prof_path = os.path.join(run_dir, f'{name}.prof')
+        profiler.dump_stats(prof_path)
+
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(_top_n)
+        stats_path = os.path.join(run_dir, f'{name}.pstats.txt')
+        _write_text(stats_path, stats_text.getvalue())
+
+        collapsed_path = os.path.join(run_dir, f'{name}.collapsed')
+        _write_text(
+            collapsed_path,
+            ''.join(
+                f'{stack} {count}\n' for stack, count in sampler.stacks.most_common()
+            ),
+        )
+
+        top_stats = after.compare_to(before, 'lineno')[:_top_n]
+        memory_path = os.path.join(run_dir, f'{name}.tracemalloc.txt')
+        _write_text(
+            memory_path,
+            f'peak traced memory: {peak / 2**20:.1f} MiB\n'
+            + ''.join(f'{stat}\n' for stat in top_stats),
+        )
+
+        _stages.append(
+            {
+                'stage': name,
+                'wall_seconds': round(wall_seconds, 3),
+                'peak_traced_mib': round(peak / 2**20, 1),
+                'samples': sum(sampler.stacks.values()),
+                'artifacts': [prof_path, stats_path, collapsed_path, memory_path],
+            }
+        )
+        _write_text(
+            os.path.join(run_dir, 'run.json'),
+            json.dumps({'run_dir': run_dir, 'stages': _stages}, indent=2),
+        )
+        logger.info(
+            f'Profiled {name}: {wall_seconds:.1f}s, peak traced {peak / 2**20:.1f} MiB'
+        )
+
+
+def stage(name: str) -> Any:
+    """
+    Profile the enclosed block as stage `name` when profiling is enabled:
+    ```
+    with profiling.stage('get_news'):
+        get_news(universe, concurrent)
+    ```
+    """
+    if _run_dir is None:
+        return _NOOP
+    return _profile_stage(name, _run_dir)
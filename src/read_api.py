@@ -0,0 +1,377 @@
+"""
+Local HTTP read service for the sentiment views in `docs/PRD.md`.
+
+```
+uv run src/cli.py serve --port 8050
+curl 'http://127.0.0.1:8050/api/treemap?index=nifty_50&start=2025-06-01&end=2025-06-07'
+```
+
+Routes (all GET, JSON responses; `start` and `end` are inclusive 'YYYY-MM-DD'
+dates, defaulting to the last `READ_API_DEFAULT_DAYS` days):
+
+- `/api/news?ticker=&start=&end=&limit=`: newest articles of one ticker
+  ("Stock News Analysis");
+- `/api/series?ticker=&start=&end=`: daily mean sentiment of one ticker;
+- `/api/treemap?index=&start=&end=`: per-ticker mean sentiment of an index with
+  sector, industry and market cap ("Sentiment Overview"), read from the
+  in-memory prefix sums of `sentiment_prefix.py` rather than the articles;
+- `/health`: cache and generation state.
+
+The server is a plain `asyncio` stream server with keep-alive; queries run on the
+default thread pool, one DuckDB connection each. Response bodies are kept in an LRU
+keyed by the view and its (index or ticker, date range) parameters.
+The server reads the snapshots the pipeline publishes after each commit
+(`DatabaseManager(read_only=True)`), so it never waits on the writer.
+`DatabaseManager.insert_articles` bumps `ARTICLES_GENERATION_KEY` in
+`pipeline_state`; the server polls it every `READ_API_POLL_INTERVAL` seconds and
+clears the cache and syncs the prefix sums when an ingest has completed, so a
+response is never more than one poll interval behind the latest snapshot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlsplit
+
+from loguru import logger
+
+import metrics
+from config import (
+    ARTICLES_GENERATION_KEY,
+    GET_DATA,
+    INDEX_CONSTITUENTS_URL,
+    READ_API_CACHE_SIZE,
+    READ_API_DEFAULT_DAYS,
+    READ_API_HOST,
+    READ_API_NEWS_LIMIT,
+    READ_API_POLL_INTERVAL,
+    READ_API_PORT,
+)
+from database import DatabaseManager
+from sentiment_prefix import SentimentPrefix
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CacheKey = tuple[str, ...]
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+}
+
+
+class BadRequest(ValueError):
+    """A request parameter is missing or malformed; answered with a 400."""
+
+
+class ResponseCache:
+    """Bounded LRU map from request key to encoded response body."""
+
+    def __init__(self, max_size: int = READ_API_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._bodies: OrderedDict[CacheKey, bytes] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def get(self, key: CacheKey) -> bytes | None:
+        body = self._bodies.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._bodies.move_to_end(key)
+        return body
+
+    def put(self, key: CacheKey, body: bytes) -> None:
+        if self.max_size <= 0:
+            return
+        self._bodies[key] = body
+        self._bodies.move_to_end(key)
+        while len(self._bodies) > self.max_size:
+            self._bodies.popitem(last=False)
+
+    def clear(self) -> None:
+        self._bodies.clear()
+
+
+def _param(params: dict[str, list[str]], name: str, default: str = '') -> str:
+    values = params.get(name)
+    return values[-1].strip() if values else default
+
+
+def date_range(
+    params: dict[str, list[str]], today: date | None = None
+) -> tuple[str, str]:
+    """
+    Resolve `start` / `end` to SQL bounds: start inclusive, the day after `end`
+    exclusive, as 'YYYY-MM-DD' strings that compare correctly with `date_posted`.
+    """
+    try:
+        end = date.fromisoformat(_param(params, 'end')) if 'end' in params else None
+        start = (
+            date.fromisoformat(_param(params, 'start')) if 'start' in params else None
+        )
+    except ValueError as e:
+        raise BadRequest(f'Dates must be YYYY-MM-DD: {e}') from e
+    end = end or today or date.today()
+    start = start or end - timedelta(days=READ_API_DEFAULT_DAYS - 1)
+    if start > end:
+        raise BadRequest(f'start {start} is after end {end}')
+    return start.isoformat(), (end + timedelta(days=1)).isoformat()
+
+
+class ReadAPI:
+    """
+    Route handling, caching and invalidation, independent of the transport so it
+    can be called directly from tests and benchmarks.
+    """
+
+    def __init__(
+        self,
+        dbm: DatabaseManager | None = None,
+        cache_size: int = READ_API_CACHE_SIZE,
+    ) -> None:
+        # Reads the published snapshots, so serving never contends with ingest
+        self.dbm = dbm or DatabaseManager(read_only=True)
+        self.cache = ResponseCache(cache_size)
+        self.generation = self.dbm.get_state(ARTICLES_GENERATION_KEY)
+        # Loaded by the first treemap request; metadata is reread after an ingest
+        self.prefix: SentimentPrefix | None = None
+        self._ticker_meta: pd.DataFrame | None = None
+        self._prefix_lock = threading.Lock()
+        self.routes: dict[str, Callable[..., Awaitable[bytes]]] = {
+            '/api/news': self.news,
+            '/api/series': self.series,
+            '/api/treemap': self.treemap,
+        }
+
+    def check_generation(self) -> bool:
+        """Clear the cache if articles were inserted since the last check."""
+        generation = self.dbm.get_state(ARTICLES_GENERATION_KEY)
+        if generation == self.generation:
+            return False
+        logger.info(f'Articles changed, dropping {len(self.cache)} cached responses')
+        self.generation = generation
+        self.cache.clear()
+        self._ticker_meta = None
+        if self.prefix is not None:
+            self.prefix.sync()
+        return True
+
+    async def handle(
+        self, path: str, params: dict[str, list[str]]
+    ) -> tuple[int, bytes, bool]:
+        """
+        Returns:
+            (status, JSON body, whether the body came from the cache)
+        """
+        if path == '/health':
+            return 200, self.health(), False
+        route = self.routes.get(path)
+        if route is None:
+            return 404, _error(f'No route {path}'), False
+        try:
+            key = self._cache_key(path, params)
+        except BadRequest as e:
+            return 400, _error(str(e)), False
+        body = self.cache.get(key)
+        if body is not None:
+            metrics.incr('api_cache', outcome='hit')
+            return 200, body, True
+        metrics.incr('api_cache', outcome='miss')
+        generation = self.generation
+        try:
+            with metrics.span('api_query', route=path):
+                body = await route(*key[1:])
+        except Exception:
+            # e.g. the database is locked or a snapshot was removed mid-query
+            logger.exception(f'Could not answer {path} {key[1:]}')
+            return 500, _error('Internal server error'), False
+        # A response computed across an invalidation may already be stale
+        if generation == self.generation:
+            self.cache.put(key, body)
+        return 200, body, False
+
+    def _cache_key(self, path: str, params: dict[str, list[str]]) -> CacheKey:
+        """The route followed by the arguments it is called with."""
+        start, end = date_range(params)
+        if path == '/api/treemap':
+            return path, self._index(params), start, end
+        key = (path, self._ticker(params), start, end)
+        if path == '/api/news':
+            key += (str(self._limit(params)),)
+        return key
+
+    @staticmethod
+    def _ticker(params: dict[str, list[str]]) -> str:
+        ticker = _param(params, 'ticker').upper()
+        if not ticker:
+            raise BadRequest('ticker is required')
+        return ticker
+
+    @staticmethod
+    def _index(params: dict[str, list[str]]) -> str:
+        index = _param(params, 'index', 'nifty_500')
+        if index not in INDEX_CONSTITUENTS_URL:
+            raise BadRequest(
+                f'Unknown index {index!r}, expected one of {list(INDEX_CONSTITUENTS_URL)}'
+            )
+        return index
+
+    @staticmethod
+    def _limit(params: dict[str, list[str]]) -> int:
+        try:
+            limit = int(_param(params, 'limit', str(READ_API_NEWS_LIMIT)))
+        except ValueError as e:
+            raise BadRequest('limit must be an integer') from e
+        return max(1, min(limit, READ_API_NEWS_LIMIT))
+
+    def _query(self, query: str, args: list[Any]) -> bytes:
+        with self.dbm.get_connection() as conn:
+            cursor = conn.execute(query, args)
+            columns = [d[0] for d in cursor.description]
+            rows = cursor.fetchall()
+        return json.dumps(
+            [dict(zip(columns, row, strict=True)) for row in rows]
+        ).encode()
+
+    async def news(self, ticker: str, start: str, end: str, limit: str) -> bytes:
+        args = [ticker, start, end, int(limit)]
+        return await asyncio.to_thread(self._query, GET_DATA['api_news'], args)
+
+    async def series(self, ticker: str, start: str, end: str) -> bytes:
+        args = [ticker, start, end]
+        return await asyncio.to_thread(
+            self._query, GET_DATA['api_sentiment_series'], args
+        )
+
+    async def treemap(self, index: str, start: str, end: str) -> bytes:
+        return await asyncio.to_thread(self._treemap, index, start, end)
+
+    def _treemap(self, index: str, start: str, end: str) -> bytes:
+        with self._prefix_lock:
+            if self.prefix is None:
+                self.prefix = SentimentPrefix.load(self.dbm)
+            if self._ticker_meta is None:
+                self._ticker_meta = self.dbm.get_ticker_metadata()
+            meta = self._ticker_meta
+        means = self.prefix.ticker_means(
+            date.fromisoformat(start), date.fromisoformat(end) - timedelta(days=1)
+        )
+        members = self.dbm.get_index_constituents(index)['ticker']
+        meta = meta[meta['ticker'].isin(members)]
+        treemap = meta.merge(means, on='ticker').sort_values(
+            ['sector', 'industry', 'ticker']
+        )
+        return treemap.to_json(orient='records', double_precision=15).encode()
+
+    def health(self) -> bytes:
+        return json.dumps(
+            {
+                'generation': self.generation,
+                'cached': len(self.cache),
+                'hits': self.cache.hits,
+                'misses': self.cache.misses,
+            }
+        ).encode()
+
+
+def _error(message: str) -> bytes:
+    return json.dumps({'error': message}).encode()
+
+
+def _response(status: int, body: bytes, cached: bool, keep_alive: bool) -> bytes:
+    head = (
+        f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n'
+        'Content-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        f'X-Cache: {"hit" if cached else "miss"}\r\n'
+        f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+    )
+    return head.encode('latin-1') + body
+
+
+async def _serve_connection(
+    api: ReadAPI, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            keep_alive = not request_line.rstrip().endswith(b'HTTP/1.0')
+            while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'connection':
+                    keep_alive = value.strip().lower() == 'keep-alive'
+
+            parts = request_line.decode('latin-1').split()
+            if len(parts) != 3:
+                writer.write(_response(400, _error('Malformed request'), False, False))
+                break
+            method, target, _ = parts
+            if method != 'GET':
+                status, body, cached = 405, _error('Only GET is supported'), False
+            else:
+                url = urlsplit(target)
+                status, body, cached = await api.handle(url.path, parse_qs(url.query))
+            writer.write(_response(status, body, cached, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionResetError, BrokenPipeError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _poll_generation(api: ReadAPI, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(api.check_generation)
+        except Exception as e:
+            # e.g. the database is locked by a running ingest; try again next poll
+            logger.debug(f'Could not check the articles generation: {e}')
+
+
+async def start_server(
+    api: ReadAPI,
+    host: str = READ_API_HOST,
+    port: int = READ_API_PORT,
+    poll_interval: float = READ_API_POLL_INTERVAL,
+) -> tuple[asyncio.Server, asyncio.Task[None]]:
+    """Start serving `api`; returns the server and its generation polling task."""
+    server = await asyncio.start_server(
+        lambda r, w: _serve_connection(api, r, w), host, port
+    )
+    poller = asyncio.create_task(_poll_generation(api, poll_interval))
+    return server, poller
+
+
+async def serve(
+    host: str = READ_API_HOST,
+    port: int = READ_API_PORT,
+    dbm: DatabaseManager | None = None,
+) -> None:
+    """Run the read API until cancelled."""
+    server, poller = await start_server(ReadAPI(dbm), host, port)
+    logger.info(f'Read API listening on http://{host}:{port}')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        poller.cancel()
@@ -0,0 +1,145 @@
+"""
+Per-ticker checkpoint journal that lets an interrupted ingest run resume.
+
+`main.get_news` only writes to the database once every ticker is fetched, so a run
+that dies partway through (a crash, a runner timeout, a host answering with 429s)
+would lose everything fetched so far. A `RunJournal` appends one JSON line per
+ticker whose sources all answered, holding that ticker's staged articles, and
+fsyncs it before the next ticker is recorded:
+
+```
+runs/nifty_500-2025-06-30.jsonl
+    {"ticker": "TCS", "articles": {"ticker": [...], "headline": [...], ...}}
+    {"ticker": "INFY", "articles": {...}}
+```
+
+Opening the journal of an earlier run with the same run id (by default the
+universe and UTC date, see `default_run_id`) reads it back:
+`completed` holds the tickers to skip and `staged()` their articles, which are
+inserted with the newly fetched ones. A line cut short by a crash is dropped and
+that ticker fetched again. The journal is deleted once the articles are in the
+database, so the next run with that id starts fresh.
+
+```
+with RunJournal('nifty_500-2025-06-30') as journal:
+    todo = [t for t in tickers if t not in journal.completed]
+    ...
+    journal.record(ticker, articles)
+    ...
+    dbm.insert_articles(...)
+    journal.discard()
+```
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import UTC, datetime
+from types import TracebackType
+from typing import IO
+
+from loguru import logger
+
+from articles import ARTICLE_COLUMNS, ArticleBatch
+from config import RUN_JOURNAL_DIR
+
+
+def default_run_id(universe: str) -> str:
+    """One run id per universe and UTC day, so a rerun of a failed daily run resumes it."""
+    return f'{universe}-{datetime.now(UTC):%Y-%m-%d}'
+
+
+class RunJournal:
+    """Append-only journal of the tickers an ingest run has fetched."""
+
+    def __init__(self, run_id: str, directory: str = RUN_JOURNAL_DIR) -> None:
+        if not run_id or os.sep in run_id or run_id.startswith('.'):
+            raise ValueError(f'Invalid run id {run_id!r}')
+        self.run_id = run_id
+        self.path = os.path.join(directory, f'{run_id}.jsonl')
+        self.completed: set[str] = set()
+        self._staged = ArticleBatch()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        self._file: IO[str] | None = open(self.path, 'a', encoding='utf-8')
+        if self.completed:
+            logger.info(
+                f'Resuming run {run_id}: {len(self.completed)} tickers and '
+                f'{len(self._staged)} articles already fetched'
+            )
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('unterminated line')
+                    entry = json.loads(line)
+                    articles = entry['articles']
+                    columns = [articles[column] for column in ARTICLE_COLUMNS]
+                except (ValueError, KeyError, TypeError):
+                    # Only the last line can be cut short by a crash
+                    logger.warning(
+                        f'Dropping a partial entry at the end of {self.path}'
+                    )
+                    break
+                for column, values in zip(ARTICLE_COLUMNS, columns, strict=True):
+                    getattr(self._staged, column).extend(values)
+                self.completed.add(entry['ticker'])
+                valid_bytes += len(line)
+        # Later appends must start on a fresh line after the last complete entry
+        with open(self.path, 'r+b') as f:
+            f.truncate(valid_bytes)
+
+    def staged(self) -> ArticleBatch:
+        """Articles of every completed ticker, from this run and the earlier ones."""
+        with self._lock:
+            return ArticleBatch.concat([self._staged])
+
+    def record(self, ticker: str, articles: ArticleBatch) -> None:
+        """
+        Durably mark `ticker` complete with its fetched articles. Safe to call from
+        the fetch threads. A failed write is logged and the ticker left to a rerun.
+        """
+        line = json.dumps({'ticker': ticker, 'articles': articles.columns()}) + '\n'
+        with self._lock:
+            if self._file is None or ticker in self.completed:
+                return
+            try:
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                logger.error(f'Could not journal {ticker} for run {self.run_id}: {e}')
+                return
+            self.completed.add(ticker)
+            self._staged.extend(articles)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def discard(self) -> None:
+        """Close and delete the journal once its articles are in the database."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self) -> RunJournal:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,371 @@
+"""
+Long-running intraday ingest with news-velocity-based polling priority.
+
+The daily run polls every ticker once, whether it is a quiet smallcap or a large
+cap with dozens of headlines. The daemon here instead keeps one schedule entry per
+ticker and gives each a share of a fixed hourly request budget in proportion to
+its priority:
+
+```
+priority = (ewma_new_headlines_per_hour + SCHEDULER_RATE_PRIOR) * (1 + log10(1 + mCap))
+polls_per_hour(ticker) = budget_polls_per_hour * priority / sum(priorities)
+```
+
+clamped to [`SCHEDULER_MIN_INTERVAL`, `SCHEDULER_MAX_INTERVAL`]. Every poll
+updates the ticker's EWMA from the number of headlines that were not already in the
+database, so tickers that start producing news are polled more often within a few
+polls. A token bucket enforces the hourly budget on top of the schedule, since the
+interval clamps can otherwise push the total slightly over it.
+
+New articles are scored as soon as `SCHEDULER_SCORE_BATCH` are pending or the
+oldest has waited `SCHEDULER_SCORE_MAX_DELAY` seconds, reusing one loaded model.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import signal
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from loguru import logger
+
+import metrics
+import source_health
+from articles import ArticleBatch
+from config import (
+    SCHEDULER_MAX_INTERVAL,
+    SCHEDULER_MIN_INTERVAL,
+    SCHEDULER_RATE_ALPHA,
+    SCHEDULER_RATE_PRIOR,
+    SCHEDULER_REQUESTS_PER_HOUR,
+    SCHEDULER_SCORE_BATCH,
+    SCHEDULER_SCORE_MAX_DELAY,
+)
+
+# One poll queries every source in TickerNewsObject.news_sources
+REQUESTS_PER_POLL = 3
+
+
+@dataclass(slots=True)
+class TickerSchedule:
+    ticker: str
+    mcap_weight: float
+    rate: float
+    interval: float
+    next_due: float
+    last_polled: float | None = None
+    polls: int = 0
+    new_articles: int = 0
+
+
+class TokenBucket:
+    """Allows `rate_per_hour` tokens per hour with bursts of up to `capacity`."""
+
+    def __init__(
+        self,
+        rate_per_hour: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate_per_second = rate_per_hour / 3600
+        self.capacity = (
+            capacity if capacity is not None else max(1.0, rate_per_hour / 60)
+        )
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate_per_second
+        )
+        self.updated = now
+
+    def wait_time(self, n: float = 1) -> float:
+        """Seconds until `n` tokens are available."""
+        self._refill()
+        if self.tokens >= n:
+            return 0.0
+        return (n - self.tokens) / self.rate_per_second
+
+    def take(self, n: float = 1) -> None:
+        self._refill()
+        self.tokens -= n
+
+
+class PollScheduler:
+    """
+    Priority schedule over a fixed ticker universe. `peek()` returns the next due
+    ticker, `pop()` removes it, and `record_poll()` updates its rate and schedules
+    its next poll. Each ticker has exactly one heap entry at all times.
+    """
+
+    def __init__(
+        self,
+        mcaps: dict[str, float | None],
+        requests_per_hour: float = SCHEDULER_REQUESTS_PER_HOUR,
+        requests_per_poll: int = REQUESTS_PER_POLL,
+        min_interval: float = SCHEDULER_MIN_INTERVAL,
+        max_interval: float = SCHEDULER_MAX_INTERVAL,
+        rate_alpha: float = SCHEDULER_RATE_ALPHA,
+        rate_prior: float = SCHEDULER_RATE_PRIOR,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.polls_per_hour = requests_per_hour / requests_per_poll
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.rate_alpha = rate_alpha
+        self.rate_prior = rate_prior
+        self.clock = clock
+
+        known = [m for m in mcaps.values() if m is not None and not math.isnan(m)]
+        default_mcap = sorted(known)[len(known) // 2] if known else 0.0
+        self.states: dict[str, TickerSchedule] = {}
+        for ticker, mcap in mcaps.items():
+            if mcap is None or math.isnan(mcap):
+                mcap = default_mcap
+            self.states[ticker] = TickerSchedule(
+                ticker=ticker,
+                mcap_weight=1 + math.log10(1 + max(mcap, 0.0)),
+                rate=0.0,
+                interval=0.0,
+                next_due=0.0,
+            )
+        self.total_priority = sum(self.priority(s) for s in self.states.values())
+
+        # The first sweep visits every ticker once, highest priority first, at the
+        # pace the budget allows
+        now = clock()
+        spacing = 3600 / self.polls_per_hour
+        ranked = sorted(self.states.values(), key=self.priority, reverse=True)
+        self._heap: list[tuple[float, str]] = []
+        for rank, state in enumerate(ranked):
+            state.interval = self.interval_for(state)
+            state.next_due = now + rank * spacing
+            self._heap.append((state.next_due, state.ticker))
+        heapq.heapify(self._heap)
+
+    def priority(self, state: TickerSchedule) -> float:
+        return (state.rate + self.rate_prior) * state.mcap_weight
+
+    def interval_for(self, state: TickerSchedule) -> float:
+        polls_per_hour = (
+            self.polls_per_hour * self.priority(state) / self.total_priority
+        )
+        return min(self.max_interval, max(self.min_interval, 3600 / polls_per_hour))
+
+    def peek(self) -> tuple[str, float]:
+        """The next ticker to poll and the seconds until it is due (<= 0 if due)."""
+        next_due, ticker = self._heap[0]
+        return ticker, next_due - self.clock()
+
+    def pop(self) -> str:
+        return heapq.heappop(self._heap)[1]
+
+    def record_poll(self, ticker: str, new_articles: int) -> float:
+        """
+        Fold a poll's count of new headlines into the ticker's rate, reschedule it
+        and return its new interval. Must follow `pop()` for the same ticker.
+        """
+        state = self.states[ticker]
+        now = self.clock()
+        # The first poll of a ticker returns its whole backlog, which says nothing
+        # about how fast news is arriving, so only later polls update the rate
+        if state.last_polled is not None:
+            hours = max((now - state.last_polled) / 3600, 1e-9)
+            old_priority = self.priority(state)
+            state.rate = (
+                self.rate_alpha * (new_articles / hours)
+                + (1 - self.rate_alpha) * state.rate
+            )
+            self.total_priority += self.priority(state) - old_priority
+
+        state.last_polled = now
+        state.polls += 1
+        state.new_articles += new_articles
+        state.interval = self.interval_for(state)
+        state.next_due = now + state.interval
+        heapq.heappush(self._heap, (state.next_due, ticker))
+        return state.interval
+
+
+class IntradayDaemon:
+    """
+    Polls tickers in schedule order, stores headlines that are new, and scores
+    pending articles in small batches. `fetch`, `store` and `score` default to the
+    live pipeline; they, `clock` and `sleep` can be replaced for testing.
+    """
+
+    def __init__(
+        self,
+        mcaps: dict[str, float | None],
+        requests_per_hour: float = SCHEDULER_REQUESTS_PER_HOUR,
+        score_batch: int = SCHEDULER_SCORE_BATCH,
+        score_max_delay: float = SCHEDULER_SCORE_MAX_DELAY,
+        fetch: Callable[[str], ArticleBatch] | None = None,
+        store: Callable[[str, ArticleBatch], int] | None = None,
+        score: Callable[[int], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] | None = None,
+        **scheduler_kwargs: Any,
+    ) -> None:
+        self.scheduler = PollScheduler(
+            mcaps, requests_per_hour=requests_per_hour, clock=clock, **scheduler_kwargs
+        )
+        self.bucket = TokenBucket(requests_per_hour, clock=clock)
+        self.score_batch = score_batch
+        self.score_max_delay = score_max_delay
+        self.fetch = fetch or _fetch_ticker_news
+        self.store = store or _store_new_articles
+        self.score = score or _make_scorer()
+        self.clock = clock
+        self.pending = 0
+        self.pending_since: float | None = None
+        self.stop_event = threading.Event()
+        # Waiting on the stop event lets stop() interrupt a long sleep
+        self.sleep = sleep or self.stop_event.wait
+
+    def poll_once(self) -> None:
+        self.bucket.take(REQUESTS_PER_POLL)
+        ticker = self.scheduler.pop()
+        try:
+            articles = self.fetch(ticker)
+            new_articles = self.store(ticker, articles) if articles else 0
+        except Exception as e:
+            logger.error(f'Intraday poll failed for {ticker}: {e}')
+            new_articles = 0
+        interval = self.scheduler.record_poll(ticker, new_articles)
+        metrics.incr('scheduler_polls')
+        metrics.incr('scheduler_new_articles', new_articles)
+        logger.info(
+            f'Polled {ticker}: {new_articles} new, next poll in {interval / 60:.0f} min'
+        )
+
+        if new_articles:
+            if self.pending == 0:
+                self.pending_since = self.clock()
+            self.pending += new_articles
+
+    def score_due(self) -> bool:
+        if self.pending == 0 or self.pending_since is None:
+            return False
+        return (
+            self.pending >= self.score_batch
+            or self.clock() - self.pending_since >= self.score_max_delay
+        )
+
+    def score_pending(self) -> None:
+        try:
+            self.score(self.pending)
+        except Exception as e:
+            logger.error(f'Intraday scoring failed: {e}')
+        self.pending = 0
+        self.pending_since = None
+
+    def run(self, max_polls: int | None = None) -> None:
+        """Run until `stop()` is called or `max_polls` polls have been made."""
+        polls = 0
+        while not self.stop_event.is_set():
+            if max_polls is not None and polls >= max_polls:
+                break
+            if self.score_due():
+                self.score_pending()
+                continue
+
+            _ticker, due_in = self.scheduler.peek()
+            wait = max(due_in, self.bucket.wait_time(REQUESTS_PER_POLL))
+            if wait > 0:
+                # Wake up early if scoring falls due while waiting
+                if self.pending_since is not None:
+                    score_in = self.pending_since + self.score_max_delay - self.clock()
+                    wait = min(wait, max(score_in, 0.0))
+                self.sleep(wait)
+                continue
+
+            self.poll_once()
+            polls += 1
+
+        if self.pending:
+            self.score_pending()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+
+def _fetch_ticker_news(ticker: str) -> ArticleBatch:
+    from news_fetcher import TickerNewsObject
+
+    return TickerNewsObject(ticker).collect_news()
+
+
+def _store_new_articles(ticker: str, articles: ArticleBatch) -> int:
+    """Insert the headlines not already stored for `ticker`; return how many."""
+    from database import DatabaseManager
+
+    # Publishing a snapshot copies the whole database, so readers see new headlines
+    # with the next scoring run's snapshot rather than after every poll
+    dbm = DatabaseManager(publish_snapshots=False)
+    articles_df = articles.to_dataframe().dropna(subset=['headline'])
+    articles_df = articles_df.drop_duplicates(subset=['ticker', 'headline'])
+    existing = dbm.get_existing_headlines(ticker, articles_df['headline'].tolist())
+    articles_df = articles_df[~articles_df['headline'].isin(existing)]
+    if articles_df.empty:
+        return 0
+    dbm.insert_articles(articles_df, has_sentiment=False)
+    return int(articles_df.shape[0])
+
+
+def _make_scorer() -> Callable[[int], None]:
+    nlp: Any = None
+
+    def score(n: int) -> None:
+        nonlocal nlp
+        import utils
+        from main import compute_and_update_sentiment
+
+        if nlp is None:
+            nlp = utils.load_sentiment_pipeline()
+        compute_and_update_sentiment(n=n, nlp=nlp)
+
+    return score
+
+
+def run_daemon(
+    universe: str,
+    requests_per_hour: float = SCHEDULER_REQUESTS_PER_HOUR,
+    max_polls: int | None = None,
+) -> None:
+    """Build a daemon for `universe` from the database and run it until interrupted."""
+    from constituents import universe_tickers
+    from database import DatabaseManager
+    from model_bundle import check_bundle
+
+    # Scoring loads the model bundle lazily; fail now rather than after the first poll
+    check_bundle()
+    dbm = DatabaseManager()
+    tickers: list[str] = universe_tickers(universe, dbm)
+    ticker_meta = dbm.get_ticker_metadata()
+    known_mcaps = dict(zip(ticker_meta['ticker'], ticker_meta['mCap'], strict=True))
+    mcaps = {ticker: known_mcaps.get(ticker) for ticker in tickers}
+
+    daemon = IntradayDaemon(mcaps, requests_per_hour=requests_per_hour)
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    logger.info(
+        f'Starting intraday daemon for {len(tickers)} tickers in {universe} '
+        f'with {requests_per_hour:.0f} requests/hour'
+    )
+    try:
+        daemon.run(max_polls=max_polls)
+    except KeyboardInterrupt:
+        logger.info('Stopping intraday daemon')
+        daemon.stop()
+        if daemon.pending:
+            daemon.score_pending()
+    finally:
+        source_health.log_summary()
@@ -0,0 +1,272 @@
+"""
+finBERT scoring with a fast tokenizer and tokenization overlapped with inference.
+
+The HF `pipeline` tokenizes each batch with the pure-Python `BertTokenizer` and
+only then runs the forward pass, so the two never overlap. `SentimentScorer`
+instead:
+
+- uses the Rust-backed `BertTokenizerFast`, which encodes a whole batch in one call
+  and releases the GIL while doing so;
+- tokenizes batch `i + 1` on a background thread while the model runs batch `i`
+  (torch also releases the GIL during the forward pass);
+- caches token ids per headline, since the same headlines are scored again after
+  re-scrapes and when rescoring;
+- orders headlines by length before batching, so each batch pads to a similar
+  length, and restores the caller's order at the end.
+
+`predict_logits` returns the raw logits as one array; `softmax` and `scores_frame`
+turn them into the stored score columns with NumPy, without building a dict per
+headline. Calling a scorer still returns the label/score dicts of the pipeline
+with `top_k=None`, for callers that expect that shape.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+import metrics
+from config import (
+    BATCH_SIZE,
+    SENTIMENT_MODEL_NAME,
+    TOKEN_CACHE_SIZE,
+    UNVERSIONED_SCORES,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Score columns stored per article, in the order `scores_frame` returns them
+SENTIMENT_LABELS = ('Positive', 'Negative', 'Neutral')
+
+# Batches tokenized ahead of the one being run through the model
+PREFETCH_BATCHES = 2
+
+
+class TokenCache:
+    """Bounded LRU map from headline to token ids. Not thread-safe."""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._ids: OrderedDict[str, list[int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, headline: str) -> list[int] | None:
+        ids = self._ids.get(headline)
+        if ids is not None:
+            self._ids.move_to_end(headline)
+        return ids
+
+    def put(self, headline: str, ids: list[int]) -> None:
+        if self.max_size <= 0:
+            return
+        self._ids[headline] = ids
+        self._ids.move_to_end(headline)
+        while len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+
+
+class SentimentScorer:
+    """
+    Batched finBERT inference over a model and fast tokenizer. Use
+    `from_pretrained()` to load the default model.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        tokenizer: Any,
+        batch_size: int = BATCH_SIZE,
+        overlap: bool = True,
+        cache_size: int = TOKEN_CACHE_SIZE,
+        version: str = UNVERSIONED_SCORES,
+    ) -> None:
+        self.model = model
+        # Recorded with every score, see rescore.py
+        self.version = version
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self.overlap = overlap
+        self.cache = TokenCache(cache_size)
+        self.max_length: int = min(getattr(tokenizer, 'model_max_length', 512), 512)
+        self.pad_token_id: int = tokenizer.pad_token_id or 0
+        id2label: dict[int, str] = model.config.id2label
+        self.labels: list[str] = [id2label[i] for i in range(len(id2label))]
+
+    @classmethod
+    def from_pretrained(
+        cls, model_name: str = SENTIMENT_MODEL_NAME, **kwargs: Any
+    ) -> SentimentScorer:
+        from transformers.models.bert import (
+            BertForSequenceClassification,
+            BertTokenizerFast,
+        )
+
+        model = BertForSequenceClassification.from_pretrained(
+            pretrained_model_name_or_path=model_name,
+            num_labels=3,
+            use_safetensors=True,  # Use safe tensors
+        )
+        model.eval()
+        tokenizer = BertTokenizerFast.from_pretrained(
+            pretrained_model_name_or_path=model_name
+        )
+        return cls(model, tokenizer, **{'version': model_name, **kwargs})
+
+    def encode(self, headlines: Sequence[str]) -> list[list[int]]:
+        """Token ids for each headline, tokenizing only those not in the cache."""
+        ids: list[list[int] | None] = [self.cache.get(h) for h in headlines]
+        missing = [i for i, cached in enumerate(ids) if cached is None]
+        metrics.incr('token_cache_hits', len(headlines) - len(missing))
+        metrics.incr('token_cache_misses', len(missing))
+        if missing:
+            encoded = self.tokenizer(
+                [headlines[i] for i in missing],
+                truncation=True,
+                max_length=self.max_length,
+                padding=False,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+            )['input_ids']
+            for i, token_ids in zip(missing, encoded, strict=True):
+                ids[i] = token_ids
+                self.cache.put(headlines[i], token_ids)
+        return ids  # type: ignore[return-value]
+
+    def _pad(self, ids: list[list[int]]) -> tuple[np.ndarray, np.ndarray]:
+        width = max(len(token_ids) for token_ids in ids)
+        input_ids = np.full((len(ids), width), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(ids), width), dtype=np.int64)
+        for row, token_ids in enumerate(ids):
+            input_ids[row, : len(token_ids)] = token_ids
+            attention_mask[row, : len(token_ids)] = 1
+        metrics.observe('batch_padding_ratio', 1 - attention_mask.mean())
+        return input_ids, attention_mask
+
+    def _tokenized_batches(
+        self, headlines: Sequence[str], order: np.ndarray, batch_size: int
+    ) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        for start in range(0, len(order), batch_size):
+            positions = order[start : start + batch_size]
+            with metrics.span('tokenize'):
+                ids = self.encode([headlines[i] for i in positions])
+                input_ids, attention_mask = self._pad(ids)
+            yield positions, input_ids, attention_mask
+
+    def _prefetched(
+        self, batches: Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]
+    ) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Run `batches` on a background thread, `PREFETCH_BATCHES` ahead."""
+        done = object()
+        buffer: queue.Queue[Any] = queue.Queue(maxsize=PREFETCH_BATCHES)
+        cancelled = threading.Event()
+
+        def produce() -> None:
+            try:
+                for batch in batches:
+                    if cancelled.is_set():
+                        return
+                    buffer.put(batch)
+                buffer.put(done)
+            except BaseException as e:  # re-raised on the consuming thread
+                buffer.put(e)
+
+        producer = threading.Thread(target=produce, name='tokenizer', daemon=True)
+        producer.start()
+        try:
+            while (item := buffer.get()) is not done:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+            # Unblock a producer waiting on a full buffer so it can exit
+            while producer.is_alive():
+                try:
+                    buffer.get_nowait()
+                except queue.Empty:
+                    producer.join(timeout=0.01)
+
+    def predict_logits(
+        self, headlines: Sequence[str], batch_size: int | None = None
+    ) -> np.ndarray:
+        """
+        Raw model logits as an array of shape `(len(headlines), len(labels))`,
+        columns in `labels` order and rows in the order given.
+        """
+        import torch
+
+        logits = np.zeros((len(headlines), len(self.labels)), dtype=np.float32)
+        if not headlines:
+            return logits
+
+        # Character length is a cheap proxy for token length that is known before
+        # tokenizing, which keeps the sort compatible with the prefetch thread
+        order = np.argsort([len(h) for h in headlines], kind='stable')
+        batches = self._tokenized_batches(
+            headlines, order, batch_size or self.batch_size
+        )
+        if self.overlap:
+            batches = self._prefetched(batches)
+
+        with torch.inference_mode():
+            for positions, input_ids, attention_mask in batches:
+                with metrics.span('inference'):
+                    logits[positions] = self.model(
+                        input_ids=torch.from_numpy(input_ids),
+                        attention_mask=torch.from_numpy(attention_mask),
+                    ).logits.numpy()
+        return logits
+
+    def predict_proba(
+        self, headlines: Sequence[str], batch_size: int | None = None
+    ) -> np.ndarray:
+        """Class probabilities, shaped and ordered like `predict_logits`."""
+        return softmax(self.predict_logits(headlines, batch_size=batch_size))
+
+    def __call__(
+        self, headlines: Sequence[str], batch_size: int | None = None
+    ) -> list[list[dict[str, Any]]]:
+        """Pipeline-compatible output: label/score dicts for every label."""
+        return label_dicts(
+            self.predict_proba(headlines, batch_size=batch_size), self.labels
+        )
+
+
+def label_dicts(probs: np.ndarray, labels: Sequence[str]) -> list[list[dict[str, Any]]]:
+    """Rows of a probability matrix as the HF pipeline's label/score dicts."""
+    return [
+        [
+            {'label': label, 'score': float(score)}
+            for label, score in zip(labels, row, strict=True)
+        ]
+        for row in probs
+    ]
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Row-wise softmax, shifted by the row max so large logits don't overflow."""
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+def scores_frame(probs: np.ndarray, labels: Sequence[str]) -> pd.DataFrame:
+    """
+    Positive/Negative/Neutral/compound columns from a probability matrix with
+    columns in `labels` order. compound is the Positive score when it beats
+    Negative and the negated Negative score otherwise, rounded to 4 places.
+    """
+    import pandas as pd
+
+    columns = {label: probs[:, labels.index(label)] for label in SENTIMENT_LABELS}
+    positive, negative = columns['Positive'], columns['Negative']
+    compound = np.where(positive > negative, positive, -negative)
+    columns['compound'] = np.clip(np.round(compound.astype(float), 4), -1, 1)
+    return pd.DataFrame(columns)
@@ -0,0 +1,247 @@
+"""
+Constant-time date-range sentiment from per-ticker prefix sums.
+
+`sentiment_prefix` in DuckDB holds, for every ticker and every day it has scored
+articles on, the running totals through that day of the article count and the
+positive, negative, neutral and compound scores. `DatabaseManager.insert_articles`
+keeps it current in the same transaction as the insert: the change each insert
+makes per (ticker, day), net of any scores it replaces, is added to that day's row
+and every later one, stamped with a new `version`.
+
+`SentimentPrefix` mirrors the table as a dense NumPy array over a day grid:
+
+```
+cum[t, i] = totals of ticker t over the days before origin + i
+totals(t, start, end) = cum[t, end - origin + 1] - cum[t, start - origin]
+```
+
+so the mean sentiment of a ticker over any range is two lookups and a division.
+Sectors and industries get the same arrays summed over their members, so a group
+mean costs the same. `sync()` pulls only the rows with a newer version and rewrites
+the affected tail of each changed ticker (and its groups); a full rebuild of the
+table (`rebuild_sentiment_prefix`) makes it reload everything.
+
+Sector and industry membership is read from `ticker_meta` on `load()`; tickers
+whose metadata arrives later join their groups at the next `load()`.
+"""
+
+from __future__ import annotations
+
+import threading
+from datetime import date
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from config import GET_DATA, SENTIMENT_PREFIX_BUILT_KEY
+from database import DatabaseManager
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FIELDS = ('articles', 'positive', 'negative', 'neutral', 'compound')
+COMPOUND = FIELDS.index('compound')
+GROUP_LEVELS = ('sector', 'industry')
+# Days added past the last known day when the grid has to grow, to grow rarely
+GROW_DAYS = 32
+
+
+class SentimentPrefix:
+    """In-memory prefix sums over `sentiment_prefix`. Use `load()` to build one."""
+
+    def __init__(self, dbm: DatabaseManager) -> None:
+        self.dbm = dbm
+        self.version = 0
+        self.built: str | None = None
+        self.origin = date.today()
+        self.tickers: list[str] = []
+        self.rows: dict[str, int] = {}
+        # (tickers, days + 1, FIELDS)
+        self.cum = np.zeros((0, 1, len(FIELDS)))
+        self.meta: pd.DataFrame | None = None
+        # level -> group name -> row of group_cum[level]
+        self.groups: dict[str, dict[str, int]] = {}
+        # level -> group row of each ticker row, -1 if the ticker has no metadata
+        self.membership: dict[str, np.ndarray] = {}
+        self.group_cum: dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, dbm: DatabaseManager | None = None) -> SentimentPrefix:
+        prefix = cls(dbm or DatabaseManager())
+        prefix.reload()
+        return prefix
+
+    @property
+    def days(self) -> int:
+        return self.cum.shape[1] - 1
+
+    def reload(self) -> None:
+        """Rebuild the arrays from the whole table, building the table if needed."""
+        built = self.dbm.get_state(SENTIMENT_PREFIX_BUILT_KEY)
+        if built is None:
+            self.dbm.rebuild_sentiment_prefix()
+            built = self.dbm.get_state(SENTIMENT_PREFIX_BUILT_KEY)
+        with self.dbm.get_connection() as conn:
+            rows = conn.execute(GET_DATA['sentiment_prefix_since'], [0]).fetchnumpy()
+            meta = conn.execute(GET_DATA['ticker_meta']).fetchdf()
+
+        tickers = sorted(set(rows['ticker'].tolist()) | set(meta['ticker']))
+        days = rows['day'].astype('datetime64[D]')
+        origin = days.min().item() if len(days) else date.today()
+        last = max(days.max().item() if len(days) else origin, date.today())
+        cum = np.zeros((len(tickers), (last - origin).days + 2, len(FIELDS)))
+        row_of = {ticker: i for i, ticker in enumerate(tickers)}
+        if len(days):
+            t = np.array([row_of[ticker] for ticker in rows['ticker']])
+            values = np.stack([rows[f].astype(float) for f in FIELDS], axis=1)
+            # Back from running totals to per-day totals, then cumsum onto the grid
+            daily = values.copy()
+            same = t[1:] == t[:-1]
+            daily[1:][same] -= values[:-1][same]
+            increments = np.zeros_like(cum)
+            idx = (days - np.datetime64(origin, 'D')).astype(int) + 1
+            np.add.at(increments, (t, idx), daily)
+            cum = np.cumsum(increments, axis=1)
+
+        with self._lock:
+            self.built = built
+            self.version = int(rows['version'].max()) if len(days) else 0
+            self.origin = origin
+            self.tickers = tickers
+            self.rows = row_of
+            self.cum = cum
+            self.meta = meta
+            self._build_groups()
+
+    def _build_groups(self) -> None:
+        assert self.meta is not None
+        for level in GROUP_LEVELS:
+            names = sorted(self.meta[level].dropna().unique().tolist())
+            self.groups[level] = {name: i for i, name in enumerate(names)}
+            membership = np.full(len(self.tickers), -1)
+            for ticker, name in zip(self.meta['ticker'], self.meta[level], strict=True):
+                if name in self.groups[level]:
+                    membership[self.rows[ticker]] = self.groups[level][name]
+            self.membership[level] = membership
+            group_cum = np.zeros((len(names),) + self.cum.shape[1:])
+            member_rows = membership >= 0
+            np.add.at(group_cum, membership[member_rows], self.cum[member_rows])
+            self.group_cum[level] = group_cum
+
+    def sync(self) -> int:
+        """
+        Apply rows written since the last load or sync.
+
+        Returns:
+            number of changed rows applied
+        """
+        if self.dbm.get_state(SENTIMENT_PREFIX_BUILT_KEY) != self.built:
+            self.reload()
+            return -1
+        with self.dbm.get_connection() as conn:
+            rows = conn.execute(
+                GET_DATA['sentiment_prefix_since'], [self.version]
+            ).fetchnumpy()
+        if not len(rows['ticker']):
+            return 0
+        days = rows['day'].astype('datetime64[D]')
+        if days.min().item() < self.origin:
+            self.reload()
+            return len(days)
+
+        values = np.stack([rows[f].astype(float) for f in FIELDS], axis=1)
+        idx = (days - np.datetime64(self.origin, 'D')).astype(int) + 1
+        tickers = rows['ticker']
+        with self._lock:
+            if idx.max() > self.days:
+                self._grow(int(idx.max()) + GROW_DAYS)
+            # A write changes every row of a ticker from its earliest delta onwards,
+            # so each ticker's changed rows are the tail of its series
+            starts = np.flatnonzero(np.r_[True, tickers[1:] != tickers[:-1]])
+            ends = np.r_[starts[1:], len(tickers)]
+            for start, end in zip(starts, ends, strict=True):
+                self._apply_tail(str(tickers[start]), idx[start:end], values[start:end])
+            self.version = int(rows['version'].max())
+        return len(days)
+
+    def _grow(self, days: int) -> None:
+        def pad(a: np.ndarray) -> np.ndarray:
+            return np.pad(a, ((0, 0), (0, days - a.shape[1] + 1), (0, 0)), mode='edge')
+
+        self.cum = pad(self.cum)
+        for level in GROUP_LEVELS:
+            self.group_cum[level] = pad(self.group_cum[level])
+
+    def _apply_tail(self, ticker: str, idx: np.ndarray, values: np.ndarray) -> None:
+        row = self.rows.get(ticker)
+        if row is None:
+            row = self.rows[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+            self.cum = np.concatenate([self.cum, np.zeros((1,) + self.cum.shape[1:])])
+            for level in GROUP_LEVELS:
+                self.membership[level] = np.r_[self.membership[level], -1]
+        # Each changed running total holds until the next one, the last to the end
+        lengths = np.diff(np.r_[idx, self.days + 1])
+        tail = np.repeat(values, lengths, axis=0)
+        change = tail - self.cum[row, idx[0] :]
+        self.cum[row, idx[0] :] = tail
+        for level in GROUP_LEVELS:
+            group = self.membership[level][row]
+            if group >= 0:
+                self.group_cum[level][group, idx[0] :] += change
+
+    def _bounds(self, start: date, end: date) -> tuple[int, int]:
+        lo = min(max((start - self.origin).days, 0), self.days)
+        hi = min(max((end - self.origin).days + 1, 0), self.days)
+        return lo, hi
+
+    def totals(self, ticker: str, start: date, end: date) -> np.ndarray:
+        """Article count and score sums of `ticker` over [start, end], per FIELDS."""
+        with self._lock:
+            row = self.rows.get(ticker)
+            if row is None:
+                return np.zeros(len(FIELDS))
+            lo, hi = self._bounds(start, end)
+            return self.cum[row, hi] - self.cum[row, lo]
+
+    def group_totals(self, level: str, name: str, start: date, end: date) -> np.ndarray:
+        """Totals over [start, end] of every ticker in a sector or industry."""
+        with self._lock:
+            group = self.groups[level].get(name)
+            if group is None:
+                return np.zeros(len(FIELDS))
+            lo, hi = self._bounds(start, end)
+            return self.group_cum[level][group, hi] - self.group_cum[level][group, lo]
+
+    def mean(self, ticker: str, start: date, end: date) -> float | None:
+        """Mean compound sentiment of `ticker` over [start, end], None without articles."""
+        return _mean_compound(self.totals(ticker, start, end))
+
+    def group_mean(self, level: str, name: str, start: date, end: date) -> float | None:
+        return _mean_compound(self.group_totals(level, name, start, end))
+
+    def ticker_means(self, start: date, end: date) -> pd.DataFrame:
+        """
+        Article count and mean scores over [start, end] of every ticker with scored
+        articles in the range.
+        """
+        import pandas as pd
+
+        with self._lock:
+            lo, hi = self._bounds(start, end)
+            totals = self.cum[:, hi] - self.cum[:, lo]
+            tickers = list(self.tickers)
+        # Totals can carry float noise around zero once replaced scores cancel out
+        articles = np.rint(totals[:, 0]).astype(int)
+        has_articles = articles > 0
+        means = totals[has_articles, 1:] / articles[has_articles, None]
+        frame = pd.DataFrame(means, columns=list(FIELDS[1:]))
+        frame.insert(0, 'articles', articles[has_articles])
+        frame.insert(0, 'ticker', np.array(tickers, dtype=object)[has_articles])
+        return frame
+
+
+def _mean_compound(totals: np.ndarray) -> float | None:
+    articles = round(float(totals[0]))
+    return float(totals[COMPOUND]) / articles if articles > 0 else None
@@ -0,0 +1,214 @@
+"""
+Asyncio orchestrator for the index-generation agents.
+
+A pipeline is a list of `Step`s, each naming the steps whose results it needs.
+`run_agents` starts every step as soon as those have finished, so independent
+steps run concurrently, and yields `AgentEvent`s as they happen:
+
+- `partial`: something a running step passed to its `emit` callback, such as a
+  chunk of the rewritten query as the model streams it;
+- `done`, `failed` or `timeout`: the step's result, error or expiry, with its
+  latency in seconds;
+- `skipped`: a step that did not run because a step it needs did not finish.
+
+Every step is cut off at its own `timeout` or at the pipeline's `deadline`,
+whichever comes first, so the whole run ends by the deadline. A step receives the
+pipeline inputs and the results so far as a read-only mapping. The agents in
+`llm_agent` are blocking, so `index_agent_steps` runs them in threads (a thread
+that times out runs on in the background, but its result is dropped):
+
+```
+async for event in run_agents(index_agent_steps(), {'query': query}, deadline=60):
+    print(event.step, event.kind, event.value, event.latency)
+```
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from llm_client import LLMClient
+
+# Longest a single agent call may take
+AGENT_STEP_TIMEOUT = 30.0
+# Longest a whole pipeline run may take
+AGENT_DEADLINE = 90.0
+
+PARTIAL = 'partial'
+DONE = 'done'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+SKIPPED = 'skipped'
+
+Emit = Callable[[Any], None]
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    run: Callable[[Mapping[str, Any], Emit], Awaitable[Any]]
+    after: tuple[str, ...] = ()
+    timeout: float = AGENT_STEP_TIMEOUT
+
+
+@dataclass(frozen=True)
+class AgentEvent:
+    step: str
+    kind: str
+    value: Any = None
+    error: str | None = None
+    # Seconds from the step's start to its result, for all but partial events
+    latency: float | None = None
+
+
+def check_steps(steps: list[Step], inputs: Mapping[str, Any]) -> None:
+    """Raise ValueError unless every dependency is a step or input and none is circular."""
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names) or set(names) & set(inputs):
+        raise ValueError(f'Step names must be unique and differ from inputs: {names}')
+    ready = set(inputs)
+    remaining = list(steps)
+    while remaining:
+        runnable = [step for step in remaining if set(step.after) <= ready]
+        if not runnable:
+            unresolved = {step.name: step.after for step in remaining}
+            raise ValueError(f'Unknown or circular step dependencies: {unresolved}')
+        ready.update(step.name for step in runnable)
+        remaining = [step for step in remaining if step not in runnable]
+
+
+async def run_agents(
+    steps: list[Step],
+    inputs: Mapping[str, Any],
+    deadline: float = AGENT_DEADLINE,
+) -> AsyncIterator[AgentEvent]:
+    """Run `steps` on `inputs`, yielding their events as they happen."""
+    check_steps(steps, inputs)
+    loop = asyncio.get_running_loop()
+    end = loop.time() + deadline
+    events: asyncio.Queue[AgentEvent] = asyncio.Queue()
+    results: dict[str, Any] = dict(inputs)
+    view = MappingProxyType(results)
+    status = {name: DONE for name in inputs}
+    waiting = list(steps)
+    running: set[asyncio.Task[None]] = set()
+
+    async def run_step(step: Step) -> None:
+        def emit(value: Any) -> None:
+            # Agents running in threads emit too, so always go through the loop
+            loop.call_soon_threadsafe(
+                events.put_nowait, AgentEvent(step.name, PARTIAL, value)
+            )
+
+        started = loop.time()
+        try:
+            async with asyncio.timeout(min(started + step.timeout, end) - started):
+                value = await step.run(view, emit)
+        except TimeoutError:
+            event = AgentEvent(step.name, TIMEOUT, error='timed out')
+        except Exception as e:
+            event = AgentEvent(step.name, FAILED, error=f'{type(e).__name__}: {e}')
+        else:
+            results[step.name] = value
+            event = AgentEvent(step.name, DONE, value)
+        latency = loop.time() - started
+        logger.info(f'Agent step {step.name} {event.kind} in {latency:.2f}s')
+        # Queued after the step's partial events, which call_soon already scheduled
+        loop.call_soon(
+            events.put_nowait,
+            AgentEvent(event.step, event.kind, event.value, event.error, latency),
+        )
+
+    def start_ready() -> None:
+        # Skipping a step can make its dependents skippable, so repeat until stable
+        changed = True
+        while changed:
+            changed = False
+            for step in list(waiting):
+                needed = [status.get(name) for name in step.after]
+                if all(kind == DONE for kind in needed):
+                    task = asyncio.create_task(run_step(step))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+                elif any(kind not in (None, DONE) for kind in needed):
+                    status[step.name] = SKIPPED
+                    missing = [
+                        n for n in step.after if status.get(n) not in (None, DONE)
+                    ]
+                    events.put_nowait(
+                        AgentEvent(
+                            step.name, SKIPPED, error=f'needs {", ".join(missing)}'
+                        )
+                    )
+                else:
+                    continue
+                waiting.remove(step)
+                changed = True
+
+    start_ready()
+    try:
+        while running or waiting or not events.empty():
+            event = await events.get()
+            if event.kind != PARTIAL:
+                status[event.step] = event.kind
+                start_ready()
+            yield event
+    finally:
+        # The caller stopped early: do not leave agents running
+        for task in running:
+            task.cancel()
+
+
+def index_agent_steps(
+    client: LLMClient | None = None,
+    step_timeout: float = AGENT_STEP_TIMEOUT,
+) -> list[Step]:
+    """
+    The PRD flow: rewrite the query, search for matching stocks, then turn the
+    search response into structured rows. Each agent runs in a thread; the
+    rewrite streams its chunks as partial events.
+    """
+    import llm_agent
+
+    async def rewrite(results: Mapping[str, Any], emit: Emit) -> str:
+        return await asyncio.to_thread(
+            llm_agent.user_query_optimizer_agent,
+            results['query'],
+            on_chunk=emit,
+            client=client,
+        )
+
+    async def search(results: Mapping[str, Any], emit: Emit) -> Any:
+        return await asyncio.to_thread(
+            llm_agent.google_search_agent, results['rewrite']
+        )
+
+    async def structured(results: Mapping[str, Any], emit: Emit) -> Any:
+        return await asyncio.to_thread(
+            llm_agent.structured_output_agent, results['search']
+        )
+
+    return [
+        Step('rewrite', rewrite, timeout=step_timeout),
+        Step('search', search, after=('rewrite',), timeout=step_timeout),
+        Step('structured', structured, after=('search',), timeout=step_timeout),
+    ]
+
+
+async def _main(query: str) -> None:
+    async for event in run_agents(index_agent_steps(), {'query': query}):
+        if event.kind == PARTIAL:
+            print(event.value, end='', flush=True)
+        else:
+            print(f'\n[{event.step}: {event.kind} in {event.latency or 0:.2f}s]')
+
+
+if __name__ == '__main__':
+    asyncio.run(_main(input('Enter your query: ')))
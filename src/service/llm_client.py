@@ -0,0 +1,242 @@
+"""
+Shared Gemini client for the index-generation agents.
+
+`LLMClient` wraps one `genai.Client`, so every agent call reuses its HTTP
+connection pool, and adds three things the agents would otherwise each need:
+
+- an on-disk LRU cache of responses, keyed by model, normalised prompt (case and
+  whitespace folded) and generation config, in a small SQLite file that separate
+  processes can share;
+- coalescing: a call identical to one already in flight waits for that call's
+  response instead of sending its own request;
+- retries of overloaded or rate-limited requests (429, 5xx, connection errors)
+  with full-jitter exponential backoff. A stream that fails after text has been
+  passed to `on_chunk` is not retried, as the caller has already shown it.
+
+```
+client = get_client()
+rewrite = client.generate_text(
+    'gemini-2.5-flash', query, config, on_chunk=lambda text: print(text, end='')
+)
+```
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from os import getenv
+
+import httpx
+from google import genai
+from google.genai import errors, types
+from loguru import logger
+
+# Response cache, shared by every process using the agents
+LLM_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'cache',
+    'llm_responses.sqlite',
+)
+# Least recently used responses beyond this many are evicted
+LLM_CACHE_ENTRIES = 1000
+# Retries of a failed request, waiting up to base * 2^attempt seconds (capped)
+LLM_MAX_RETRIES = 5
+LLM_BACKOFF_BASE = 1.0
+LLM_BACKOFF_MAX = 30.0
+
+
+def normalize_prompt(prompt: str) -> str:
+    return ' '.join(prompt.casefold().split())
+
+
+def cache_key(
+    model: str, prompt: str, config: types.GenerateContentConfig | None
+) -> str:
+    config_json = (
+        config.model_dump(mode='json', exclude_none=True)
+        if config is not None
+        else None
+    )
+    payload = json.dumps([model, normalize_prompt(prompt), config_json], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, errors.ServerError | httpx.TransportError):
+        return True
+    return isinstance(error, errors.ClientError) and error.code == 429
+
+
+class ResponseCache:
+    """LRU map of cache keys to response text in a SQLite file."""
+
+    def __init__(
+        self, path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_ENTRIES
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses '
+            '(key TEXT PRIMARY KEY, response TEXT NOT NULL, used REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        # A cache that cannot be read or written is a miss, never a failed call
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    'SELECT response FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        'UPDATE responses SET used = ? WHERE key = ?',
+                        (time.time(), key),
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f'Could not read the LLM response cache {self.path}: {e}')
+            return None
+        return row[0] if row is not None else None
+
+    def put(self, key: str, response: str) -> None:
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?)',
+                    (key, response, time.time()),
+                )
+                self._conn.execute(
+                    'DELETE FROM responses WHERE key NOT IN '
+                    '(SELECT key FROM responses ORDER BY used DESC LIMIT ?)',
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f'Could not write the LLM response cache {self.path}: {e}')
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LLMClient:
+    """One `genai.Client` with response caching, coalescing and retries."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        http_options: types.HttpOptions | None = None,
+        cache: ResponseCache | None = None,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.client = genai.Client(
+            api_key=api_key or getenv('GEMINI_API_KEY'), http_options=http_options
+        )
+        self.cache = cache if cache is not None else ResponseCache()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future[str]] = {}
+
+    def generate_text(
+        self,
+        model: str,
+        prompt: str,
+        config: types.GenerateContentConfig | None = None,
+        on_chunk: Callable[[str], None] | None = None,
+    ) -> str:
+        """
+        The model's text response to `prompt`. A response that is streamed from the
+        model is passed to `on_chunk` as it arrives; a cached or coalesced one in
+        a single call.
+        """
+        key = cache_key(model, prompt, config)
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if future is None:
+                future = self._in_flight[key] = Future()
+
+        if not leader:
+            text = future.result()
+        else:
+            try:
+                # Only the leader reads the cache, so calls waiting on it share a hit too
+                text = self.cache.get(key)
+                if text is None:
+                    text = self._generate(model, prompt, config, on_chunk)
+                    self.cache.put(key, text)
+                    on_chunk = None
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(text)
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+
+        if on_chunk is not None:
+            on_chunk(text)
+        return text
+
+    def _generate(
+        self,
+        model: str,
+        prompt: str,
+        config: types.GenerateContentConfig | None,
+        on_chunk: Callable[[str], None] | None,
+    ) -> str:
+        contents = types.Content(role='user', parts=[types.Part.from_text(text=prompt)])
+        attempt = 0
+        while True:
+            chunks: list[str] = []
+            try:
+                for chunk in self.client.models.generate_content_stream(
+                    model=model, contents=contents, config=config
+                ):
+                    if chunk.text:
+                        chunks.append(chunk.text)
+                        if on_chunk is not None:
+                            on_chunk(chunk.text)
+                return ''.join(chunks)
+            except Exception as e:
+                if chunks or attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = random.uniform(
+                    0, min(self.backoff_max, self.backoff_base * 2**attempt)
+                )
+                attempt += 1
+                logger.warning(
+                    f'{model} request failed ({e}), retry {attempt} of '
+                    f'{self.max_retries} in {delay:.1f}s'
+                )
+                self._sleep(delay)
+
+
+_client: LLMClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    """The process-wide client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
@@ -0,0 +1,254 @@
+"""
+Streaming per-ticker sentiment shift detection.
+
+`ShiftDetector` keeps a fixed set of statistics per ticker in one NumPy array (a
+row per ticker, grown by doubling), so a scoring batch updates them in time
+proportional to the batch, never to the ticker's history:
+
+```
+S = sum (1 - a)^k x_k       EWMA sums over the ticker's articles, newest k = 0,
+Q = sum (1 - a)^k x_k^2     with a = SHIFT_ALPHA
+W = sum (1 - a)^k           so mean = S / W, var = Q / W - mean^2
+C = sum exp(-(t - t_k) / T) decayed article count, rate = C / T per hour
+```
+
+A batch with `n` new articles for a ticker scales its sums by `(1 - a)^n` and adds
+the batch's weighted terms, all with `np.add.reduceat` over the batch sorted by
+ticker and time. Before updating, the batch's mean compound is compared with the
+ticker's EWMA:
+
+```
+z = (batch mean - mean) / (max(std, SHIFT_MIN_STD) / sqrt(n))
+```
+
+and `|z| >= SHIFT_Z_THRESHOLD` is a shift, once the ticker has
+`SHIFT_MIN_ARTICLES` articles behind it. `record_shifts` runs this on the scores of
+`main.compute_and_update_sentiment`, storing the state in `shift_state` and the
+shifts in `sentiment_shifts`:
+
+```
+detector = ShiftDetector.from_frame(dbm.get_shift_state())
+shifts = detector.update(tickers, compound, posted_at_seconds)
+```
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import numpy as np
+from loguru import logger
+
+import metrics
+from config import (
+    SHIFT_ALPHA,
+    SHIFT_MIN_ARTICLES,
+    SHIFT_MIN_STD,
+    SHIFT_RATE_HOURS,
+    SHIFT_Z_THRESHOLD,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from database import DatabaseManager
+
+# Per-ticker state columns, in `shift_state` column order after the ticker
+STATE_COLUMNS = (
+    'ewm_sum',
+    'ewm_sq_sum',
+    'ewm_weight',
+    'decayed_count',
+    'last_seen',
+    'articles',
+)
+SUM, SQ_SUM, WEIGHT, COUNT, LAST_SEEN, ARTICLES = range(len(STATE_COLUMNS))
+
+
+class Shift(NamedTuple):
+    ticker: str
+    # Posting time of the batch's last article, in seconds since the epoch
+    posted_at: float
+    articles: int
+    batch_mean: float
+    baseline_mean: float
+    baseline_std: float
+    z: float
+    articles_per_hour: float
+
+
+class ShiftDetector:
+    """EWMA mean, variance and article rate per ticker, updated a batch at a time."""
+
+    def __init__(
+        self,
+        alpha: float = SHIFT_ALPHA,
+        rate_hours: float = SHIFT_RATE_HOURS,
+        z_threshold: float = SHIFT_Z_THRESHOLD,
+        min_articles: int = SHIFT_MIN_ARTICLES,
+        min_std: float = SHIFT_MIN_STD,
+        capacity: int = 512,
+    ) -> None:
+        self.alpha = alpha
+        self.rate_seconds = rate_hours * 3600
+        self.z_threshold = z_threshold
+        self.min_articles = min_articles
+        self.min_std = min_std
+        self.tickers: list[str] = []
+        self.rows: dict[str, int] = {}
+        # One row per ticker, so a batch is one gather and one scatter
+        self.state = np.zeros((capacity, len(STATE_COLUMNS)))
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    @classmethod
+    def from_frame(cls, state: pd.DataFrame, **kwargs: Any) -> ShiftDetector:
+        """A detector holding the rows of `DatabaseManager.get_shift_state()`."""
+        detector = cls(**kwargs, capacity=max(512, 2 * len(state)))
+        rows = detector._rows(state['ticker'].tolist())
+        detector.state[rows] = state[list(STATE_COLUMNS)].to_numpy(dtype=float)
+        return detector
+
+    def to_frame(self) -> pd.DataFrame:
+        """The state as `shift_state` rows."""
+        import pandas as pd
+
+        df = pd.DataFrame(self.state[: len(self)], columns=list(STATE_COLUMNS))
+        df.insert(0, 'ticker', self.tickers)
+        df['articles'] = df['articles'].astype('int64')
+        return df
+
+    def _rows(self, tickers: Sequence[str]) -> np.ndarray:
+        """Row of each ticker, adding rows (and growing the state) for new ones."""
+        rows = self.rows
+        try:
+            return np.array(list(map(rows.__getitem__, tickers)), dtype=np.intp)
+        except KeyError:
+            pass
+        for ticker in dict.fromkeys(tickers):
+            if ticker not in rows:
+                rows[ticker] = len(self.tickers)
+                self.tickers.append(ticker)
+        if len(self.tickers) > len(self.state):
+            grown = np.zeros((2 * len(self.tickers), len(STATE_COLUMNS)))
+            grown[: len(self.state)] = self.state
+            self.state = grown
+        return np.array(list(map(rows.__getitem__, tickers)), dtype=np.intp)
+
+    @staticmethod
+    def _mean_std(state: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        weight = np.maximum(state[:, WEIGHT], 1e-12)
+        mean = state[:, SUM] / weight
+        var = np.maximum(state[:, SQ_SUM] / weight - mean**2, 0)
+        return mean, np.sqrt(var)
+
+    def mean_std(self, tickers: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+        """EWMA mean and standard deviation of compound for known `tickers`."""
+        rows = [self.rows[ticker] for ticker in tickers]
+        return self._mean_std(self.state[rows])
+
+    def update(
+        self,
+        tickers: Sequence[str],
+        compound: np.ndarray,
+        posted_at: np.ndarray,
+    ) -> list[Shift]:
+        """
+        Fold a batch of scored articles into the state and return the shifts it
+        shows. `posted_at` is in seconds since the epoch; articles older than the
+        ticker's last seen one count as posted at that time.
+        """
+        if not len(tickers):
+            return []
+        compound = np.asarray(compound, dtype=float)
+        posted_at = np.asarray(posted_at, dtype=float)
+        batch_rows = self._rows(tickers)
+
+        # Group the batch by ticker, in posting order within each ticker
+        order = np.lexsort((posted_at, batch_rows))
+        rows, x, t = batch_rows[order], compound[order], posted_at[order]
+        starts = np.concatenate(([0], np.flatnonzero(rows[1:] != rows[:-1]) + 1))
+        ends = np.append(starts[1:], len(rows))
+        counts = ends - starts
+        row = rows[starts]
+        group = np.repeat(np.arange(len(starts)), counts)
+        state = self.state[row]
+
+        # Detection against the state before this batch
+        mean, std = self._mean_std(state)
+        batch_mean = np.add.reduceat(x, starts) / counts
+        z = (batch_mean - mean) / (np.maximum(std, self.min_std) / np.sqrt(counts))
+        shifted = (state[:, ARTICLES] >= self.min_articles) & (
+            np.abs(z) >= self.z_threshold
+        )
+
+        # Per-article terms: EWMA weights (the newest article has age 0) and decay
+        # of the article count to the batch's last article
+        t = np.maximum(t, state[group, LAST_SEEN])
+        last = t[ends - 1]
+        age = (ends - 1)[group] - np.arange(len(rows))
+        terms = np.empty((len(rows), 4))
+        terms[:, WEIGHT] = (1 - self.alpha) ** age
+        terms[:, SUM] = terms[:, WEIGHT] * x
+        terms[:, SQ_SUM] = terms[:, SUM] * x
+        terms[:, COUNT] = np.exp(-(last[group] - t) / self.rate_seconds)
+
+        keep = np.empty((len(row), 4))
+        keep[:, :COUNT] = ((1 - self.alpha) ** counts)[:, None]
+        keep[:, COUNT] = np.exp(-(last - state[:, LAST_SEEN]) / self.rate_seconds)
+        state[:, :LAST_SEEN] = keep * state[:, :LAST_SEEN] + np.add.reduceat(
+            terms, starts
+        )
+        state[:, LAST_SEEN] = last
+        state[:, ARTICLES] += counts
+        self.state[row] = state
+
+        rate = state[:, COUNT] / (self.rate_seconds / 3600)
+        return [
+            Shift(
+                self.tickers[row[i]],
+                float(last[i]),
+                int(counts[i]),
+                float(batch_mean[i]),
+                float(mean[i]),
+                float(std[i]),
+                float(z[i]),
+                float(rate[i]),
+            )
+            for i in np.flatnonzero(shifted)
+        ]
+
+
+def record_shifts(dbm: DatabaseManager, scored_df: pd.DataFrame) -> list[Shift]:
+    """
+    Run the stored detector over newly scored articles (ticker, date_posted and
+    compound columns) and save its state and any shifts.
+    """
+    import pandas as pd
+
+    detector = ShiftDetector.from_frame(dbm.get_shift_state())
+    posted = pd.to_datetime(scored_df['date_posted'], errors='coerce')
+    # Not astype('int64'), whose unit depends on the resolution pandas parsed at
+    seconds = (
+        (posted - pd.Timestamp(0)).dt.total_seconds().where(posted.notna(), time.time())
+    )
+    shifts = detector.update(
+        scored_df['ticker'].tolist(),
+        scored_df['compound'].to_numpy(dtype=float),
+        seconds.to_numpy(),
+    )
+    shifts_df = pd.DataFrame(shifts, columns=list(Shift._fields))
+    shifts_df['posted_at'] = pd.to_datetime(shifts_df['posted_at'], unit='s')
+    dbm.save_shift_state(detector.to_frame(), shifts_df)
+
+    metrics.incr('sentiment_shifts', len(shifts))
+    for shift in shifts:
+        logger.warning(
+            f'Sentiment shift for {shift.ticker}: mean compound {shift.batch_mean:+.2f} '
+            f'over {shift.articles} articles against {shift.baseline_mean:+.2f} '
+            f'± {shift.baseline_std:.2f} (z = {shift.z:+.1f})'
+        )
+    return shifts
@@ -0,0 +1,156 @@
+"""
+Per-source health tracking with a circuit breaker.
+
+When a news source changes its markup or starts throttling, every remaining
+ticker would otherwise still request it and get nothing back. Each source has a
+breaker shared by all tickers fetched in the process:
+
+- closed: requests go through. `SOURCE_BREAKER_THRESHOLD` consecutive failed or
+  empty responses open it.
+- open: requests are skipped until `SOURCE_BREAKER_COOLDOWN` seconds have passed.
+- half-open: one probe request is let through. Articles close the breaker again;
+  another failure reopens it for a new cooldown.
+
+A response counts as failed when the page could not be fetched (HTTP errors, 429s
+after retries, timeouts) or parsing raised, and as empty when the page parsed to
+no articles, which is what a markup change looks like.
+
+State lives in the process and is guarded by a lock, so the per-source fetch
+threads of `news_fetcher.fetch_universe` all see the same breaker. `summary()` and
+`log_summary()` report the counts at the end of a run.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from loguru import logger
+
+from config import SOURCE_BREAKER_COOLDOWN, SOURCE_BREAKER_THRESHOLD
+
+OK = 'ok'
+EMPTY = 'empty'
+FAILED = 'failed'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Counters kept per source
+COUNTS = ('ok', 'empty', 'failed', 'skipped', 'articles', 'trips')
+
+
+@dataclass(slots=True)
+class SourceHealth:
+    state: str = CLOSED
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+    ok: int = 0
+    empty: int = 0
+    failed: int = 0
+    skipped: int = 0
+    articles: int = 0
+    trips: int = 0
+
+
+_lock = threading.Lock()
+_sources: dict[str, SourceHealth] = {}
+_threshold: int = SOURCE_BREAKER_THRESHOLD
+_cooldown: float = SOURCE_BREAKER_COOLDOWN
+_clock: Callable[[], float] = time.monotonic
+
+
+def configure(
+    threshold: int = SOURCE_BREAKER_THRESHOLD,
+    cooldown: float = SOURCE_BREAKER_COOLDOWN,
+    clock: Callable[[], float] = time.monotonic,
+) -> None:
+    global _threshold, _cooldown, _clock
+    _threshold = threshold
+    _cooldown = cooldown
+    _clock = clock
+
+
+def _health(source: str) -> SourceHealth:
+    health = _sources.get(source)
+    if health is None:
+        health = _sources[source] = SourceHealth()
+    return health
+
+
+def allow(source: str) -> bool:
+    """
+    Whether `source` should be requested now. An open breaker past its cooldown
+    moves to half-open and lets this one request through as the probe.
+    """
+    with _lock:
+        health = _health(source)
+        if health.state == CLOSED:
+            return True
+        if health.state == OPEN and _clock() - health.opened_at >= _cooldown:
+            health.state = HALF_OPEN
+            logger.info(f'Probing {source} after {_cooldown:.0f}s cooldown')
+            return True
+        health.skipped += 1
+        return False
+
+
+def record(source: str, outcome: str, articles: int = 0) -> None:
+    """Record the outcome (`OK`, `EMPTY` or `FAILED`) of a request allowed by `allow`."""
+    with _lock:
+        health = _health(source)
+        health.articles += articles
+        if outcome == OK:
+            health.ok += 1
+            if health.state != CLOSED:
+                logger.info(f'{source} recovered, closing circuit breaker')
+            health.state = CLOSED
+            health.consecutive_failures = 0
+            return
+
+        if outcome == EMPTY:
+            health.empty += 1
+        else:
+            health.failed += 1
+        health.consecutive_failures += 1
+        if health.state == HALF_OPEN or (
+            health.state == CLOSED and health.consecutive_failures >= _threshold
+        ):
+            health.state = OPEN
+            health.opened_at = _clock()
+            health.trips += 1
+            logger.warning(
+                f'{source} failed {health.consecutive_failures} times in a row, '
+                f'skipping it for {_cooldown:.0f}s'
+            )
+
+
+def reset() -> None:
+    with _lock:
+        _sources.clear()
+
+
+def summary() -> dict[str, dict[str, object]]:
+    with _lock:
+        return {
+            source: {'state': health.state, **{c: getattr(health, c) for c in COUNTS}}
+            for source, health in sorted(_sources.items())
+        }
+
+
+def log_summary() -> None:
+    """Log one line per source with its request outcomes and breaker state."""
+    for source, health in summary().items():
+        requested = health['ok'] + health['empty'] + health['failed']  # type: ignore[operator]
+        line = (
+            f'{source}: {health["articles"]} articles from {requested} requests '
+            f'({health["ok"]} ok, {health["empty"]} empty, {health["failed"]} failed), '
+            f'{health["skipped"]} skipped, breaker {health["state"]}'
+        )
+        if health['state'] == CLOSED and not health['trips']:
+            logger.info(line)
+        else:
+            logger.warning(f'{line}, tripped {health["trips"]} times')
@@ -1,18 +1,26 @@
+# Heavy third-party modules (httpx, curl_cffi, nse, pandas, tqdm, duckdb via database)
+# are imported inside the functions that use them, so importing this module stays
+# cheap for CLI commands that only need a few helpers.
+from __future__ import annotations
+
 import random
 import time
-from datetime import datetime, timedelta
-from typing import Any
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
 
-import httpx
-import pandas as pd
-from curl_cffi import requests
-from dateutil.relativedelta import relativedelta
 from loguru import logger
-from nse import NSE
-from tqdm import tqdm
 
-from config import BATCH_SIZE, DB_UTILS, HEADER, SENTIMENT_MODEL_NAME
-from database import DatabaseManager
+from config import (
+    BATCH_SIZE,
+    CASCADE_THRESHOLD,
+    DB_UTILS,
+    DEDUP_WATERMARK_KEY,
+    HEADER,
+)
+from dates import DateNormalizer
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def get_webpage_content(
@@ -33,6 +41,9 @@ def get_webpage_content(
     Returns:
         str: The content of the webpage.
     """
+    import httpx
+    from curl_cffi import requests
+
     # Random delay to spread requests across processes and avoid overwhelming servers
     # 100-500ms random delay
     delay = random.uniform(0.1, 0.5)  # nosec B311: not a security risk
@@ -104,6 +115,8 @@ def fetch_metadata(ticker: str):
         list: A list containing metadata fields: [ticker, sector, industry, market_cap (in billions), company_name].
               Returns None for fields if data is unavailable.
     """
+    from nse import NSE
+
     # Fetch quote data from NSE
     logger.debug(f'Fetching metadata for {ticker}')
     with NSE('./') as nse:
@@ -137,71 +150,43 @@ def parse_date(
         article date in relative terms
     relative : bool
         indicates if the date_string is in relative format
+    format : str
+        strptime format of an absolute date_string; the year is inferred if missing
 
     Returns
     -------
-    datetime
-        datetime object
+    str
+        date as '%Y-%m-%d %H:%M:%S', or '' if it could not be parsed
     """
-    now: datetime = datetime.now()
-    if relative:
-        parts: list[str] = date_string.split()
+    # Scrapers share one DateNormalizer per run; this parses a single string
+    # against the current time
+    if not relative and not format:
+        logger.error('Format string is required for absolute date parsing.')
+        return ''
+    return DateNormalizer().parse(date_string, None if relative else format)
 
-        datetime_object: datetime
 
-        if len(parts) != 2 and len(parts) != 3:
-            return ''
-
-        value: int = int(parts[0]) if parts[0] not in ['a', 'last'] else 1
-        unit: str = parts[1]
-
-        if unit.startswith('minute'):
-            datetime_object = now - timedelta(minutes=value)
-        elif unit.startswith('hour'):
-            datetime_object = now - timedelta(hours=value)
-        elif unit.startswith('day'):
-            datetime_object = now - timedelta(days=value)
-        elif unit.startswith('week'):
-            datetime_object = now - timedelta(weeks=value)
-        elif unit.startswith('month'):
-            datetime_object = now - relativedelta(months=value)
-        elif unit.startswith('year'):
-            datetime_object = now - relativedelta(years=value)
-        elif unit.startswith('yesterday'):
-            datetime_object = now - timedelta(days=1)
-        elif unit.startswith('today'):
-            datetime_object = now
-        else:
-            logger.warning(f'Unknown date format: {date_string}')
-            return ''
-    else:
-        if not format:
-            logger.error('Format string is required for absolute date parsing.')
-            return ''
-        elif format.__contains__('%Y'):
-            datetime_object: datetime = datetime.strptime(date_string, format)
-        else:
-            try:
-                datetime_object = datetime.strptime(date_string, format).replace(
-                    year=2025
-                )
-                datetime_object = (
-                    datetime_object
-                    if datetime_object < now
-                    else datetime_object.replace(year=datetime_object.year - 1)
-                )
-
-            except Exception as e:
-                logger.warning(f"Error parsing date '{date_string}': {e}")
-                return ''
+def load_sentiment_pipeline() -> Any:
+    """
+    Load the finBERT scorer used by `analyse_sentiment`. It can also be called like
+    the HF text-classification pipeline with `top_k=None` and returns the same
+    output, see `sentiment.SentimentScorer`.
+
+    The scorer is loaded offline from the model bundle (`cli.py bundle`), and
+    `model_bundle.ModelBundleError` is raised if it has not been built. Headlines
+    the finance lexicon is confident about (`CASCADE_THRESHOLD`) skip the model,
+    see `lexicon.CascadeScorer`.
+    """
+    from lexicon import CascadeScorer
+    from model_bundle import load_scorer
 
-    # Format the datetime object to a string
-    datetime_format: str = '%Y-%m-%d %H:%M:%S'
-    formatted_date: str = datetime_object.strftime(datetime_format)
-    return formatted_date
+    return CascadeScorer(load_scorer(), CASCADE_THRESHOLD)
 
 
-def analyse_sentiment(headlines: list[str]) -> pd.DataFrame:
+def analyse_sentiment(
+    headlines: list[str],
+    nlp: Callable[..., list[list[dict[str, Any]]]] | None = None,
+) -> pd.DataFrame:
     """
     Perform Sentiment Analysis using finBERT model. Create a dataframe from the results.
 
@@ -209,6 +194,13 @@ def analyse_sentiment(headlines: list[str]) -> pd.DataFrame:
     ----------
     headline : list[str]
         list of article headlines
+    nlp : Callable, optional
+        the scorer returned by `load_sentiment_pipeline`, which is loaded when not
+        given. Anything with a `predict_proba(headlines, batch_size)` method and a
+        `labels` attribute takes the direct path: probabilities are turned into
+        columns with NumPy. Any other callable is treated as an HF pipeline with
+        `top_k=None` and its label/score dicts are flattened. Benchmarks pass a stub
+        here to time the scoring path without the model.
 
     Returns
     -------
@@ -216,32 +208,21 @@ def analyse_sentiment(headlines: list[str]) -> pd.DataFrame:
         returns sentiment scores in a df with following columns:
         Positive, Negative, Neutral, compound
     """
+    import pandas as pd
+    from tqdm import tqdm
 
-    from transformers.models.bert import BertForSequenceClassification, BertTokenizer
-    from transformers.pipelines import pipeline
-
-    finbert_1: BertForSequenceClassification = (
-        BertForSequenceClassification.from_pretrained(
-            pretrained_model_name_or_path=SENTIMENT_MODEL_NAME,
-            num_labels=3,
-            use_safetensors=True,  # Use safe tensors
-        )
-    )
+    nlp_1 = nlp if nlp is not None else load_sentiment_pipeline()
 
-    tokenizer_1 = BertTokenizer.from_pretrained(
-        pretrained_model_name_or_path=SENTIMENT_MODEL_NAME
-    )
+    if hasattr(nlp_1, 'predict_proba'):
+        from sentiment import scores_frame
 
-    # set top_k=1 to get the most likely label or top_k=None to get all labels
-    # device=-1 means CPU
-    nlp_1 = pipeline(
-        'sentiment-analysis',
-        model=finbert_1,
-        tokenizer=tokenizer_1,
-        device=-1,
-        top_k=None,
-        framework='pt',
-    )
+        try:
+            probs = nlp_1.predict_proba(headlines, batch_size=BATCH_SIZE)
+        except Exception as e:
+            logger.warning(f'Error: {e}')
+            return pd.DataFrame()
+        logger.debug(f'Articles for which Sentiment Score is available: {len(probs)}')
+        return scores_frame(probs, nlp_1.labels)
 
     try:
         results: list[list[dict[str, str | float]]] = nlp_1(
@@ -292,8 +273,10 @@ def analyse_sentiment(headlines: list[str]) -> pd.DataFrame:
 # ------------------ database utility functions ---------------------------
 
 
-def query_duplicates(return_df: bool = False) -> pd.DataFrame | None:
-    with DatabaseManager().get_connection() as conn:
+def query_duplicates(return_df: bool = False, db_path: str = '') -> pd.DataFrame | None:
+    from database import DatabaseManager
+
+    with DatabaseManager(db_path).get_connection() as conn:
         # Select duplicates
         duplicates_df: pd.DataFrame = conn.execute(
             DB_UTILS['query_duplicates']
@@ -310,22 +293,61 @@ def query_duplicates(return_df: bool = False) -> pd.DataFrame | None:
             return duplicates_df
 
 
-def deduplicate_db() -> None:
-    duplicates_df: pd.DataFrame | None = query_duplicates(return_df=True)
+def deduplicate_db(incremental: bool = True, db_path: str = '') -> int:
+    """
+    Delete duplicate (ticker, headline) rows, keeping the oldest copy, and return the
+    number of rows deleted.
+
+    The incremental mode only window-scans keys inserted since the last dedup
+    watermark, so its cost follows the size of the new batch instead of the whole
+    history. `incremental=False` rescans every row, which is only needed to repair
+    a database file that was written before the watermark existed.
+    """
+    from database import DatabaseManager
+
+    dbm = DatabaseManager(db_path)
+
+    if not incremental:
+        duplicates_df: pd.DataFrame | None = query_duplicates(
+            return_df=True, db_path=db_path
+        )
+        duplicates_count: int = 0 if duplicates_df is None else duplicates_df.shape[0]
 
-    if duplicates_df is None:
-        logger.info('No duplicates found to delete.')
-        return
+        with dbm.get_connection() as conn:
+            watermark_row = conn.execute(DB_UTILS['latest_created_at']).fetchone()
+            if duplicates_count > 0:
+                conn.execute(DB_UTILS['delete_duplicates'])
 
-    duplicates_count: int = duplicates_df.shape[0]
+        if duplicates_count == 0:
+            logger.info('No duplicates found to delete.')
+        else:
+            logger.success(f'Deleted {duplicates_count} duplicate rows from database.')
+    else:
+        # With no watermark yet, the first incremental run checks the whole table once
+        last_watermark: str = dbm.get_state(DEDUP_WATERMARK_KEY) or '1970-01-01'
+
+        with dbm.get_connection() as conn:
+            # Read the new watermark before deleting so rows written later are not skipped
+            watermark_row = conn.execute(DB_UTILS['latest_created_at']).fetchone()
+            deleted_row = conn.execute(
+                DB_UTILS['delete_duplicates_since'], [last_watermark]
+            ).fetchone()
+        duplicates_count = int(deleted_row[0]) if deleted_row else 0
+
+        if duplicates_count == 0:
+            logger.info(f'No duplicates found since {last_watermark}.')
+        else:
+            logger.success(
+                f'Deleted {duplicates_count} duplicate rows inserted since {last_watermark}.'
+            )
 
-    if duplicates_count == 0:
-        logger.info('No duplicates found to delete.')
-        return
+    if watermark_row and watermark_row[0] is not None:
+        dbm.set_state(DEDUP_WATERMARK_KEY, watermark_row[0])
+    if duplicates_count > 0:
+        # Deleted rows were counted in the running sentiment totals
+        dbm.rebuild_sentiment_prefix()
 
-    with DatabaseManager().get_connection() as conn:
-        conn.execute(DB_UTILS['delete_duplicates'])
-        logger.success(f'Deleted {duplicates_count} duplicate rows from database.')
+    return duplicates_count
 
 
 if __name__ == '__main__':
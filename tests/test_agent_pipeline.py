@@ -0,0 +1,148 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# This adds the 'src/service' directory to the Python path.
+service_abs_path = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../src/service')
+)
+
+if service_abs_path not in sys.path:
+    sys.path.append(service_abs_path)
+
+from agent_pipeline import (
+    DONE,
+    FAILED,
+    PARTIAL,
+    SKIPPED,
+    TIMEOUT,
+    Step,
+    index_agent_steps,
+    run_agents,
+)
+
+
+def stub(seconds, result=None, error=None, partials=()):
+    """An agent that emits `partials`, waits `seconds`, then answers or raises."""
+
+    async def run(results, emit):
+        for partial in partials:
+            emit(partial)
+        await asyncio.sleep(seconds)
+        if error is not None:
+            raise error
+        return result(results) if callable(result) else result
+
+    return run
+
+
+def collect(steps, inputs=None, deadline=5.0):
+    async def run():
+        return [event async for event in run_agents(steps, inputs or {}, deadline)]
+
+    started = time.perf_counter()
+    events = asyncio.run(run())
+    return events, time.perf_counter() - started
+
+
+def final(events):
+    return {e.step: e for e in events if e.kind != PARTIAL}
+
+
+def test_independent_steps_run_concurrently_and_stream_partials():
+    steps = [
+        Step('search', stub(0.2, 'stocks', partials=['searching'])),
+        Step('sql', stub(0.2, 'rows')),
+        Step(
+            'structured',
+            stub(0.01, lambda r: (r['query'], r['search'], r['sql'])),
+            after=('search', 'sql'),
+        ),
+    ]
+    events, elapsed = collect(steps, {'query': 'banks'})
+    # The two 0.2 second steps overlap
+    assert elapsed < 0.35
+
+    assert events[0].step == 'search' and events[0].kind == PARTIAL
+    assert events[0].value == 'searching'
+    assert events[-1].step == 'structured'
+    results = final(events)
+    assert results['structured'].kind == DONE
+    assert results['structured'].value == ('banks', 'stocks', 'rows')
+    assert results['search'].latency == pytest.approx(0.2, abs=0.1)
+    assert results['structured'].latency < 0.1
+
+
+def test_step_timeouts_and_failures_skip_only_their_dependents():
+    steps = [
+        Step('slow', stub(1.0, 'late'), timeout=0.05),
+        Step('broken', stub(0.01, error=RuntimeError('no quota'))),
+        Step('fast', stub(0.01, 'ok')),
+        Step('after_slow', stub(0.01), after=('slow',)),
+        Step('after_both', stub(0.01), after=('broken', 'fast')),
+        Step('after_after', stub(0.01), after=('after_slow',)),
+    ]
+    events, elapsed = collect(steps)
+    assert elapsed < 0.5
+    results = final(events)
+    assert {step: e.kind for step, e in results.items()} == {
+        'slow': TIMEOUT,
+        'broken': FAILED,
+        'fast': DONE,
+        'after_slow': SKIPPED,
+        'after_both': SKIPPED,
+        'after_after': SKIPPED,
+    }
+    assert results['broken'].error == 'RuntimeError: no quota'
+    assert results['after_both'].error == 'needs broken'
+    assert results['slow'].latency == pytest.approx(0.05, abs=0.05)
+
+
+def test_overall_deadline_cuts_the_pipeline_short():
+    steps = [
+        Step('rewrite', stub(0.1, 'q')),
+        Step('search', stub(0.1, 's'), after=('rewrite',)),
+        Step('structured', stub(0.1, 'rows'), after=('search',)),
+    ]
+    events, elapsed = collect(steps, deadline=0.15)
+    assert elapsed < 0.25
+    assert {step: e.kind for step, e in final(events).items()} == {
+        'rewrite': DONE,
+        'search': TIMEOUT,
+        'structured': SKIPPED,
+    }
+
+
+def test_invalid_pipelines_are_rejected():
+    with pytest.raises(ValueError, match='circular'):
+        collect([Step('a', stub(0), after=('b',)), Step('b', stub(0), after=('a',))])
+    with pytest.raises(ValueError, match='circular'):
+        collect([Step('a', stub(0), after=('missing',))])
+    with pytest.raises(ValueError, match='unique'):
+        collect([Step('query', stub(0))], {'query': 'x'})
+
+
+class StubClient:
+    """Stands in for `LLMClient`, streaming the rewrite from a thread."""
+
+    def generate_text(self, model, prompt, config=None, on_chunk=None):
+        for chunk in ['better ', prompt]:
+            time.sleep(0.01)
+            on_chunk(chunk)
+        return f'better {prompt}'
+
+
+def test_index_agents_stream_the_rewrite_from_their_thread():
+    pytest.importorskip('google.genai')
+    events, _ = collect(index_agent_steps(StubClient()), {'query': 'banks'})
+    assert [(e.step, e.kind) for e in events] == [
+        ('rewrite', PARTIAL),
+        ('rewrite', PARTIAL),
+        ('rewrite', DONE),
+        ('search', DONE),
+        ('structured', DONE),
+    ]
+    assert [e.value for e in events[:3]] == ['better ', 'banks', 'better banks']
@@ -0,0 +1,44 @@
+import os
+import pickle
+import sys
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+from articles import ARTICLE_COLUMNS, ArticleBatch
+
+
+def make_batch(ticker: str, n: int) -> ArticleBatch:
+    batch = ArticleBatch()
+    for i in range(n):
+        batch.append(
+            ticker,
+            f'{ticker} headline {i}',
+            '2025-01-01 10:00:00',
+            f'https://example.com/{ticker}/{i}',
+            ''.join(['Yahoo', ' Finance']),
+        )
+    return batch
+
+
+def test_batch_to_dataframe():
+    df = make_batch('SBIN', 3).to_dataframe()
+    assert list(df.columns) == list(ARTICLE_COLUMNS)
+    assert df.shape == (3, 5)
+    assert df['headline'].tolist() == [f'SBIN headline {i}' for i in range(3)]
+
+
+def test_batch_interns_repeated_columns():
+    batch = make_batch('SBIN', 2)
+    assert batch.source[0] is batch.source[1]
+
+
+def test_batch_pickle_round_trip_and_concat():
+    batches = [pickle.loads(pickle.dumps(make_batch(t, 2))) for t in ('SBIN', 'TCS')]
+    combined = ArticleBatch.concat(batches)
+    assert len(combined) == 4
+    assert combined.ticker == ['SBIN', 'SBIN', 'TCS', 'TCS']
+    assert ArticleBatch().to_dataframe().empty
@@ -0,0 +1,101 @@
+import os
+import subprocess  # nosec B404
+import sys
+
+import duckdb
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+import cli
+import database
+from config import DB_NAME
+
+HEAVY_MODULES = [
+    'bs4',
+    'curl_cffi',
+    'duckdb',
+    'httpx',
+    'nse',
+    'numpy',
+    'pandas',
+    'torch',
+    'tqdm',
+    'transformers',
+]
+
+
+def modules_loaded_by(module: str) -> set[str]:
+    """Heavy modules present after importing `module` in a fresh interpreter."""
+    completed = subprocess.run(  # nosec B603
+        [
+            sys.executable,
+            '-c',
+            f'import sys, {module}; print(",".join(sorted(sys.modules)))',
+        ],
+        cwd=src_abs_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(completed.stdout.strip().split(',')) & set(HEAVY_MODULES)
+
+
+def test_cli_startup_imports_no_heavy_modules():
+    assert modules_loaded_by('cli') == set()
+
+
+def test_utils_and_main_defer_fetch_stack():
+    assert modules_loaded_by('utils') == set()
+    assert modules_loaded_by('main') == {'duckdb'}
+
+
+def test_parser_dispatch():
+    parser = cli.build_parser()
+
+    args = parser.parse_args(['dedup', '--full'])
+    assert args.handler is cli.cmd_dedup
+    assert args.full
+
+    args = parser.parse_args(['fetch', '--universe', 'nifty_500', '--sequential'])
+    assert args.handler is cli.cmd_fetch
+    assert args.universe == 'nifty_500'
+    assert args.sequential
+
+    args = parser.parse_args(['score'])
+    assert args.handler is cli.cmd_score
+    assert args.n == 200
+
+
+def test_dedup_command_end_to_end(tmp_path, monkeypatch):
+    # Duplicates can only be written to a table without the primary key
+    db_path = str(tmp_path / DB_NAME)
+    with duckdb.connect(db_path) as conn:
+        conn.execute(
+            'CREATE TABLE article_data (ticker TEXT NOT NULL, headline TEXT NOT NULL, '
+            'date_posted TEXT NOT NULL, source TEXT, article_link TEXT, '
+            'negative_sentiment FLOAT, positive_sentiment FLOAT, '
+            'neutral_sentiment FLOAT, compound_sentiment FLOAT, '
+            'created_at DATETIME DEFAULT CURRENT_TIMESTAMP)'
+        )
+        conn.executemany(
+            'INSERT INTO article_data (ticker, headline, date_posted, created_at) '
+            "VALUES (?, 'headline', '2025-01-01', CAST(? AS TIMESTAMP))",
+            [
+                ('SBIN', '2025-01-01 10:00:00'),
+                ('SBIN', '2025-01-01 11:00:00'),
+                ('TCS', '2025-01-01 12:00:00'),
+            ],
+        )
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path))
+
+    assert cli.main(['dedup']) == 0
+
+    with duckdb.connect(db_path) as conn:
+        rows = conn.execute(
+            'SELECT ticker FROM article_data ORDER BY ticker'
+        ).fetchall()
+    assert rows == [('SBIN',), ('TCS',)]
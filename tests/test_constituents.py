@@ -0,0 +1,141 @@
+import os
+import sys
+
+import duckdb
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+from constituents import refresh_index
+from database import DatabaseManager
+
+HEADER = 'Company Name,Industry,Symbol,Series,ISIN Code\n'
+CSV_V1 = HEADER + (
+    'Alpha Ltd.,Financial Services,ALPHA,EQ,INE000A01001\n'
+    'Beta Ltd.,Information Technology,BETA,EQ,INE000B01001\n'
+    'Gamma Ltd.,Capital Goods,GAMMA,EQ,INE000C01001\n'
+)
+# BETA leaves, DELTA joins and GAMMA changes industry
+CSV_V2 = HEADER + (
+    'Alpha Ltd.,Financial Services,ALPHA,EQ,INE000A01001\n'
+    'Gamma Ltd.,Construction,GAMMA,EQ,INE000C01001\n'
+    'Delta Ltd.,Power,DELTA,EQ,INE000D01001\n'
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: str = '', etag: str = '') -> None:
+        self.status_code = status_code
+        self.content = body.encode()
+        self.headers = {'ETag': etag} if etag else {}
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(f'HTTP {self.status_code}')
+
+
+class FakeNSE:
+    """Serves one CSV version and answers 304 when the client's ETag matches."""
+
+    def __init__(self, body: str, etag: str) -> None:
+        self.body = body
+        self.etag = etag
+        self.requests: list[dict[str, str]] = []
+
+    def __call__(self, url: str, headers: dict[str, str], **kwargs) -> FakeResponse:
+        self.requests.append(headers)
+        if headers.get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.body, self.etag)
+
+
+@pytest.fixture
+def dbm(tmp_path):
+    return DatabaseManager(db_path=str(tmp_path / 'test.db'))
+
+
+def tickers(dbm: DatabaseManager) -> list[str]:
+    return dbm.get_index_constituents('nifty_50')['ticker'].tolist()
+
+
+def test_refresh_applies_only_differences(dbm):
+    nse = FakeNSE(CSV_V1, etag='v1')
+    assert refresh_index('nifty_50', dbm, get=nse) == (3, 0, 0)
+    assert tickers(dbm) == ['ALPHA', 'BETA', 'GAMMA']
+
+    # Checked recently: no request at all
+    assert refresh_index('nifty_50', dbm, get=nse) is None
+    assert len(nse.requests) == 1
+
+    # Stale but unchanged upstream: a conditional GET answered with 304
+    assert refresh_index('nifty_50', dbm, max_age=0, get=nse) is None
+    assert nse.requests[-1]['If-None-Match'] == 'v1'
+
+    nse.body, nse.etag = CSV_V2, 'v2'
+    assert refresh_index('nifty_50', dbm, max_age=0, get=nse) == (1, 1, 1)
+    # The cached lookup is dropped when the snapshot changes
+    assert tickers(dbm) == ['ALPHA', 'DELTA', 'GAMMA']
+
+
+def test_bad_download_keeps_stored_snapshot(dbm):
+    refresh_index('nifty_50', dbm, get=FakeNSE(CSV_V1, etag='v1'))
+
+    assert (
+        refresh_index('nifty_50', dbm, force=True, get=FakeNSE(HEADER, 'empty')) is None
+    )
+    assert (
+        refresh_index(
+            'nifty_50', dbm, force=True, get=lambda url, **kw: FakeResponse(503)
+        )
+        is None
+    )
+    assert tickers(dbm) == ['ALPHA', 'BETA', 'GAMMA']
+
+
+def test_unknown_index_is_rejected(dbm):
+    with pytest.raises(ValueError, match='Unknown index'):
+        dbm.get_index_constituents('nifty_50; DROP TABLE article_data')
+
+
+def test_legacy_wide_table_is_migrated(tmp_path):
+    db_path = str(tmp_path / 'legacy.db')
+    with duckdb.connect(db_path) as conn:
+        # The layout in docs/PRD.md: a BOOLEAN column per index
+        conn.execute(
+            'CREATE TABLE indices_constituents (ticker VARCHAR, ISIN_Code VARCHAR, '
+            'nifty_50 BOOLEAN, nifty_100 BOOLEAN, nifty_200 BOOLEAN, '
+            'nifty_500 BOOLEAN)'
+        )
+        conn.executemany(
+            'INSERT INTO indices_constituents VALUES (?, ?, ?, ?, ?, ?)',
+            [
+                ('ALPHA', 'INE000A01001', True, True, True, True),
+                ('BETA', 'INE000B01001', False, True, True, True),
+                ('GAMMA', None, False, False, None, True),
+            ],
+        )
+
+    dbm = DatabaseManager(db_path=db_path)
+    assert tickers(dbm) == ['ALPHA']
+    assert dbm.get_index_constituents('nifty_100')['ticker'].tolist() == [
+        'ALPHA',
+        'BETA',
+    ]
+    assert dbm.get_index_constituents('nifty_500')['ticker'].tolist() == [
+        'ALPHA',
+        'BETA',
+        'GAMMA',
+    ]
+    with dbm.get_connection() as conn:
+        isin = conn.execute(
+            "SELECT isin FROM indices_constituents WHERE ticker = 'BETA' LIMIT 1"
+        ).fetchone()
+    assert isin == ('INE000B01001',)
+
+    # Opening it again finds the new layout and leaves it alone
+    reopened = DatabaseManager(db_path=db_path)
+    assert len(reopened.get_index_constituents('nifty_500')) == 3
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+from custom_index import TickerUniverse, score_indices
+
+META = pd.DataFrame(
+    [
+        ('HDFC', 'Banks', 'Private Bank', 300.0, 'HDFC Bank'),
+        ('SBI', 'Banks', 'Public Bank', 100.0, 'State Bank'),
+        ('TCS', 'IT', 'Software', 200.0, 'TCS'),
+        ('INFY', 'IT', 'Software', 100.0, 'Infosys'),
+        ('NOCAP', 'IT', 'Software', None, 'No Cap'),
+    ],
+    columns=['ticker', 'sector', 'industry', 'mCap', 'companyName'],
+)
+AGGREGATES = pd.DataFrame(
+    {
+        'ticker': ['HDFC', 'SBI', 'TCS', 'NOCAP', 'OTHER'],
+        'articles': [4, 2, 1, 3, 5],
+        'compound': [0.5, -0.5, 0.2, 0.9, 0.9],
+    }
+)
+
+
+def test_weighted_index_sector_and_constituents():
+    universe = TickerUniverse(META)
+    members = universe.bitmap([['HDFC', 'SBI', 'TCS', 'INFY', 'NOCAP'], ['INFY']])
+    result = score_indices(universe, members, AGGREGATES)
+
+    # INFY has no articles and NOCAP no market cap, so neither carries weight
+    assert result.index[0] == pytest.approx((300 * 0.5 - 100 * 0.5 + 200 * 0.2) / 600)
+    assert result.coverage[0] == pytest.approx(600 / 700)
+    assert np.isnan(result.index[1])
+    assert result.coverage[1] == 0
+
+    sectors = dict(
+        zip(universe.group_names['sector'], result.groups['sector'][0], strict=True)
+    )
+    assert sectors == pytest.approx({'Banks': 0.25, 'IT': 0.2})
+
+    constituents = result.constituents(0)
+    assert constituents['ticker'].tolist() == ['HDFC', 'SBI', 'TCS']
+    assert constituents['weight'].sum() == pytest.approx(1)
+    assert constituents['compound'].tolist() == pytest.approx([0.5, -0.5, 0.2])
+    assert result.constituents(1).empty
+
+
+def test_matches_per_index_dataframe_aggregation():
+    rng = np.random.default_rng(0)
+    universe = TickerUniverse(META)
+    indices = [
+        rng.choice(universe.tickers, size=rng.integers(1, 6), replace=False).tolist()
+        for _ in range(20)
+    ]
+    result = score_indices(universe, universe.bitmap(indices), AGGREGATES)
+
+    for i, tickers in enumerate(indices):
+        df = META[META['ticker'].isin(tickers)].merge(AGGREGATES, on='ticker')
+        df = df[df['mCap'] > 0]
+        expected = (
+            (df['mCap'] * df['compound']).sum() / df['mCap'].sum()
+            if len(df)
+            else np.nan
+        )
+        assert result.index[i] == pytest.approx(expected, nan_ok=True)
+
+
+def test_unknown_tickers_are_rejected():
+    with pytest.raises(ValueError, match='ZZZ'):
+        TickerUniverse(META).bitmap([['TCS', 'ZZZ']])
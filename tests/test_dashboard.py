@@ -0,0 +1,79 @@
+import gzip
+import importlib.util
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+# The dashboard script has a hyphen in its name, so it can't be imported normally
+spec = importlib.util.spec_from_file_location(
+    'dashboard_generation', os.path.join(src_abs_path, 'dashboard-generation.py')
+)
+assert spec and spec.loader
+dashboard = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(dashboard)
+
+
+@pytest.fixture
+def final_df():
+    return pd.DataFrame(
+        {
+            'ticker': ['TCS', 'INFY', 'HDFCBANK', 'SBIN'],
+            'companyName': ['TCS Ltd', 'Infosys', 'HDFC Bank', 'SBI'],
+            'sector': ['Information Technology'] * 2 + ['Financial Services'] * 2,
+            'industry': ['IT Services'] * 2 + ['Banks'] * 2,
+            'Market Cap (Billion Rs)': [100.0, 300.0, 200.0, 200.0],
+            'Negative': [0.1, 0.2, 0.3, 0.4],
+            'Neutral': [0.3, 0.3, 0.3, 0.3],
+            'Positive': [0.6, 0.5, 0.4, 0.3],
+            'Sentiment Score': [0.5, -0.5, 0.2, 0.4],
+        }
+    )
+
+
+def test_sector_scores_are_market_cap_weighted(final_df):
+    sectors = dashboard.aggregate_sector_scores(final_df).set_index('sector')
+    it = sectors.loc['Information Technology']
+    assert it['Market Cap (Billion Rs)'] == 400
+    assert it['Tickers'] == 2
+    assert it['Sentiment Score'] == pytest.approx((100 * 0.5 - 300 * 0.5) / 400)
+
+
+def test_split_dashboard_writes_overview_sectors_and_manifest(final_df, tmp_path):
+    manifest = dashboard.write_split_dashboard(final_df, str(tmp_path))
+    assert sorted(manifest['sectors']) == [
+        'Financial Services',
+        'Information Technology',
+    ]
+    with open(tmp_path / 'manifest.json') as f:
+        assert json.load(f) == manifest
+
+    entry = manifest['sectors']['Financial Services']
+    assert entry['file'].startswith('sectors/financial-services.')
+    assert entry['tickers'] == 2
+    with open(tmp_path / entry['file'], 'rb') as f:
+        figure = json.loads(gzip.decompress(f.read()))
+    assert {'HDFCBANK', 'SBIN'} <= set(figure['data'][0]['labels'])
+    assert 'TCS' not in figure['data'][0]['labels']
+
+    page = (tmp_path / 'index.html').read_text()
+    assert 'manifest.json' in page
+    assert 'HDFCBANK' not in page
+
+    # Unchanged sectors keep their file names; stale files are removed
+    final_df.loc[final_df['ticker'] == 'TCS', 'Sentiment Score'] = 0.9
+    again = dashboard.write_split_dashboard(final_df, str(tmp_path))
+    assert again['sectors']['Financial Services']['file'] == entry['file']
+    changed = again['sectors']['Information Technology']['file']
+    assert changed != manifest['sectors']['Information Technology']['file']
+    assert sorted(os.listdir(tmp_path / 'sectors')) == sorted(
+        os.path.basename(e['file']) for e in again['sectors'].values()
+    )
@@ -1,6 +1,7 @@
 import atexit
 import os
 import shutil
+import subprocess  # nosec B404
 import sys
 import tempfile
 
@@ -17,7 +18,10 @@ if src_abs_path not in sys.path:
 else:
     print(f"'{src_abs_path}' is already in sys.path")
 
-from database import DatabaseManager
+import duckdb
+
+from config import SNAPSHOT_KEEP
+from database import DatabaseManager, SnapshotNotFoundError, snapshot_dir
 
 tempdir_path = tempfile.mkdtemp()
 print(f'Temporary directory created at: {tempdir_path}')
@@ -179,3 +183,56 @@ def test_get_ticker_metadata(db_manager):
     assert 'ticker' in metadata_df.columns
     assert 'companyName' in metadata_df.columns
     assert 'AAPL' in metadata_df['ticker'].values
+
+
+def test_get_existing_headlines(db_manager):
+    """Test finding which headlines are already stored for a ticker."""
+    db_manager.insert_articles(mock_articles_no_sentiment, has_sentiment=False)
+
+    existing = db_manager.get_existing_headlines(
+        'AAPL', ['Apple News', 'Google News', 'Brand New']
+    )
+    assert existing == {'Apple News'}
+    assert db_manager.get_existing_headlines('AAPL', []) == set()
+
+
+def test_reader_mode_opens_the_latest_snapshot():
+    """Readers see each commit through a published snapshot, never the live file."""
+    db_path = f'{tempdir_path}/snapshots.db'
+    writer = DatabaseManager(db_path=db_path)
+    with pytest.raises(SnapshotNotFoundError, match='cli.py snapshot'):
+        DatabaseManager(db_path=db_path, read_only=True)
+
+    writer.insert_articles(mock_articles_no_sentiment, has_sentiment=False)
+    reader = DatabaseManager(db_path=db_path, read_only=True)
+    assert len(reader.get_articles(has_sentiment=False)) == 2
+    with pytest.raises(duckdb.Error, match='read-only'):
+        reader.set_state('key', 'value')
+
+    for i in range(SNAPSHOT_KEEP + 1):
+        more = mock_articles_no_sentiment.assign(
+            headline=mock_articles_no_sentiment.headline + str(i)
+        )
+        writer.insert_articles(more, has_sentiment=False)
+    assert len(reader.get_articles(n=100, has_sentiment=False)) == 2 * (
+        SNAPSHOT_KEEP + 2
+    )
+    snapshots = [f for f in os.listdir(snapshot_dir(db_path)) if f.endswith('.db')]
+    assert len(snapshots) == SNAPSHOT_KEEP
+
+    # Another process can read while this one holds the writer's file open
+    with writer.get_connection():
+        read = subprocess.run(  # nosec B603
+            [
+                sys.executable,
+                '-c',
+                'from database import DatabaseManager; '
+                f'print(len(DatabaseManager({db_path!r}, read_only=True)'
+                '.get_articles(n=100, has_sentiment=False)))',
+            ],
+            cwd=src_abs_path,
+            capture_output=True,
+            text=True,
+        )
+    assert read.returncode == 0, read.stderr
+    assert read.stdout.strip() == str(2 * (SNAPSHOT_KEEP + 2))
@@ -0,0 +1,81 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+from dates import DateNormalizer
+from news_fetcher import FINOLOGY_DATE_FORMAT
+from utils import parse_date
+
+REFERENCE = datetime(2026, 1, 2, 12, 0)
+
+
+@pytest.mark.parametrize(
+    ('date_string', 'expected'),
+    [
+        ('3 hours ago', '2026-01-02 09:00:00'),
+        ('an hour ago', '2026-01-02 11:00:00'),
+        ('45 mins ago', '2026-01-02 11:15:00'),
+        ('2h ago', '2026-01-02 10:00:00'),
+        ('Yesterday', '2026-01-01 12:00:00'),
+        ('last week', '2025-12-26 12:00:00'),
+        ('2 months ago', '2025-11-02 12:00:00'),
+        ('in a fortnight', ''),
+    ],
+)
+def test_relative_dates(date_string, expected):
+    assert DateNormalizer(REFERENCE).parse(date_string) == expected
+
+
+@pytest.mark.parametrize(
+    ('date_string', 'expected'),
+    [
+        # Dates after the reference belong to the previous year
+        ('30 Dec, 10:30 AM', '2025-12-30 10:30:00'),
+        # A few hours ahead is clock skew, not last year
+        ('02 Jan, 09:00 PM', '2026-01-02 21:00:00'),
+        ('29 Feb, 10:00 AM', '2024-02-29 10:00:00'),
+        ('Dec 30', ''),
+    ],
+)
+def test_year_is_inferred_from_the_reference(date_string, expected):
+    dates = DateNormalizer(REFERENCE)
+    assert dates.parse(date_string, FINOLOGY_DATE_FORMAT) == expected
+    # The vectorized path agrees with the scalar one
+    assert DateNormalizer(REFERENCE).parse_column(
+        [date_string, '01 Jan, 10:00 AM'], FINOLOGY_DATE_FORMAT
+    ) == [expected, '2026-01-01 10:00:00']
+
+
+def test_repeated_strings_are_parsed_once(monkeypatch):
+    dates = DateNormalizer(REFERENCE)
+    calls = []
+    relative = dates._relative
+    monkeypatch.setattr(dates, '_relative', lambda s: calls.append(s) or relative(s))
+
+    column = ['2 hours ago', None, '2 hours ago', 'yesterday'] * 50
+    parsed = dates.parse_column(column)
+    assert parsed[:4] == [
+        '2026-01-02 10:00:00',
+        '',
+        '2026-01-02 10:00:00',
+        '2026-01-01 12:00:00',
+    ]
+    assert dates.parse('yesterday') == '2026-01-01 12:00:00'
+    assert sorted(calls) == ['2 hours ago', 'yesterday']
+
+
+def test_parse_date_keeps_its_interface():
+    assert parse_date('garbled') == ''
+    assert parse_date('01 Jan, 10:00 AM', relative=False) == ''
+    assert (
+        parse_date('2025-03-01T10:00:00', relative=False, format='%Y-%m-%dT%H:%M:%S')
+        == '2025-03-01 10:00:00'
+    )
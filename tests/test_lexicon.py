@@ -0,0 +1,86 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+import utils
+from lexicon import LABELS, CascadeScorer, LexiconScorer, cascade_report
+
+BOILERPLATE = 'TCS stock price today live updates 12 March'
+POSITIVE = 'Infosys shares surge to record high on strong profit growth'
+NEGATIVE = 'HDFC Bank shares fall after downgrade'
+AMBIGUOUS = 'Board meeting on Friday'
+
+
+class FakeModel:
+    """finBERT stand-in that calls everything Negative and records its inputs."""
+
+    labels = ['Neutral', 'Positive', 'Negative']
+    version = 'fake@1'
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_proba(self, headlines, batch_size=None):
+        self.calls.append(list(headlines))
+        return np.tile([0.1, 0.1, 0.8], (len(headlines), 1))
+
+
+def test_lexicon_labels_and_confidence():
+    probs, confidence = LexiconScorer().score(
+        [BOILERPLATE, POSITIVE, NEGATIVE, AMBIGUOUS, 'Profit falls']
+    )
+    labels = [LABELS[i] for i in probs.argmax(axis=1)]
+    assert labels[:3] == ['Neutral', 'Positive', 'Negative']
+    np.testing.assert_allclose(confidence, [0.95, 5 / 6, 2 / 3, 0, 0])
+    np.testing.assert_allclose(probs.sum(axis=1), 1)
+    # No evidence either way is uniform
+    np.testing.assert_allclose(probs[3:], 1 / 3)
+
+
+def test_cascade_sends_only_ambiguous_headlines_to_the_model():
+    model = FakeModel()
+    headlines = [BOILERPLATE, POSITIVE, NEGATIVE, AMBIGUOUS]
+    probs = CascadeScorer(model, threshold=0.75).predict_proba(headlines)
+
+    assert model.calls == [[NEGATIVE, AMBIGUOUS]]
+    # Columns follow the model's label order
+    labels = [model.labels[i] for i in probs.argmax(axis=1)]
+    assert labels == ['Neutral', 'Positive', 'Negative', 'Negative']
+    np.testing.assert_allclose(probs[3], [0.1, 0.1, 0.8])
+
+
+def test_threshold_above_one_disables_the_cascade():
+    model = FakeModel()
+    headlines = [BOILERPLATE, POSITIVE]
+    scorer = CascadeScorer(model, threshold=1.01)
+    probs = scorer.predict_proba(headlines)
+    assert model.calls == [headlines]
+    assert scorer.version == 'fake@1'
+    assert CascadeScorer(model, threshold=0.9).version == 'fake@1+lexicon@0.9'
+
+    # The sentiment columns come out of analyse_sentiment as with the bare model
+    frame = utils.analyse_sentiment(headlines, scorer)
+    np.testing.assert_allclose(frame['Negative'], 0.8)
+    assert scorer(headlines)[0] == [
+        {'label': label, 'score': pytest.approx(score)}
+        for label, score in zip(model.labels, probs[0], strict=True)
+    ]
+
+
+def test_cascade_report():
+    headlines = [BOILERPLATE, POSITIVE, NEGATIVE, AMBIGUOUS]
+    report = cascade_report(headlines, FakeModel(), thresholds=[0.5, 0.9, 2])
+    assert report['avoided'].tolist() == [0.75, 0.25, 0]
+    # The fake model says Negative to everything
+    assert report['agreement'].tolist()[:2] == [pytest.approx(1 / 3), 0]
+    assert report['polar_agreement'][0] == 0.5
+    assert report['neutral_agreement'][1] == 0
+    assert report['agreement'].isna()[2]
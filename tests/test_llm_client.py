@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# This adds the 'src/service' directory to the Python path.
+service_abs_path = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../src/service')
+)
+
+if service_abs_path not in sys.path:
+    sys.path.append(service_abs_path)
+
+pytest.importorskip('google.genai')
+
+from google.genai import errors, types
+from llm_client import LLMClient, ResponseCache, cache_key
+
+MODEL = 'gemini-2.5-flash'
+
+
+class FakeModel(BaseHTTPRequestHandler):
+    """
+    Gemini streaming endpoint answering `rewrite: <prompt>` in two chunks. The
+    server's `failures` list holds status codes to answer with first, in order.
+    """
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests.append(body)
+            status = server.failures.pop(0) if server.failures else 200
+        server.release.wait(5)
+        if status != 200:
+            payload = {'error': {'code': status, 'message': 'fake', 'status': 'FAKE'}}
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps(payload).encode())
+            return
+
+        prompt = body['contents'][0]['parts'][0]['text']
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for text in ['rewrite: ', prompt]:
+            chunk = {'candidates': [{'content': {'parts': [{'text': text}]}}]}
+            self.wfile.write(f'data: {json.dumps(chunk)}\r\n\r\n'.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeModel)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.failures = []
+    server.release = threading.Event()
+    server.release.set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.release.set()
+    server.shutdown()
+
+
+@pytest.fixture
+def make_client(endpoint, tmp_path):
+    def make(**kwargs):
+        kwargs.setdefault('cache', ResponseCache(str(tmp_path / 'cache.sqlite')))
+        return LLMClient(
+            api_key='test',
+            http_options=types.HttpOptions(
+                base_url=f'http://127.0.0.1:{endpoint.server_port}/'
+            ),
+            **kwargs,
+        )
+
+    return make
+
+
+def test_responses_are_streamed_then_cached_on_disk(make_client, endpoint, tmp_path):
+    chunks = []
+    client = make_client()
+    text = client.generate_text(MODEL, 'Defence stocks', on_chunk=chunks.append)
+    assert text == 'rewrite: Defence stocks'
+    assert chunks == ['rewrite: ', 'Defence stocks']
+
+    # Case and whitespace do not matter; a new client reads the same file
+    again = make_client(cache=ResponseCache(str(tmp_path / 'cache.sqlite')))
+    chunks.clear()
+    text = again.generate_text(MODEL, '  defence   STOCKS ', on_chunk=chunks.append)
+    assert text == 'rewrite: Defence stocks'
+    assert chunks == ['rewrite: Defence stocks']
+    assert len(endpoint.requests) == 1
+
+    # The generation config is part of the key
+    config = types.GenerateContentConfig(temperature=0.2)
+    client.generate_text(MODEL, 'Defence stocks', config)
+    assert len(endpoint.requests) == 2
+    assert endpoint.requests[1]['generationConfig'] == {'temperature': 0.2}
+
+
+def test_least_recently_used_responses_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), max_entries=2)
+    cache.put('a', 'A')
+    cache.put('b', 'B')
+    assert cache.get('a') == 'A'
+    cache.put('c', 'C')
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == ('A', None, 'C')
+    assert cache_key(MODEL, 'Query', None) == cache_key(MODEL, ' query', None)
+    assert cache_key(MODEL, 'Query', None) != cache_key('other', 'Query', None)
+
+
+def test_overloaded_requests_are_retried_with_jittered_backoff(make_client, endpoint):
+    delays = []
+    client = make_client(backoff_base=1, backoff_max=3, sleep=delays.append)
+    endpoint.failures = [503, 429, 500]
+    assert client.generate_text(MODEL, 'banks') == 'rewrite: banks'
+    assert len(endpoint.requests) == 4
+    # Full jitter: up to 1, 2 then the 3 second cap
+    assert len(delays) == 3
+    assert all(0 <= d <= cap for d, cap in zip(delays, [1, 2, 3], strict=True))
+
+    endpoint.failures = [503] * 3
+    with pytest.raises(errors.ServerError):
+        make_client(max_retries=2, sleep=delays.append).generate_text(MODEL, 'autos')
+
+    # Bad requests are not retried
+    endpoint.requests.clear()
+    endpoint.failures = [400]
+    with pytest.raises(errors.ClientError):
+        client.generate_text(MODEL, 'pharma')
+    assert len(endpoint.requests) == 1
+
+
+def test_identical_calls_in_flight_share_one_request(make_client, endpoint):
+    client = make_client()
+    endpoint.release.clear()
+    with ThreadPoolExecutor(5) as pool:
+        calls = [
+            pool.submit(client.generate_text, MODEL, 'IT services') for _ in range(4)
+        ]
+        other = pool.submit(client.generate_text, MODEL, 'FMCG')
+        # Let every call reach the client before the fake model answers
+        threading.Event().wait(0.5)
+        endpoint.release.set()
+        results = [call.result() for call in calls]
+    assert results == ['rewrite: IT services'] * 4
+    assert other.result() == 'rewrite: FMCG'
+    assert len(endpoint.requests) == 2
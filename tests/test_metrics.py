@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+import metrics
+
+
+@pytest.fixture
+def enabled_metrics():
+    was_enabled = metrics.is_enabled()
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.reset()
+    metrics.enable(was_enabled)
+
+
+def test_disabled_metrics_record_nothing():
+    was_enabled = metrics.is_enabled()
+    metrics.reset()
+    metrics.enable(False)
+    try:
+        with metrics.span('http_request', source='GoogleFinance'):
+            pass
+        metrics.incr('articles_inserted', 5)
+        metrics.observe('articles_per_page', 10)
+        assert metrics.snapshot() == []
+        assert metrics.drain() == []
+        assert metrics.write_report('main') is None
+    finally:
+        metrics.enable(was_enabled)
+
+
+def test_series_aggregate_and_merge(enabled_metrics):
+    metrics.observe('articles_per_page', 10, source='GoogleFinance')
+    metrics.observe('articles_per_page', 4, source='GoogleFinance')
+    worker_rows = metrics.drain()
+    assert metrics.snapshot() == []
+
+    metrics.observe('articles_per_page', 7, source='GoogleFinance')
+    metrics.merge(worker_rows)
+    with metrics.span('db_insert', has_sentiment=False):
+        pass
+    # A `name` label, as the pipeline stages use, does not clash with the metric name
+    with metrics.span('stage', name='score'):
+        pass
+
+    (row,) = [r for r in metrics.report('main')['series'] if r['kind'] == 'observation']
+    assert row['labels'] == {'source': 'GoogleFinance'}
+    assert (row['count'], row['sum'], row['min'], row['max']) == (3, 21, 4, 10)
+
+    span, stage = [r for r in metrics.report('main')['series'] if r['kind'] == 'span']
+    assert span['name'] == 'db_insert'
+    assert span['labels'] == {'has_sentiment': 'False'}
+    assert span['count'] == 1
+    assert (stage['name'], stage['labels']) == ('stage', {'name': 'score'})
+
+
+def test_write_report(enabled_metrics):
+    metrics.incr('articles_inserted', 3)
+    metrics.incr('articles_inserted', 2)
+    with metrics.span('http_request', source='Finology'):
+        pass
+
+    out_dir = tempfile.mkdtemp()
+    try:
+        json_path, prom_path = metrics.write_report('main', out_dir=out_dir)
+        with open(json_path) as f:
+            report = json.load(f)
+        assert report['run'] == 'main'
+        assert len(report['series']) == 2
+
+        with open(prom_path) as f:
+            prom = f.read()
+        assert '# TYPE nifty_articles_inserted_total counter' in prom
+        assert 'nifty_articles_inserted_total{run="main"} 5' in prom
+        assert (
+            'nifty_http_request_seconds_count{run="main",source="Finology"} 1' in prom
+        )
+        # every family is declared exactly once
+        type_lines = [line for line in prom.splitlines() if line.startswith('# TYPE')]
+        assert len(type_lines) == len(set(type_lines))
+    finally:
+        shutil.rmtree(out_dir)
@@ -0,0 +1,109 @@
+import os
+import subprocess  # nosec B404
+import sys
+
+import numpy as np
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+from model_bundle import (
+    WEIGHTS_FILE,
+    ModelBundleError,
+    build_bundle,
+    check_bundle,
+    load_scorer,
+)
+from sentiment import SentimentScorer
+
+VOCAB = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]', 'profit', 'loss', 'rises']
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """A tiny random finBERT-shaped model saved the way the hub cache holds one."""
+    from transformers.models.bert import (
+        BertConfig,
+        BertForSequenceClassification,
+        BertTokenizerFast,
+    )
+
+    path = tmp_path / 'hub'
+    path.mkdir()
+    (path / 'vocab.txt').write_text('\n'.join(VOCAB))
+    BertTokenizerFast(str(path / 'vocab.txt')).save_pretrained(path)
+    labels = {0: 'Neutral', 1: 'Positive', 2: 'Negative'}
+    config = BertConfig(
+        vocab_size=len(VOCAB),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=64,
+        id2label=labels,
+        label2id={v: k for k, v in labels.items()},
+    )
+    BertForSequenceClassification(config).save_pretrained(path)
+    return str(path)
+
+
+def test_bundle_scores_like_the_source_model(model_dir, tmp_path):
+    bundle = str(tmp_path / 'bundle')
+    manifest = build_bundle(model_dir, bundle)
+    assert manifest == check_bundle(bundle)
+
+    scorer = load_scorer(bundle, batch_size=2)
+    reference = SentimentScorer.from_pretrained(model_dir, batch_size=2)
+    # Scores are stored under the digest of the bundle's weights
+    assert scorer.version == manifest['version'] != reference.version == model_dir
+    headlines = ['profit rises', 'loss', 'profit loss rises', 'profit ' * 20]
+    assert scorer.encode(headlines) == reference.encode(headlines)
+    np.testing.assert_allclose(
+        scorer.predict_logits(headlines),
+        reference.predict_logits(headlines),
+        rtol=1e-5,
+        atol=1e-6,
+    )
+    # Truncated to the model's positions, not the tokenizer's default of 512
+    assert len(scorer.encode(['loss ' * 100])[0]) == 64
+
+    # Every weight is a view into the one mapping of the weights file
+    size = os.path.getsize(os.path.join(bundle, WEIGHTS_FILE))
+    assert {t.untyped_storage().nbytes() for t in scorer.model.tensors.values()} == {
+        size
+    }
+
+
+def test_loading_a_bundle_skips_transformers(model_dir, tmp_path):
+    bundle = str(tmp_path / 'bundle')
+    build_bundle(model_dir, bundle)
+    loaded = subprocess.run(  # nosec B603
+        [
+            sys.executable,
+            '-c',
+            'import sys; from model_bundle import load_scorer; '
+            f'load_scorer({bundle!r}).predict_logits(["profit"]); '
+            'print("transformers" in sys.modules)',
+        ],
+        cwd=src_abs_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert loaded.stdout.strip() == 'False'
+
+
+def test_missing_or_partial_bundle_fails_fast(model_dir, tmp_path):
+    bundle = str(tmp_path / 'bundle')
+    with pytest.raises(ModelBundleError, match='cli.py bundle'):
+        load_scorer(bundle)
+
+    build_bundle(model_dir, bundle)
+    with open(os.path.join(bundle, WEIGHTS_FILE), 'r+b') as f:
+        f.truncate(100)
+    with pytest.raises(ModelBundleError, match='incomplete'):
+        load_scorer(bundle)
@@ -0,0 +1,86 @@
+import os
+import sys
+import threading
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+import source_health
+from articles import ArticleBatch
+from news_fetcher import NewsSource, fetch_universe
+
+TICKERS = [f'T{i}' for i in range(8)]
+
+
+class TrackedSource(NewsSource):
+    """Records how many requests are in flight at once."""
+
+    name = ''
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    completed = 0
+
+    def get_articles(self, ticker: str) -> ArticleBatch:
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        self.wait()
+        with cls.lock:
+            cls.in_flight -= 1
+            cls.completed += 1
+        self.done()
+        articles = ArticleBatch()
+        articles.append(ticker, f'{ticker} {cls.name}', '', 'url', cls.name)
+        return articles
+
+    def wait(self) -> None:
+        threading.Event().wait(0.01)
+
+    def done(self) -> None:
+        pass
+
+
+fast_finished = threading.Event()
+
+
+class FastSource(TrackedSource):
+    name = 'Fast'
+    lock = threading.Lock()
+
+    def done(self) -> None:
+        if FastSource.completed == len(TICKERS):
+            fast_finished.set()
+
+
+class SlowSource(TrackedSource):
+    name = 'Slow'
+    lock = threading.Lock()
+    waits: list[bool] = []
+
+    def wait(self) -> None:
+        # Blocks until the fast host has worked through every ticker, which can only
+        # happen if the fast host's queue does not wait behind this one
+        SlowSource.waits.append(fast_finished.wait(timeout=5))
+
+
+def test_hosts_fetch_independently_within_limits():
+    source_health.reset()
+    batches = fetch_universe(
+        TICKERS,
+        sources={'Slow': SlowSource, 'Fast': FastSource},
+        concurrency={'Slow': 2, 'Fast': 3},
+    )
+    source_health.reset()
+
+    assert SlowSource.waits == [True] * len(TICKERS)
+    assert SlowSource.max_in_flight == 2
+    assert FastSource.max_in_flight == 3
+    # Each ticker's articles are joined in source order
+    assert [b.headline for b in batches] == [
+        [f'{ticker} Slow', f'{ticker} Fast'] for ticker in TICKERS
+    ]
@@ -0,0 +1,52 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+import profiling
+
+
+def busy_work() -> list[str]:
+    deadline = time.perf_counter() + 0.1
+    chunks: list[str] = []
+    while time.perf_counter() < deadline:
+        chunks.append('x' * 1000)
+    return chunks
+
+
+def test_stage_is_noop_when_disabled():
+    profiling.disable()
+    assert not profiling.is_enabled()
+    with profiling.stage('get_news'):
+        busy_work()
+
+
+def test_stage_writes_artifacts():
+    run_dir = tempfile.mkdtemp()
+    try:
+        profiling.enable(run_dir, sample_interval=0.001)
+        with profiling.stage('get_news'):
+            busy_work()
+
+        for suffix in ('.prof', '.pstats.txt', '.collapsed', '.tracemalloc.txt'):
+            assert os.path.getsize(os.path.join(run_dir, f'get_news{suffix}')) > 0
+
+        with open(os.path.join(run_dir, 'get_news.collapsed')) as f:
+            stack, count = f.readline().rsplit(' ', 1)
+        assert 'busy_work' in stack
+        assert int(count) > 0
+
+        with open(os.path.join(run_dir, 'run.json')) as f:
+            run = json.load(f)
+        assert [s['stage'] for s in run['stages']] == ['get_news']
+    finally:
+        profiling.disable()
+        shutil.rmtree(run_dir)
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+from config import INSERT_DATA
+from database import DatabaseManager
+from read_api import ReadAPI, start_server
+
+
+def scored(rows: list[tuple[str, str, str, float]]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                'ticker': ticker,
+                'headline': headline,
+                'date_posted': date_posted,
+                'article_link': 'url',
+                'source': 'Src',
+                'Positive': max(compound, 0),
+                'Negative': max(-compound, 0),
+                'Neutral': 1 - abs(compound),
+                'compound': compound,
+            }
+            for ticker, headline, date_posted, compound in rows
+        ]
+    )
+
+
+@pytest.fixture
+def dbm(tmp_path):
+    dbm = DatabaseManager(db_path=str(tmp_path / 'test.db'))
+    with dbm.get_connection() as conn:
+        for ticker, sector in (('ALPHA', 'Financials'), ('BETA', 'IT')):
+            conn.execute(
+                INSERT_DATA['ticker_meta'], [ticker, sector, 'Ind', 10.0, ticker]
+            )
+            conn.execute(
+                'INSERT INTO indices_constituents (index_name, ticker) VALUES (?, ?)',
+                ['nifty_50', ticker],
+            )
+    dbm.insert_articles(
+        scored(
+            [
+                ('ALPHA', 'a1', '2025-06-01 10:00:00', 0.5),
+                ('ALPHA', 'a2', '2025-06-01 15:00:00', -0.1),
+                ('ALPHA', 'a3', '2025-06-03 09:00:00', 0.3),
+                ('BETA', 'b1', '2025-06-02 11:00:00', -0.4),
+                ('BETA', 'b2', '2025-05-20 11:00:00', 0.9),
+            ]
+        ),
+        has_sentiment=True,
+    )
+    return dbm
+
+
+def get(api: ReadAPI, path: str, **params: str) -> tuple[int, object, bool]:
+    status, body, cached = asyncio.run(
+        api.handle(path, {k: [v] for k, v in params.items()})
+    )
+    return status, json.loads(body), cached
+
+
+JUNE = {'start': '2025-06-01', 'end': '2025-06-03'}
+
+
+def test_views(dbm):
+    api = ReadAPI(dbm)
+
+    _, news, _ = get(api, '/api/news', ticker='alpha', **JUNE)
+    assert [a['headline'] for a in news] == ['a3', 'a2', 'a1']
+
+    _, series, _ = get(api, '/api/series', ticker='ALPHA', **JUNE)
+    assert [(d['day'], d['articles']) for d in series] == [
+        ('2025-06-01', 2),
+        ('2025-06-03', 1),
+    ]
+    assert series[0]['compound'] == pytest.approx(0.2)
+
+    # BETA's May article is outside the range
+    _, treemap, _ = get(api, '/api/treemap', index='nifty_50', **JUNE)
+    assert [(t['ticker'], t['sector'], t['articles']) for t in treemap] == [
+        ('ALPHA', 'Financials', 3),
+        ('BETA', 'IT', 1),
+    ]
+    assert treemap[1]['compound'] == pytest.approx(-0.4)
+
+
+def test_bad_requests(dbm):
+    api = ReadAPI(dbm)
+    assert get(api, '/api/news', **JUNE)[0] == 400
+    assert get(api, '/api/treemap', index='nifty_9000')[0] == 400
+    assert get(api, '/api/series', ticker='ALPHA', start='June')[0] == 400
+    assert get(api, '/api/treemap', start='2025-06-03', end='2025-06-01')[0] == 400
+    assert get(api, '/nope')[0] == 404
+
+
+def test_failed_queries_are_answered_with_500(dbm):
+    api = ReadAPI(dbm)
+
+    async def broken(*args):
+        raise RuntimeError('database is locked')
+
+    news = api.routes['/api/news']
+    api.routes['/api/news'] = broken
+    assert get(api, '/api/news', ticker='ALPHA', **JUNE) == (
+        500,
+        {'error': 'Internal server error'},
+        False,
+    )
+    # The failure is not cached
+    api.routes['/api/news'] = news
+    status, _, cached = get(api, '/api/news', ticker='ALPHA', **JUNE)
+    assert (status, cached) == (200, False)
+
+
+def test_cache_is_dropped_after_ingest(dbm):
+    api = ReadAPI(dbm)
+    assert not get(api, '/api/treemap', index='nifty_50', **JUNE)[2]
+    assert get(api, '/api/treemap', index='nifty_50', **JUNE)[2]
+    assert not api.check_generation()
+
+    dbm.insert_articles(
+        scored([('BETA', 'b3', '2025-06-03 12:00:00', 0.2)]), has_sentiment=True
+    )
+    assert api.check_generation()
+    _, treemap, cached = get(api, '/api/treemap', index='nifty_50', **JUNE)
+    assert not cached
+    assert treemap[1]['articles'] == 2
+
+
+def test_cache_evicts_least_recently_used(dbm):
+    api = ReadAPI(dbm, cache_size=2)
+    for ticker in ('ALPHA', 'BETA', 'ALPHA', 'GAMMA'):
+        get(api, '/api/news', ticker=ticker, **JUNE)
+    assert get(api, '/api/news', ticker='ALPHA', **JUNE)[2]
+    assert not get(api, '/api/news', ticker='BETA', **JUNE)[2]
+
+
+def test_server_keeps_connection_alive(dbm):
+    async def exchange() -> list[bytes]:
+        server, poller = await start_server(ReadAPI(dbm), port=0, poll_interval=60)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        heads = []
+        for _ in range(2):
+            writer.write(
+                b'GET /api/series?ticker=ALPHA&start=2025-06-01&end=2025-06-03 '
+                b'HTTP/1.1\r\nHost: localhost\r\n\r\n'
+            )
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+            assert len(json.loads(await reader.readexactly(length))) == 2
+            heads.append(head)
+        writer.close()
+        poller.cancel()
+        server.close()
+        await server.wait_closed()
+        return heads
+
+    first, second = asyncio.run(exchange())
+    assert first.startswith(b'HTTP/1.1 200 OK')
+    assert b'X-Cache: miss' in first
+    assert b'X-Cache: hit' in second
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+from config import UNVERSIONED_SCORES
+from database import DatabaseManager
+from rescore import rescore
+
+
+class FakeScorer:
+    """Scores every headline Positive and counts one CPU second per batch."""
+
+    labels = ['Positive', 'Negative', 'Neutral']
+
+    def __init__(self, version, clock=None):
+        self.version = version
+        self.clock = clock
+        self.batches = []
+
+    def predict_proba(self, headlines, batch_size=None):
+        self.batches.append(list(headlines))
+        if self.clock is not None:
+            self.clock.now += 1
+        return np.tile([0.8, 0.1, 0.1], (len(headlines), 1))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def dbm(tmp_path):
+    dbm = DatabaseManager(str(tmp_path / 'test.db'), publish_snapshots=False)
+    articles = pd.DataFrame(
+        {
+            'ticker': ['TCS'] * 5,
+            'headline': [f'headline {i}' for i in range(5)],
+            'date_posted': [f'2025-06-0{i + 1} 10:00:00' for i in range(5)],
+            'source': ['Fake'] * 5,
+            'article_link': ['url'] * 5,
+        }
+    )
+    dbm.insert_articles(articles)
+    # The two oldest were scored before scores had versions
+    dbm.insert_articles(
+        articles[:2].assign(Positive=0.1, Negative=0.8, Neutral=0.1, compound=-0.8),
+        has_sentiment=True,
+    )
+    return dbm
+
+
+def test_rescore_fills_in_the_missing_version_in_priority_order(dbm):
+    scorer = FakeScorer('model@2')
+    assert rescore(batch_size=2, nlp=scorer, dbm=dbm) == 5
+    # Unscored articles first, newest first
+    assert scorer.batches == [
+        ['headline 4', 'headline 3'],
+        ['headline 2', 'headline 1'],
+        ['headline 0'],
+    ]
+    # Nothing is left for the same version
+    assert rescore(nlp=scorer, dbm=dbm) == 0
+
+    versions = dbm.get_score_versions()
+    assert dict(zip(versions.model_version, versions.articles, strict=True)) == {
+        'model@2': 5,
+        UNVERSIONED_SCORES: 2,
+    }
+    # Not promoted: the current scores are unchanged
+    current = dbm.get_articles(n=10, latest=False)
+    assert current['compound_sentiment'].tolist()[:2] == pytest.approx([-0.8, -0.8])
+    assert current['compound_sentiment'][2:].isna().all()
+
+
+def test_rescore_stops_within_the_cpu_budget(dbm, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, 'process_time', clock)
+    scorer = FakeScorer('model@2', clock)
+    # One second per batch: a third batch would overrun 2.5 seconds
+    assert rescore(cpu_seconds=2.5, batch_size=2, nlp=scorer, dbm=dbm) == 4
+    assert len(scorer.batches) == 2
+    assert rescore(cpu_seconds=2.5, batch_size=2, nlp=scorer, dbm=dbm) == 1
+
+
+def test_readers_choose_a_version_or_fall_back(dbm):
+    rescore(batch_size=2, cpu_seconds=60, nlp=FakeScorer('model@2'), dbm=dbm)
+    rescore(nlp=FakeScorer('model@3'), dbm=dbm, batch_size=1, promote=True)
+
+    # Promoted: the current scores are the newest version's
+    current = dbm.get_articles(n=10)
+    assert current['compound_sentiment'].tolist() == pytest.approx([0.8] * 5)
+
+    old = dbm.get_articles(n=10, latest=False, version=UNVERSIONED_SCORES)
+    assert old['model_version'].tolist() == [UNVERSIONED_SCORES] * 2 + ['model@3'] * 3
+    strict = dbm.get_articles(
+        n=10, latest=False, version=UNVERSIONED_SCORES, fallback=False
+    )
+    assert strict['compound_sentiment'].tolist()[:2] == pytest.approx([-0.8, -0.8])
+    assert strict['compound_sentiment'][2:].isna().all()
+    assert strict['model_version'][2:].isna().all()
@@ -0,0 +1,129 @@
+import functools
+import os
+import sys
+
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+import main
+import news_fetcher
+import source_health
+from articles import ArticleBatch
+from news_fetcher import NewsSource, fetch_universe
+from run_journal import RunJournal
+
+TICKERS = ['T0', 'T1', 'T2', 'T3']
+
+
+def batch(ticker, *headlines):
+    articles = ArticleBatch()
+    for headline in headlines:
+        articles.append(ticker, headline, '2025-06-30 10:00:00', 'url', 'Fake')
+    return articles
+
+
+class FakeSource(NewsSource):
+    """Two headlines per ticker; tickers in `failing` get a failed response."""
+
+    failing: set[str] = set()
+    fetched: list[str] = []
+
+    def get_articles(self, ticker):
+        FakeSource.fetched.append(ticker)
+        if ticker in FakeSource.failing:
+            self.response_ok = False
+            return ArticleBatch()
+        return batch(ticker, f'{ticker} a', f'{ticker} b')
+
+
+class OtherSource(FakeSource):
+    def get_articles(self, ticker):
+        return batch(ticker, f'{ticker} other')
+
+
+class FakeDatabase:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.inserted = []
+
+    def insert_articles(self, df, has_sentiment):
+        if self.fail:
+            raise OSError('disk full')
+        self.inserted.append(df)
+
+
+def test_journal_survives_reopening_and_a_torn_write(tmp_path):
+    with RunJournal('run', str(tmp_path)) as journal:
+        journal.record('T0', batch('T0', 'x', 'y'))
+        journal.record('T1', batch('T1', 'z'))
+        # A ticker is only journaled once
+        journal.record('T0', batch('T0', 'x', 'y'))
+    # A crash halfway through writing the next entry
+    with open(journal.path, 'a') as f:
+        f.write('{"ticker": "T2", "articles": {"tick')
+
+    with RunJournal('run', str(tmp_path)) as resumed:
+        assert resumed.completed == {'T0', 'T1'}
+        assert resumed.staged().headline == ['x', 'y', 'z']
+        resumed.record('T2', batch('T2', 'w'))
+    assert RunJournal('run', str(tmp_path)).completed == {'T0', 'T1', 'T2'}
+
+    resumed.discard()
+    assert not os.path.exists(resumed.path)
+    with pytest.raises(ValueError, match='run id'):
+        RunJournal('../run', str(tmp_path))
+
+
+def test_fetch_universe_reports_tickers_every_source_answered():
+    source_health.reset()
+    FakeSource.failing = {'T1'}
+    reported = {}
+    batches = fetch_universe(
+        TICKERS,
+        sources={'Fake': FakeSource, 'Other': OtherSource},
+        on_ticker=lambda ticker, articles: reported.update({ticker: articles}),
+    )
+    source_health.reset()
+
+    assert sorted(reported) == ['T0', 'T2', 'T3']
+    assert reported['T2'].headline == ['T2 a', 'T2 b', 'T2 other']
+    assert [b.headline for b in batches][:2] == [
+        ['T0 a', 'T0 b', 'T0 other'],
+        ['T1 other'],
+    ]
+
+
+def test_rerun_skips_journaled_tickers(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'universe_tickers', lambda universe, dbm: TICKERS)
+    monkeypatch.setattr(news_fetcher, 'NEWS_SOURCES', {'Fake': FakeSource})
+    monkeypatch.setattr(
+        main, 'RunJournal', functools.partial(RunJournal, directory=str(tmp_path))
+    )
+    source_health.reset()
+
+    # T3 fails and the insert dies: the other tickers stay journaled
+    FakeSource.failing = {'T3'}
+    FakeSource.fetched = []
+    monkeypatch.setattr(main, 'DatabaseManager', lambda: FakeDatabase(fail=True))
+    main.get_news('nifty_50', run_id='daily')
+    assert sorted(FakeSource.fetched) == TICKERS
+
+    FakeSource.failing = set()
+    FakeSource.fetched = []
+    database = FakeDatabase()
+    monkeypatch.setattr(main, 'DatabaseManager', lambda: database)
+    main.get_news('nifty_50', run_id='daily')
+    source_health.reset()
+
+    assert FakeSource.fetched == ['T3']
+    (inserted,) = database.inserted
+    assert sorted(inserted['headline']) == [
+        f'{ticker} {suffix}' for ticker in TICKERS for suffix in 'ab'
+    ]
+    # Stored, so the journal is gone and the next run starts fresh
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,100 @@
+import os
+import sys
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+from scheduler import REQUESTS_PER_POLL, IntradayDaemon, PollScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_token_bucket_enforces_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_hour=3600, capacity=2, clock=clock)
+    bucket.take(2)
+    assert bucket.wait_time(1) == 1.0
+    clock.sleep(1)
+    assert bucket.wait_time(1) == 0.0
+
+
+def test_first_sweep_orders_by_market_cap():
+    clock = FakeClock()
+    scheduler = PollScheduler(
+        {'SMALL': 10.0, 'LARGE': 10000.0, 'UNKNOWN': None}, clock=clock
+    )
+    assert scheduler.pop() == 'LARGE'
+    # A missing market cap falls back to the median of the known ones
+    assert (
+        scheduler.states['UNKNOWN'].mcap_weight > scheduler.states['SMALL'].mcap_weight
+    )
+
+
+def test_news_velocity_shortens_interval():
+    clock = FakeClock()
+    scheduler = PollScheduler(
+        {'BUSY': 100.0, 'QUIET': 100.0},
+        requests_per_hour=60,
+        min_interval=60,
+        max_interval=24 * 3600,
+        clock=clock,
+    )
+    for ticker in ('BUSY', 'QUIET'):
+        assert scheduler.pop() == ticker
+        scheduler.record_poll(ticker, 0)
+
+    for _ in range(5):
+        ticker, due_in = scheduler.peek()
+        clock.sleep(max(due_in, 0))
+        scheduler.pop()
+        scheduler.record_poll(ticker, 10 if ticker == 'BUSY' else 0)
+
+    busy, quiet = scheduler.states['BUSY'], scheduler.states['QUIET']
+    assert busy.rate > quiet.rate
+    assert busy.interval < quiet.interval
+    # Current shares of the 20 polls/hour budget add back up to it
+    polls_per_hour = sum(3600 / scheduler.interval_for(s) for s in (busy, quiet))
+    assert abs(polls_per_hour - 60 / REQUESTS_PER_POLL) < 1e-6
+
+
+def test_daemon_respects_budget_and_scores_pending():
+    clock = FakeClock()
+    fetched: list[tuple[float, str]] = []
+    scored: list[int] = []
+
+    def fetch(ticker: str) -> list[dict[str, str]]:
+        fetched.append((clock.now, ticker))
+        return [{'ticker': ticker, 'headline': f'{ticker} {clock.now}'}]
+
+    daemon = IntradayDaemon(
+        {f'T{i}': 100.0 for i in range(10)},
+        requests_per_hour=360,
+        score_batch=4,
+        fetch=fetch,
+        store=lambda ticker, articles: len(articles),
+        score=scored.append,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    daemon.run(max_polls=20)
+
+    assert len(fetched) == 20
+    # 360 requests/hour is one poll every 30s once the initial burst is spent
+    elapsed_hours = fetched[-1][0] / 3600
+    burst_polls = daemon.bucket.capacity / REQUESTS_PER_POLL
+    assert len(fetched) <= burst_polls + elapsed_hours * 360 / REQUESTS_PER_POLL + 1
+    assert sum(scored) == 20
+    # Only the flush when the daemon stops may score a partial batch
+    assert all(n >= 4 for n in scored[:-1])
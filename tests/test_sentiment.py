@@ -0,0 +1,115 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+import numpy as np
+
+import utils
+from sentiment import SentimentScorer, TokenCache, scores_frame, softmax
+
+VOCAB = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', 'profit', 'loss', 'rises', 'falls', 'q1']
+
+
+@pytest.fixture
+def tokenizer(tmp_path):
+    from transformers.models.bert import BertTokenizerFast
+
+    vocab_file = tmp_path / 'vocab.txt'
+    vocab_file.write_text('\n'.join(VOCAB))
+    return BertTokenizerFast(str(vocab_file))
+
+
+class FakeModel:
+    """Scores each headline by counting 'profit' and 'loss' tokens."""
+
+    config = SimpleNamespace(id2label={0: 'Neutral', 1: 'Positive', 2: 'Negative'})
+
+    def __call__(self, input_ids, attention_mask):
+        import torch
+
+        profit = (input_ids == VOCAB.index('profit')).sum(dim=1).float()
+        loss = (input_ids == VOCAB.index('loss')).sum(dim=1).float()
+        logits = torch.stack([torch.zeros_like(profit), profit, loss], dim=1) * 5
+        return SimpleNamespace(logits=logits)
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TokenCache(max_size=2)
+    cache.put('a', [1])
+    cache.put('b', [2])
+    cache.get('a')
+    cache.put('c', [3])
+    assert cache.get('b') is None
+    assert cache.get('a') == [1]
+    assert len(cache) == 2
+
+
+def test_encode_tokenizes_only_cache_misses(tokenizer):
+    scorer = SentimentScorer(FakeModel(), tokenizer)
+    first = scorer.encode(['profit rises', 'loss falls'])
+    assert first[0] == [2, 4, 6, 3]
+
+    calls = []
+    tokenize = scorer.tokenizer
+    scorer.tokenizer = lambda texts, **kw: calls.append(texts) or tokenize(texts, **kw)
+    assert scorer.encode(['loss falls', 'q1 profit']) == [first[1], [2, 8, 4, 3]]
+    assert calls == [['q1 profit']]
+
+
+@pytest.mark.parametrize('overlap', [True, False])
+def test_scorer_keeps_input_order(tokenizer, overlap):
+    pytest.importorskip('torch')
+    scorer = SentimentScorer(FakeModel(), tokenizer, batch_size=2, overlap=overlap)
+    headlines = ['q1 profit profit rises', 'loss', 'q1', 'profit', 'loss loss falls']
+    results = scorer(headlines)
+
+    assert len(results) == len(headlines)
+    top = [max(r, key=lambda d: d['score'])['label'] for r in results]
+    assert top == ['Positive', 'Negative', 'Neutral', 'Positive', 'Negative']
+    assert all(abs(sum(d['score'] for d in r) - 1) < 1e-5 for r in results)
+
+
+def test_prefetch_reraises_tokenizer_errors(tokenizer):
+    pytest.importorskip('torch')
+    scorer = SentimentScorer(FakeModel(), tokenizer, batch_size=1)
+
+    def failing(texts, **kw):
+        raise RuntimeError('tokenizer failed')
+
+    scorer.tokenizer = failing
+    with pytest.raises(RuntimeError, match='tokenizer failed'):
+        scorer.predict_proba(['profit', 'loss', 'q1'])
+
+
+def test_softmax_handles_large_logits():
+    probs = softmax(np.array([[1000.0, 1000.0, 0.0], [0.0, 0.0, 0.0]]))
+    np.testing.assert_allclose(probs, [[0.5, 0.5, 0.0], [1 / 3, 1 / 3, 1 / 3]])
+
+
+def test_scores_frame_columns_and_compound():
+    probs = np.array([[0.1, 0.7, 0.2], [0.2, 0.1, 0.7], [0.5, 0.25, 0.25]])
+    df = scores_frame(probs, ['Neutral', 'Positive', 'Negative'])
+    assert list(df.columns) == ['Positive', 'Negative', 'Neutral', 'compound']
+    # A tie goes to Negative, as in the pipeline path
+    assert df['compound'].tolist() == [0.7, -0.7, -0.25]
+
+
+def test_direct_path_matches_pipeline_dicts(tokenizer):
+    pytest.importorskip('torch')
+    scorer = SentimentScorer(FakeModel(), tokenizer, batch_size=2)
+    headlines = ['profit rises', 'loss falls', 'q1', 'profit loss loss']
+
+    direct = utils.analyse_sentiment(headlines, nlp=scorer)
+    # A plain callable has no predict_proba, so it goes through the dict path
+    dicts = utils.analyse_sentiment(headlines, nlp=lambda h, batch_size: scorer(h))
+    np.testing.assert_allclose(
+        direct.to_numpy(), dicts[direct.columns].to_numpy(), atol=1e-6
+    )
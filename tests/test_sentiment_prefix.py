@@ -0,0 +1,140 @@
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+from config import INSERT_DATA
+from database import DatabaseManager
+from sentiment_prefix import SentimentPrefix
+
+TICKERS = ['ALPHA', 'BETA', 'GAMMA', 'DELTA']
+DAY0 = date(2025, 1, 1)
+
+
+@pytest.fixture
+def dbm(tmp_path):
+    dbm = DatabaseManager(db_path=str(tmp_path / 'test.db'))
+    with dbm.get_connection() as conn:
+        # DELTA has no metadata, so it belongs to no sector
+        for ticker, sector in zip(TICKERS[:3], ['Banks', 'Banks', 'IT'], strict=True):
+            conn.execute(
+                INSERT_DATA['ticker_meta'], [ticker, sector, sector, 1.0, ticker]
+            )
+    return dbm
+
+
+def random_articles(
+    rng: np.random.Generator, n: int, days: int = 30, scored: bool = True
+) -> pd.DataFrame:
+    rows = []
+    for _ in range(n):
+        probs = rng.dirichlet([1, 1, 1])
+        day = DAY0 + timedelta(days=int(rng.integers(days)))
+        rows.append(
+            {
+                'ticker': str(rng.choice(TICKERS)),
+                # Few distinct headlines, so later batches replace earlier rows
+                'headline': f'headline {rng.integers(40)}',
+                'date_posted': f'{day} 09:15:00',
+                'article_link': 'url',
+                'source': 'Src',
+                'Positive': probs[0],
+                'Negative': probs[1],
+                'Neutral': probs[2],
+                'compound': probs[0] - probs[1],
+            }
+        )
+    articles = pd.DataFrame(rows).drop_duplicates(['ticker', 'headline'])
+    if not scored:
+        articles = articles.drop(
+            columns=['Positive', 'Negative', 'Neutral', 'compound']
+        )
+    return articles
+
+
+def expected_mean(dbm: DatabaseManager, tickers: list[str], start: date, end: date):
+    with dbm.get_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT avg(compound_sentiment) FROM article_data
+            WHERE list_contains(?, ticker) AND compound_sentiment IS NOT NULL
+                AND date_posted >= ? AND date_posted < ?
+            """,
+            [tickers, str(start), str(end + timedelta(days=1))],
+        ).fetchone()
+    return row[0] if row else None
+
+
+def assert_matches_articles(dbm, prefix, rng):
+    for _ in range(10):
+        start = DAY0 + timedelta(days=int(rng.integers(-5, 35)))
+        end = start + timedelta(days=int(rng.integers(0, 15)))
+        for ticker in TICKERS:
+            assert prefix.mean(ticker, start, end) == pytest.approx(
+                expected_mean(dbm, [ticker], start, end), abs=1e-6
+            )
+        assert prefix.group_mean('sector', 'Banks', start, end) == pytest.approx(
+            expected_mean(dbm, ['ALPHA', 'BETA'], start, end), abs=1e-6
+        )
+
+
+def test_incremental_updates_match_a_rescan(dbm):
+    rng = np.random.default_rng(0)
+    dbm.insert_articles(random_articles(rng, 60), has_sentiment=True)
+    prefix = SentimentPrefix.load(dbm)
+    assert_matches_articles(dbm, prefix, rng)
+
+    # New articles, rescored ones and unscored re-inserts that move a scored
+    # article to another day
+    for scored in (True, True, False, True):
+        articles = random_articles(rng, 30, scored=scored)
+        dbm.insert_articles(articles, has_sentiment=scored)
+        assert prefix.sync() > 0
+        assert_matches_articles(dbm, prefix, rng)
+    assert prefix.sync() == 0
+
+
+def test_sync_grows_the_day_grid(dbm):
+    rng = np.random.default_rng(1)
+    dbm.insert_articles(random_articles(rng, 20), has_sentiment=True)
+    prefix = SentimentPrefix.load(dbm)
+    later = random_articles(rng, 5).assign(
+        date_posted=f'{date.today() + timedelta(days=3)} 10:00:00',
+        headline=lambda df: df['headline'] + ' later',
+    )
+    dbm.insert_articles(later, has_sentiment=True)
+    prefix.sync()
+
+    ticker = later['ticker'].iloc[0]
+    day = date.today() + timedelta(days=3)
+    assert prefix.mean(ticker, day, day) == pytest.approx(
+        later.loc[later['ticker'] == ticker, 'compound'].mean(), abs=1e-6
+    )
+
+
+def test_rebuild_and_ticker_means(dbm):
+    rng = np.random.default_rng(2)
+    dbm.insert_articles(random_articles(rng, 40), has_sentiment=True)
+    prefix = SentimentPrefix.load(dbm)
+    with dbm.get_connection() as conn:
+        conn.execute("DELETE FROM article_data WHERE ticker = 'ALPHA'")
+    dbm.rebuild_sentiment_prefix()
+    assert prefix.sync() == -1
+    assert prefix.mean('ALPHA', DAY0, DAY0 + timedelta(days=30)) is None
+
+    means = prefix.ticker_means(DAY0, DAY0 + timedelta(days=30))
+    assert 'ALPHA' not in set(means['ticker'])
+    for row in means.itertuples():
+        assert row.compound == pytest.approx(
+            expected_mean(dbm, [row.ticker], DAY0, DAY0 + timedelta(days=30)),
+            abs=1e-6,
+        )
@@ -0,0 +1,129 @@
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+from database import DatabaseManager
+from shift_detector import ShiftDetector, record_shifts
+
+HOUR = 3600.0
+
+
+def reference(compound, posted_at, alpha, rate_hours):
+    """Article-at-a-time EWMA and decayed count, for one ticker."""
+    s = q = w = count = 0.0
+    last = 0.0
+    for x, t in zip(compound, posted_at, strict=True):
+        s = (1 - alpha) * s + alpha * x
+        q = (1 - alpha) * q + alpha * x * x
+        w = (1 - alpha) * w + alpha
+        count = count * math.exp(-(t - last) / (rate_hours * HOUR)) + 1
+        last = t
+    mean = s / w
+    return mean, math.sqrt(q / w - mean**2), count / rate_hours
+
+
+def test_batched_update_matches_the_article_at_a_time_reference():
+    rng = np.random.default_rng(0)
+    tickers = rng.choice(['A', 'B', 'C'], 300)
+    compound = rng.uniform(-1, 1, 300)
+    posted_at = np.sort(rng.uniform(0, 100 * HOUR, 300))
+
+    detector = ShiftDetector(alpha=0.1, rate_hours=6)
+    # Uneven batches, each shuffled: the update sorts by ticker and time
+    for batch in np.split(np.arange(300), [7, 8, 120, 250]):
+        shuffled = rng.permutation(batch)
+        detector.update(
+            tickers[shuffled].tolist(), compound[shuffled], posted_at[shuffled]
+        )
+
+    state = detector.to_frame().set_index('ticker')
+    got_mean, got_std = detector.mean_std(['A', 'B', 'C'])
+    for i, ticker in enumerate(['A', 'B', 'C']):
+        mask = tickers == ticker
+        mean, std, rate = reference(compound[mask], posted_at[mask], 0.1, 6)
+        assert got_mean[i] == pytest.approx(mean)
+        assert got_std[i] == pytest.approx(std)
+        assert state.loc[ticker, 'decayed_count'] / 6 == pytest.approx(rate)
+        assert state.loc[ticker, 'articles'] == mask.sum()
+
+
+def steady_then(detector, ticker, shifted, n=40):
+    """`n` articles around +0.2 an hour apart, then a batch of `shifted` scores."""
+    rng = np.random.default_rng(1)
+    steady = 0.2 + rng.normal(0, 0.05, n)
+    assert not detector.update([ticker] * n, steady, np.arange(n) * HOUR)
+    k = len(shifted)
+    return detector.update([ticker] * k, shifted, (n + np.arange(k)) * HOUR)
+
+
+def test_a_batch_far_from_the_baseline_is_a_shift():
+    detector = ShiftDetector(z_threshold=3, min_articles=20, min_std=0.1)
+    (shift,) = steady_then(detector, 'TCS', [-0.6, -0.5, -0.7])
+    assert shift.ticker == 'TCS'
+    assert shift.articles == 3
+    assert shift.batch_mean == pytest.approx(-0.6)
+    assert shift.baseline_mean == pytest.approx(0.2, abs=0.05)
+    # The baseline spread is below the floor, so the floor sets the scale
+    assert shift.z == pytest.approx((-0.6 - shift.baseline_mean) / (0.1 / math.sqrt(3)))
+    assert shift.articles_per_hour > 0
+
+    # Nearby scores are not a shift
+    assert not steady_then(ShiftDetector(), 'TCS', [0.25, 0.15])
+
+
+def test_no_shift_before_min_articles():
+    detector = ShiftDetector(min_articles=50)
+    assert not steady_then(detector, 'TCS', [-0.9, -0.9], n=40)
+
+
+def test_state_and_shifts_are_stored(tmp_path):
+    dbm = DatabaseManager(str(tmp_path / 'test.db'), publish_snapshots=False)
+    dates = pd.date_range('2025-06-01', periods=30, freq='h')
+    steady = pd.DataFrame(
+        {
+            'ticker': ['TCS'] * 30 + ['INFY'] * 30,
+            'date_posted': list(dates.astype(str)) * 2,
+            'compound': [0.2, 0.3] * 30,
+        }
+    )
+    assert record_shifts(dbm, steady) == []
+    state = dbm.get_shift_state()
+    assert state['ticker'].tolist() == ['INFY', 'TCS']
+    assert state['articles'].tolist() == [30, 30]
+    assert state['last_seen'].iloc[0] == pd.Timestamp('2025-06-02 05:00').timestamp()
+
+    # A later run continues from the stored state; unparseable dates count as now
+    drop = pd.DataFrame(
+        {
+            'ticker': ['TCS', 'TCS', 'INFY'],
+            'date_posted': ['2025-06-03 10:00:00', '2025-06-03 11:00:00', 'not a date'],
+            'compound': [-0.8, -0.9, 0.25],
+        }
+    )
+    (shift,) = record_shifts(dbm, drop)
+    assert shift.ticker == 'TCS'
+    state = dbm.get_shift_state()
+    assert state['articles'].tolist() == [31, 32]
+    assert state['last_seen'].iloc[0] == pytest.approx(time.time(), abs=60)
+
+    stored = dbm.get_sentiment_shifts()
+    assert stored['ticker'].tolist() == ['TCS']
+    assert stored['z'].iloc[0] == pytest.approx(shift.z)
+    assert stored['articles'].iloc[0] == 2
+    assert stored['posted_at'].iloc[0] == pd.Timestamp('2025-06-03 11:00:00')
+
+    detector = ShiftDetector.from_frame(dbm.get_shift_state())
+    assert len(detector) == 2
+    mean, _ = detector.mean_std(['TCS'])
+    assert mean[0] < 0.25
@@ -0,0 +1,86 @@
+import os
+import sys
+
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+import source_health
+from articles import ArticleBatch
+from news_fetcher import NewsSource, TickerNewsObject
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    source_health.reset()
+    source_health.configure(threshold=2, cooldown=60, clock=clock)
+    yield clock
+    source_health.reset()
+    source_health.configure()
+
+
+def test_breaker_opens_probes_and_closes(clock):
+    for _ in range(2):
+        assert source_health.allow('Yahoo')
+        source_health.record('Yahoo', source_health.EMPTY)
+    assert not source_health.allow('Yahoo')
+
+    # A failed probe reopens the breaker for a new cooldown
+    clock.now = 60
+    assert source_health.allow('Yahoo')
+    assert not source_health.allow('Yahoo')
+    source_health.record('Yahoo', source_health.FAILED)
+    clock.now = 100
+    assert not source_health.allow('Yahoo')
+
+    clock.now = 120
+    assert source_health.allow('Yahoo')
+    source_health.record('Yahoo', source_health.OK, articles=5)
+    assert source_health.allow('Yahoo')
+
+    health = source_health.summary()['Yahoo']
+    assert health['state'] == source_health.CLOSED
+    assert (health['ok'], health['empty'], health['failed']) == (1, 2, 1)
+    assert (health['skipped'], health['trips'], health['articles']) == (3, 2, 5)
+
+
+class BrokenSource(NewsSource):
+    calls = 0
+
+    def get_articles(self, ticker: str) -> ArticleBatch:
+        BrokenSource.calls += 1
+        self.response_ok = False
+        return ArticleBatch()
+
+
+class WorkingSource(NewsSource):
+    def get_articles(self, ticker: str) -> ArticleBatch:
+        articles = ArticleBatch()
+        articles.append(ticker, f'{ticker} news', '2025-01-01 10:00:00', 'url', 'Src')
+        return articles
+
+
+def test_collect_news_skips_open_sources(clock):
+    BrokenSource.calls = 0
+    for ticker in ('A', 'B', 'C', 'D'):
+        news = TickerNewsObject(ticker)
+        news.news_sources = {'Broken': BrokenSource, 'Working': WorkingSource}
+        assert news.collect_news().headline == [f'{ticker} news']
+
+    assert BrokenSource.calls == 2
+    summary = source_health.summary()
+    assert summary['Broken']['skipped'] == 2
+    assert summary['Working']['ok'] == 4
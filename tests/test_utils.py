@@ -0,0 +1,117 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import duckdb
+import pytest
+
+# This adds the 'src' directory to the Python path.
+src_abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+if src_abs_path not in sys.path:
+    sys.path.append(src_abs_path)
+
+import utils
+from config import DEDUP_WATERMARK_KEY
+from database import DatabaseManager
+
+# Same columns as config.CREATE_TABLE['article_data'] but without the primary key,
+# mirroring database files written before the key existed.
+LEGACY_ARTICLE_TABLE = """
+    CREATE TABLE article_data (
+        ticker TEXT NOT NULL,
+        headline TEXT NOT NULL,
+        date_posted TEXT NOT NULL,
+        source TEXT,
+        article_link TEXT,
+        negative_sentiment FLOAT DEFAULT NULL,
+        positive_sentiment FLOAT DEFAULT NULL,
+        neutral_sentiment FLOAT DEFAULT NULL,
+        compound_sentiment FLOAT DEFAULT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+@pytest.fixture
+def legacy_db_path():
+    tempdir_path = tempfile.mkdtemp()
+    db_path = f'{tempdir_path}/legacy.db'
+    with duckdb.connect(db_path) as conn:
+        conn.execute(LEGACY_ARTICLE_TABLE)
+    yield db_path
+    shutil.rmtree(tempdir_path)
+
+
+def insert_rows(db_path: str, rows: list[tuple[str, str, str]]) -> None:
+    with duckdb.connect(db_path) as conn:
+        conn.executemany(
+            'INSERT INTO article_data (ticker, headline, date_posted, created_at) '
+            'VALUES (?, ?, ?, CAST(? AS TIMESTAMP))',
+            [(ticker, headline, '2025-01-01', ts) for ticker, headline, ts in rows],
+        )
+
+
+def count_rows(db_path: str) -> int:
+    with duckdb.connect(db_path) as conn:
+        return conn.execute('SELECT count(*) FROM article_data').fetchone()[0]
+
+
+def test_incremental_dedup_only_checks_new_keys(legacy_db_path):
+    insert_rows(
+        legacy_db_path,
+        [
+            ('SBIN', 'old duplicate', '2025-01-01 10:00:00'),
+            ('SBIN', 'old duplicate', '2025-01-01 11:00:00'),
+        ],
+    )
+    DatabaseManager(legacy_db_path).set_state(
+        DEDUP_WATERMARK_KEY, '2025-01-02 00:00:00'
+    )
+    insert_rows(
+        legacy_db_path,
+        [
+            ('TCS', 'new duplicate', '2025-01-03 10:00:00'),
+            ('TCS', 'new duplicate', '2025-01-03 11:00:00'),
+            ('TCS', 'new duplicate', '2025-01-03 12:00:00'),
+            ('INFY', 'unique', '2025-01-03 12:00:00'),
+        ],
+    )
+
+    # Duplicates older than the watermark are left to the full scan
+    assert utils.deduplicate_db(db_path=legacy_db_path) == 2
+    assert count_rows(legacy_db_path) == 4
+
+    with duckdb.connect(legacy_db_path) as conn:
+        kept = conn.execute(
+            "SELECT CAST(created_at AS TEXT) FROM article_data WHERE ticker = 'TCS'"
+        ).fetchall()
+    assert kept == [('2025-01-03 10:00:00',)]
+
+    state = DatabaseManager(legacy_db_path).get_state(DEDUP_WATERMARK_KEY)
+    assert state == '2025-01-03 12:00:00'
+    assert utils.deduplicate_db(db_path=legacy_db_path) == 0
+
+
+def test_incremental_dedup_catches_old_key_reinserted(legacy_db_path):
+    insert_rows(legacy_db_path, [('SBIN', 'headline', '2025-01-01 10:00:00')])
+    assert utils.deduplicate_db(db_path=legacy_db_path) == 0
+
+    insert_rows(legacy_db_path, [('SBIN', 'headline', '2025-01-05 10:00:00')])
+    assert utils.deduplicate_db(db_path=legacy_db_path) == 1
+    assert count_rows(legacy_db_path) == 1
+
+
+def test_full_dedup_sets_watermark(legacy_db_path):
+    insert_rows(
+        legacy_db_path,
+        [
+            ('SBIN', 'old duplicate', '2025-01-01 10:00:00'),
+            ('SBIN', 'old duplicate', '2025-01-01 11:00:00'),
+        ],
+    )
+    assert utils.deduplicate_db(incremental=False, db_path=legacy_db_path) == 1
+    assert count_rows(legacy_db_path) == 1
+    state = DatabaseManager(legacy_db_path).get_state(DEDUP_WATERMARK_KEY)
+    assert state == '2025-01-01 11:00:00'